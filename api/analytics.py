@@ -0,0 +1,132 @@
+"""User dashboard analytics snapshot (``/api/analytics/overview/``).
+
+The snapshot is built from at most 365 ``UserDailyActivity`` rollup rows, one
+conditional-aggregation query over the user's investments, two short "recent
+activity" lookups and the user's ledger row, then cached per user and
+``days`` window. Any change to the user's transactions, investments or ledger
+bumps a per-user version number, which orphans every cached window at once.
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from investments.models import UserInvestment
+from transactions.ledger import get_ledger_summary
+from transactions.models import Transaction, UserDailyActivity
+
+CACHE_PREFIX = "dashboard-analytics"
+
+
+def _version_key(user_id) -> str:
+    return f"{CACHE_PREFIX}:v:{user_id}"
+
+
+def _snapshot_key(user_id, days: int, version: int) -> str:
+    # The date is part of the key so the window rolls over at midnight.
+    return f"{CACHE_PREFIX}:{user_id}:{version}:{days}:{timezone.localdate().isoformat()}"
+
+
+def invalidate_dashboard_analytics(user_ids) -> None:
+    """Drop cached snapshots for ``user_ids`` (any window)."""
+    for user_id in user_ids:
+        key = _version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, timeout=None)
+
+
+def _action_type(tx_type: str) -> str:
+    if tx_type in ("deposit", "manual_credit"):
+        return "Deposit"
+    if tx_type == "withdrawal":
+        return "Withdrawal"
+    if tx_type == "profit":
+        return "ROI"
+    return (tx_type or "Transaction").title()
+
+
+def build_dashboard_analytics(user, days: int) -> dict:
+    start_date = timezone.localdate() - timezone.timedelta(days=days - 1)
+
+    # CRITICAL: Always filter by user - RLS policies are NOT configured in database
+    daily_rows = list(
+        UserDailyActivity.objects.filter(user=user, day__gte=start_date).values_list(
+            "day", "tx_count", "investment_count", "deposit_count", "withdrawal_count"
+        )
+    )
+    activity_by_day = {day: tx_count + inv_count for day, tx_count, inv_count, _, _ in daily_rows}
+
+    status_overview = UserInvestment.objects.filter(user=user).aggregate(
+        active=Count("id", filter=Q(status="approved")),
+        completed=Count("id", filter=Q(status="completed")),
+        pending=Count("id", filter=Q(status="pending")),
+    )
+
+    activity_over_time = []
+    for offset in range(days):
+        day = start_date + timezone.timedelta(days=offset)
+        activity_over_time.append({"date": day.isoformat(), "count": int(activity_by_day.get(day, 0))})
+
+    tx_recent = Transaction.objects.filter(user=user).order_by("-created_at").values_list(
+        "created_at", "tx_type", "status"
+    )[:10]
+    inv_recent = (
+        UserInvestment.objects.filter(user=user)
+        .order_by("-created_at")
+        .values_list("created_at", "status", "plan__name")[:10]
+    )
+    recent_activity = [
+        {
+            "date": created_at.isoformat() if created_at else "",
+            "action_type": _action_type(tx_type),
+            "status": status,
+        }
+        for created_at, tx_type, status in tx_recent
+    ]
+    recent_activity += [
+        {
+            "date": created_at.isoformat() if created_at else "",
+            "action_type": f"Investment ({plan_name or 'Investment'})",
+            "status": status,
+        }
+        for created_at, status, plan_name in inv_recent
+    ]
+    recent_activity.sort(key=lambda x: x["date"], reverse=True)
+
+    ledger = get_ledger_summary(user)
+
+    return {
+        "window_days": days,
+        "activity_over_time": activity_over_time,
+        "transaction_breakdown": {
+            "deposits": sum(row[3] for row in daily_rows),
+            "withdrawals": sum(row[4] for row in daily_rows),
+        },
+        "investment_status_overview": status_overview,
+        "recent_activity": recent_activity[:10],
+        "totals": {
+            "locked_roi_total": ledger.profit_total,
+            "total_invested": ledger.invested_principal,
+        },
+        "scoping": {
+            "db_vendor": connection.vendor,
+            "user_filtered": True,
+        },
+    }
+
+
+def get_dashboard_analytics(user, days: int) -> dict:
+    """Return the cached snapshot for ``(user, days)``, building it on a miss."""
+    version = cache.get_or_set(_version_key(user.pk), 1, timeout=None)
+    key = _snapshot_key(user.pk, days, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_dashboard_analytics(user, days)
+        cache.set(key, snapshot, timeout=settings.DASHBOARD_ANALYTICS_CACHE_SECONDS)
+    return snapshot
@@ -0,0 +1,75 @@
+"""Keyset (seek) pagination helpers.
+
+A cursor is an opaque token holding the last row's ``(created_at, id)``.
+The next page is every row strictly after it in ``-created_at, -id`` order,
+so an index led by ``created_at`` serves each page without an OFFSET scan.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def parse_limit(value, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    if limit <= 0:
+        return default
+    return min(limit, maximum)
+
+
+def encode_cursor(created_at, pk) -> str:
+    raw = json.dumps([created_at.isoformat(), str(pk)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_raw, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(created_raw)
+    except (ValueError, TypeError):
+        created_at = None
+    if created_at is None:
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return created_at, pk
+
+
+def keyset_page(queryset, cursor: str | None, limit: int, field: str = "created_at"):
+    """Return ``(rows, next_cursor)`` for one page of ``queryset``, newest first."""
+    queryset = queryset.order_by(f"-{field}", "-pk")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f"{field}__lt": created_at}) | Q(**{field: created_at, "pk__lt": pk}))
+    rows = list(queryset[: limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], field), rows[-1].pk)
+    return rows, next_cursor
+
+
+def keyset_response(data, next_cursor: str | None, *, envelope: bool, **extra) -> Response:
+    """Plain list (cursor in ``X-Next-Cursor``) or a ``results`` envelope.
+
+    Existing clients that expect a bare array keep working; ``envelope``
+    callers get ``next_cursor`` (and any ``extra`` keys) in the body.
+    """
+    if envelope:
+        response = Response({"results": data, "next_cursor": next_cursor, **extra})
+    else:
+        response = Response(data)
+    if next_cursor:
+        response["X-Next-Cursor"] = next_cursor
+    return response
@@ -1,6 +1,3 @@
-from decimal import Decimal
-
-from django.db.models import Sum
 from django.utils import timezone
 from rest_framework import serializers
 
@@ -181,10 +178,10 @@ class TransactionSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         """
         Enforce: withdrawals allowed ONLY from profit of EXPIRED plans.
+
+        Checked against the investment's running profit totals; the amount is
+        claimed atomically by ``create_transaction``, which re-checks it.
         """
-        from django.utils import timezone
-        from django.db.models import Sum
-        from transactions.models import Transaction
         from investments.models import UserInvestment
 
         tx_type = attrs.get("tx_type") or getattr(self.instance, "tx_type", None)
@@ -208,26 +205,10 @@ class TransactionSerializer(serializers.ModelSerializer):
         if not investment:
             raise serializers.ValidationError({"investment_id": "Withdrawal must be linked to an investment."})
 
-        now = timezone.now()
-        if not investment.ends_at or investment.ends_at > now:
+        if not investment.ends_at or investment.ends_at > timezone.now():
             raise serializers.ValidationError("Withdrawals are only allowed after the investment expires.")
 
-        # compute available profit from EXPIRED investments only
-        expired_profit = Transaction.objects.filter(
-            user=user,
-            tx_type="profit",
-            status__in=["approved", "completed"],
-            investment__ends_at__lte=now,
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        already_withdrawn = Transaction.objects.filter(
-            user=user,
-            tx_type="withdrawal",
-            status__in=["pending", "approved", "completed"],
-            investment__ends_at__lte=now,
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        available = expired_profit - already_withdrawn
+        available = investment.withdrawable_profit
         amount = attrs.get("amount") or 0
 
         if amount <= 0:
@@ -272,25 +253,18 @@ class UserWalletSerializer(serializers.ModelSerializer):
         fields = ["balance", "total_deposits", "total_withdrawals", "updated_at"]
         read_only_fields = ["balance", "total_deposits", "total_withdrawals", "updated_at"]
 
+    def _ledger(self, obj):
+        if not hasattr(obj, "_ledger_summary"):
+            from transactions.ledger import get_ledger_summary
+
+            obj._ledger_summary = get_ledger_summary(obj.user_id)
+        return obj._ledger_summary
+
     def get_total_deposits(self, obj):
-        from transactions.models import Transaction
-        total = (
-            Transaction.objects.filter(
-                user=obj.user, tx_type__in=["deposit", "manual_credit"], status="approved"
-            ).aggregate(total=Sum("amount"))["total"]
-            or Decimal("0.00")
-        )
-        return total
+        return self._ledger(obj).deposits_total
 
     def get_total_withdrawals(self, obj):
-        from transactions.models import Transaction
-        total = (
-            Transaction.objects.filter(
-                user=obj.user, tx_type="withdrawal", status="approved"
-            ).aggregate(total=Sum("amount"))["total"]
-            or Decimal("0.00")
-        )
-        return total
+        return self._ledger(obj).withdrawals_total
 
 
 class KycApplicationSerializer(serializers.ModelSerializer):
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from investments.models import UserInvestment
+from transactions.ledger import ledger_changed
+from transactions.models import Transaction
+
+from .analytics import invalidate_dashboard_analytics
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=UserInvestment)
+@receiver(post_delete, sender=UserInvestment)
+def invalidate_dashboard_on_change(sender, instance, **kwargs):
+    invalidate_dashboard_analytics([instance.user_id])
+
+
+@receiver(ledger_changed)
+def invalidate_dashboard_on_ledger_change(sender, user_ids, **kwargs):
+    # Covers bulk paths (bulk_create/update) that never fire post_save.
+    invalidate_dashboard_analytics(user_ids)
@@ -0,0 +1,117 @@
+"""Server-sent events stream of the signed-in user's new notifications.
+
+``GET /api/notifications/stream/`` holds the connection open and writes an
+``unread_count`` event on connect, then one ``notification`` event per
+``UserNotification`` created for the user (published via ``core.pubsub``),
+with a comment line every ``KEEPALIVE_SECONDS`` so proxies keep it alive.
+
+The stream is off unless ``NOTIFICATION_STREAM_ENABLED`` is set, which
+should only happen once the site is served through ``wolvcapital.asgi``
+(e.g. uvicorn) with a cross-process ``PUBSUB_BACKEND`` such as
+``core.pubsub.PostgresBroker``. Under WSGI a streaming response is read to
+the end before anything is sent, so an endless stream would hold a worker
+forever; requests that do not come through ASGI get a 503.
+
+``EventSource`` cannot send headers, so clients first ``POST
+/api/notifications/stream-ticket/`` and pass the short-lived signed ticket
+as ``?ticket=``, which keeps the access token out of URLs and access logs.
+A bearer header or the session cookie work as well.
+"""
+
+from __future__ import annotations
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from core.pubsub import subscribe
+from users.notification_service import get_unread_count, notification_channel
+
+KEEPALIVE_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+STREAM_TICKET_SALT = "api.notification-stream"
+STREAM_TICKET_MAX_AGE = 60
+
+
+def stream_enabled() -> bool:
+    return bool(getattr(settings, "NOTIFICATION_STREAM_ENABLED", False))
+
+
+def issue_stream_ticket(user) -> str:
+    """Signed ticket that opens ``user``'s stream within ``STREAM_TICKET_MAX_AGE`` seconds."""
+    return signing.dumps({"uid": str(user.pk)}, salt=STREAM_TICKET_SALT, compress=True)
+
+
+def _ticket_user(ticket: str):
+    try:
+        data = signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=STREAM_TICKET_MAX_AGE)
+        return get_user_model().objects.get(pk=data["uid"])
+    except (signing.BadSignature, KeyError, TypeError, ValueError, get_user_model().DoesNotExist):
+        return None
+
+
+async def _authenticate(request):
+    header = request.headers.get("Authorization", "")
+    if header.lower().startswith("bearer "):
+        auth = JWTAuthentication()
+        try:
+            validated = await sync_to_async(auth.get_validated_token)(header[7:].strip())
+            return await sync_to_async(auth.get_user)(validated)
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+    ticket = request.GET.get("ticket")
+    if ticket:
+        return await sync_to_async(_ticket_user)(ticket)
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def _event(name: str, data, event_id=None) -> str:
+    lines = [f"event: {name}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _notification_events(user_id, unread_count: int):
+    subscription = subscribe(notification_channel(user_id))
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n" + _event("unread_count", {"count": unread_count})
+        while True:
+            message = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            if message is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield _event("notification", message, message.get("id"))
+    finally:
+        subscription.close()
+
+
+async def notification_stream(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not stream_enabled():
+        return JsonResponse({"detail": "Not found."}, status=404)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Notification stream requires an ASGI server."}, status=503)
+    user = await _authenticate(request)
+    if user is None or not user.is_active:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    unread_count = await sync_to_async(get_unread_count)(user)
+    response = StreamingHttpResponse(
+        _notification_events(user.pk, unread_count), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,102 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.analytics import invalidate_dashboard_analytics
+from transactions.models import Transaction
+
+
+class DashboardAnalyticsBenchmarkTests(TestCase):
+    """Query-count and latency budget for the dashboard analytics endpoint."""
+
+    TX_COUNT = 10_000
+    MAX_QUERIES = 5  # daily rollup rows, investment statuses, 2 recent lists, ledger row
+    P95_BUDGET_SECONDS = 0.5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="dash_bench", email="dash_bench@example.com", password="pass12345"
+        )
+        now = timezone.now()
+        tx_types = ["deposit", "withdrawal", "profit", "manual_credit"]
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=cls.user,
+                    tx_type=tx_types[n % 4],
+                    amount=Decimal("10.00"),
+                    status="completed" if n % 4 == 2 else "approved",
+                    reference=f"BENCH-{n}",
+                    created_at=now - timezone.timedelta(minutes=n * 7),
+                )
+                for n in range(cls.TX_COUNT)
+            ],
+            batch_size=2000,
+        )
+        # bulk_create bypasses the rollup signals, as a data import would.
+        call_command("backfill_daily_activity")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("api-analytics-overview")
+
+    def _get(self, days=30):
+        resp = self.client.get(self.url, {"days": days})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_uncached_load_uses_constant_queries(self):
+        self._get()  # builds the ledger row once
+        invalidate_dashboard_analytics([self.user.pk])
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._get()
+        self.assertLessEqual(len(ctx.captured_queries), self.MAX_QUERIES)
+
+        self.assertEqual(len(data["activity_over_time"]), 30)
+        window_total = sum(day["count"] for day in data["activity_over_time"])
+        self.assertEqual(
+            window_total,
+            Transaction.objects.filter(
+                user=self.user,
+                created_at__date__gte=timezone.localdate() - timezone.timedelta(days=29),
+            ).count(),
+        )
+        self.assertEqual(len(data["recent_activity"]), 10)
+
+    def test_cached_load_hits_no_tables_until_user_data_changes(self):
+        first = self._get()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._get(), first)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        Transaction.objects.create(
+            user=self.user, tx_type="deposit", amount=Decimal("5.00"), reference="BENCH-new"
+        )
+        refreshed = self._get()
+        self.assertEqual(
+            refreshed["transaction_breakdown"]["deposits"],
+            first["transaction_breakdown"]["deposits"] + 1,
+        )
+
+    def test_p95_latency_within_budget(self):
+        self._get()
+        timings = []
+        for _ in range(20):
+            invalidate_dashboard_analytics([self.user.pk])
+            started = time.perf_counter()
+            self._get(days=90)
+            timings.append(time.perf_counter() - started)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        self.assertLess(p95, self.P95_BUDGET_SECONDS, f"p95={p95:.3f}s")
@@ -1,7 +1,10 @@
+from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
 
 from core.models import SupportRequest
@@ -215,6 +218,393 @@ class NotificationAPITests(TestCase):
         self.assertTrue(self.notification.is_read)
 
 
+
+class NotificationFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            username="feed_user", email="feed@example.com", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        base = timezone.now()
+        UserNotification.objects.bulk_create(
+            [
+                UserNotification(
+                    user=self.user,
+                    notification_type="system_alert",
+                    title=f"N{i}",
+                    message="m",
+                    # two rows per timestamp so the id tie-breaker matters
+                    created_at=base - timedelta(minutes=i // 2),
+                )
+                for i in range(7)
+            ]
+        )
+
+    def test_cursor_pages_cover_feed_once(self):
+        seen = []
+        cursor = ""
+        while True:
+            resp = self.client.get("/api/notifications/", {"cursor": cursor, "limit": 3})
+            self.assertEqual(resp.status_code, 200)
+            body = resp.json()
+            seen.extend(item["id"] for item in body["results"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        expected = [str(pk) for pk in self.user.notifications.order_by("-created_at", "-id").values_list("id", flat=True)]
+        self.assertEqual(seen, expected)
+
+    def test_plain_list_is_bounded_with_next_cursor_header(self):
+        resp = self.client.get("/api/notifications/", {"limit": 5})
+        self.assertEqual(len(resp.json()), 5)
+        self.assertIn("X-Next-Cursor", resp)
+
+    def test_list_without_limit_or_cursor_returns_whole_feed(self):
+        resp = self.client.get("/api/notifications/")
+        self.assertEqual(len(resp.json()), 7)
+        self.assertNotIn("X-Next-Cursor", resp)
+
+    def test_unchanged_feed_returns_304(self):
+        first = self.client.get("/api/notifications/", {"limit": 10})
+        etag = first["ETag"]
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/notifications/", {"limit": 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        # Writes that skip this process's cache (other workers, cron, bulk
+        # updates) still change the ETag.
+        UserNotification.objects.filter(pk=self.user.notifications.first().pk).update(
+            is_read=True, read_at=timezone.now()
+        )
+        resp = self.client.get("/api/notifications/", {"limit": 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+
+        notification = self.user.notifications.filter(is_read=False).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/notifications/{notification.pk}/mark-read/")
+        resp = self.client.get("/api/notifications/", {"limit": 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_unread_count_is_cached_and_tracks_changes(self):
+        self.assertEqual(self.client.get("/api/notifications/unread-count/").json()["count"], 7)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/notifications/unread-count/").json()["count"], 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserNotification.objects.create(
+                user=self.user, notification_type="system_alert", title="New", message="m"
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/notifications/{self.user.notifications.last().pk}/mark-read/")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/notifications/unread-count/").json()["count"], 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/notifications/mark-all-read/")
+        self.assertEqual(self.client.get("/api/notifications/unread-count/").json()["count"], 0)
+
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            username="stream_user", email="stream@example.com", password="pass12345"
+        )
+
+    def _notify(self, title):
+        from users.notification_service import create_user_notification
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_user_notification(self.user, "system_alert", title, "Streamed")
+
+    def _ticket(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post("/api/notifications/stream-ticket/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["ticket"]
+
+    def test_disabled_by_default(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        self.assertEqual(client.post("/api/notifications/stream-ticket/").status_code, 404)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/api/notifications/stream/").status_code, 404)
+
+    @override_settings(NOTIFICATION_STREAM_ENABLED=True)
+    def test_refuses_to_stream_under_wsgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/api/notifications/stream/").status_code, 503)
+
+    @override_settings(NOTIFICATION_STREAM_ENABLED=True)
+    async def test_rejects_anonymous_and_access_token_in_url(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 401)
+        token = str(AccessToken.for_user(self.user))
+        response = await self.async_client.get("/api/notifications/stream/", {"token": token})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get("/api/notifications/stream/", {"ticket": token})
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(NOTIFICATION_STREAM_ENABLED=True)
+    def test_ticket_expires(self):
+        import time
+        from unittest import mock
+
+        from api import streams
+
+        ticket = self._ticket()
+        expired = time.time() + streams.STREAM_TICKET_MAX_AGE + 1
+        with mock.patch("django.core.signing.time.time", return_value=expired):
+            self.assertIsNone(streams._ticket_user(ticket))
+        self.assertEqual(streams._ticket_user(ticket), self.user)
+
+    @override_settings(NOTIFICATION_STREAM_ENABLED=True)
+    async def test_pushes_new_notifications(self):
+        import asyncio
+
+        from asgiref.sync import sync_to_async
+
+        ticket = await sync_to_async(self._ticket)()
+        response = await self.async_client.get("/api/notifications/stream/", {"ticket": ticket})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        events = aiter(response.streaming_content)
+        first = await anext(events)
+        self.assertIn("event: unread_count", first.decode() if isinstance(first, bytes) else first)
+
+        await sync_to_async(self._notify)("Approved!")
+        chunk = await asyncio.wait_for(anext(events), timeout=5)
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        self.assertIn("event: notification", text)
+        self.assertIn("Approved!", text)
+        await events.aclose()
+
+
+
+class AdminTransactionListTests(TestCase):
+    def setUp(self):
+        from transactions.models import Transaction
+
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            username="txlist_admin",
+            email="txlist_admin@example.com",
+            password="pass12345",
+            is_staff=True,
+            is_superuser=True,
+        )
+        alice = User.objects.create_user(username="alice_tx", email="alice@example.com", password="pass12345")
+        bob = User.objects.create_user(username="bob_tx", email="bob@example.com", password="pass12345")
+        base = timezone.now()
+        rows = []
+        for i in range(12):
+            rows.append(
+                Transaction(
+                    user=alice if i % 2 else bob,
+                    tx_type="withdrawal" if i % 3 == 0 else "deposit",
+                    payment_method="BTC" if i % 4 == 0 else "bank_transfer",
+                    amount=Decimal("10.00") * (i + 1),
+                    reference=f"TXL-{i}",
+                    status="pending" if i < 8 else "approved",
+                    approved_by=self.admin if i >= 8 else None,
+                    created_at=base - timedelta(days=i),
+                )
+            )
+        Transaction.objects.bulk_create(rows)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_keyset_pages_with_joined_users(self):
+        seen = []
+        cursor = ""
+        while True:
+            with self.assertNumQueries(1):
+                resp = self.client.get(
+                    "/api/admin/transactions/", {"status": "pending", "cursor": cursor, "limit": 3}
+                )
+            body = resp.json()
+            seen.extend(row["reference"] for row in body["results"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, [f"TXL-{i}" for i in range(8)])
+
+    def test_filters(self):
+        resp = self.client.get(
+            "/api/admin/transactions/",
+            {"user_email": "ALI", "tx_type": "deposit", "payment_method": "bank_transfer"},
+        )
+        self.assertEqual({row["reference"] for row in resp.json()}, {"TXL-1", "TXL-5", "TXL-7", "TXL-11"})
+
+        day = timezone.localtime(timezone.now() - timedelta(days=2)).date().isoformat()
+        resp = self.client.get("/api/admin/transactions/", {"created_from": day, "created_to": day})
+        self.assertEqual([row["reference"] for row in resp.json()], ["TXL-2"])
+
+        resp = self.client.get("/api/admin/transactions/", {"created_from": "not-a-date"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_unpaginated_queue_returns_every_row(self):
+        from api.pagination import DEFAULT_PAGE_SIZE
+        from transactions.models import Transaction
+
+        user = get_user_model().objects.get(username="alice_tx")
+        Transaction.objects.bulk_create(
+            Transaction(user=user, tx_type="withdrawal", amount=Decimal("1.00"), reference=f"TXQ-{i}")
+            for i in range(DEFAULT_PAGE_SIZE + 5)
+        )
+        resp = self.client.get("/api/admin/transactions/", {"tx_type": "withdrawal", "status": "pending"})
+        self.assertEqual(len(resp.json()), DEFAULT_PAGE_SIZE + 5 + 3)  # plus TXL-0, 3 and 6
+        self.assertNotIn("X-Next-Cursor", resp)
+
+    def test_summary_groups_by_status(self):
+        resp = self.client.get("/api/admin/transactions/", {"summary": "1", "limit": 2})
+        body = resp.json()
+        self.assertEqual(len(body["results"]), 2)
+        self.assertEqual(body["summary"]["pending"], {"count": 8, "total": "360.00"})
+        self.assertEqual(body["summary"]["approved"], {"count": 4, "total": "420.00"})
+
+
+class AdminExportAPITests(TestCase):
+    def setUp(self):
+        from transactions.models import Transaction
+
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            username="export_admin",
+            email="export_admin@example.com",
+            password="pass12345",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.user = User.objects.create_user(
+            username="export_member", email="export_member@example.com", password="pass12345"
+        )
+        Transaction.objects.create(
+            user=self.user, tx_type="deposit", amount=Decimal("25.00"), reference="EXP-API", status="pending"
+        )
+        self.client = APIClient()
+
+    def test_admin_streams_csv(self):
+        self.client.force_authenticate(self.admin)
+        resp = self.client.get("/api/admin/exports/transactions/", {"status": "pending"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertIn("attachment;", resp["Content-Disposition"])
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("EXP-API", lines[1])
+
+    def test_rejects_bad_requests_and_non_admins(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get("/api/admin/exports/users/").status_code, 400)
+        resp = self.client.get("/api/admin/exports/payouts/", {"fmt": "xlsx"})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get("/api/admin/exports/payouts/", {"date_from": "yesterday"})
+        self.assertEqual(resp.status_code, 400)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/admin/exports/transactions/").status_code, 403)
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        from users.models import UserWallet
+
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="idem_user", email="idem_user@example.com", password="pass12345"
+        )
+        UserWallet.objects.filter(user=self.user).update(balance=Decimal("1000"))
+        self.plan = InvestmentPlan.objects.create(
+            name="IdemPlan",
+            description="Idempotency",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _invest(self, key, amount="200.00"):
+        return self.client.post(
+            "/api/investments/",
+            {"plan_id": self.plan.id, "amount": amount},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_is_replayed_without_running_the_view(self):
+        first = self._invest("inv-1")
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(1):
+            retry = self._invest("inv-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(UserInvestment.objects.filter(user=self.user).count(), 1)
+
+        self.assertEqual(self._invest("inv-1", amount="300.00").status_code, 422)
+        self.assertEqual(self._invest("inv-2").status_code, 201)
+        self.assertEqual(UserInvestment.objects.filter(user=self.user).count(), 2)
+
+    def test_in_flight_expired_and_failed_claims(self):
+        from core.models import IdempotencyKey
+
+        now = timezone.now()
+        claim = IdempotencyKey.objects.create(
+            scope="investments.create", owner=str(self.user.pk), key="busy",
+            fingerprint="x", expires_at=now + timedelta(hours=1),
+        )
+        resp = self.client.post(
+            "/api/investments/", {"plan_id": self.plan.id, "amount": "200.00"}, format="json",
+            HTTP_IDEMPOTENCY_KEY="busy",
+        )
+        self.assertEqual(resp.status_code, 422)  # different fingerprint wins over in-flight
+
+        IdempotencyKey.objects.filter(pk=claim.pk).update(fingerprint=self._fingerprint_for("200.00"))
+        self.assertEqual(self._invest("busy").status_code, 409)
+
+        IdempotencyKey.objects.filter(pk=claim.pk).update(expires_at=now - timedelta(seconds=1))
+        self.assertEqual(self._invest("busy").status_code, 201)
+
+        # A request that raises (service validation) releases its claim.
+        self.assertEqual(self._invest("too-much", amount="5000.00").status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.filter(key="too-much").exists())
+
+    def _fingerprint_for(self, amount):
+        from unittest import mock
+
+        from core.idempotency import _fingerprint
+
+        request = mock.Mock(method="POST", path="/api/investments/", data={"plan_id": self.plan.id, "amount": amount})
+        return _fingerprint(request)
+
+    def test_checkout_email_sent_once(self):
+        from unittest import mock
+
+        client = APIClient()
+        payload = {"email": "buyer@example.com", "name": "Buyer", "txId": "TX-9", "amount": "10"}
+        with mock.patch(
+            "core.email_service.EmailService.send_checkout_completion_email", return_value=True
+        ) as send:
+            for _ in range(3):
+                resp = client.post("/api/checkout/completion/", payload, format="json", HTTP_IDEMPOTENCY_KEY="chk-1")
+                self.assertEqual(resp.status_code, 200)
+        send.assert_called_once()
+
+
 class EmailPreferencesAPITests(TestCase):
     def setUp(self):
         User = get_user_model()
@@ -6,7 +6,7 @@ from .jwt import EmailOrUsernameTokenObtainPairView
 
 from investments.views import MyInvestmentsView
 
-from . import views
+from . import streams, views
 from .referrals_endpoints import referrals_rewards, referrals_summary
 
 router = DefaultRouter()
@@ -60,6 +60,9 @@ router.register(
 )
 
 urlpatterns = [
+    # Before the router so "stream" is not taken as a notification pk.
+    path("notifications/stream/", streams.notification_stream, name="api-notifications-stream"),
+    path("admin/exports/<str:dataset>/", views.AdminExportView.as_view(), name="api-admin-export"),
     path("", include(router.urls)),
     path(
         "auth/jwt/create/",
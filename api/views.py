@@ -1,5 +1,7 @@
 from rest_framework.permissions import IsAuthenticated
 import hashlib
+from datetime import datetime, time
+from decimal import Decimal
 
 from django.apps import apps
 from django.conf import settings
@@ -7,12 +9,11 @@ from django.contrib.auth import authenticate, login, logout
 from django.core.cache import cache
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.management import call_command
-from django.db import connection
 from django.db import models
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncDate
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import mixins, permissions, serializers, status, viewsets
@@ -30,6 +31,10 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+from core.exports import CONTENT_TYPES as EXPORT_CONTENT_TYPES
+from core.exports import FILE_EXTENSIONS as EXPORT_FILE_EXTENSIONS
+from core.exports import stream_export
+from core.idempotency import idempotent
 from core.models import Agreement, CampaignAnnouncement, SupportRequest, UserAgreementAcceptance
 from investments.models import InvestmentPlan, UserInvestment
 from investments.services import (
@@ -46,9 +51,11 @@ from transactions.services import (
 )
 from users.models import KycDocument, Profile, UserNotification, UserWallet
 from users.notification_service import mark_all_read as service_mark_all_read
+from users.notification_service import get_unread_count as service_get_unread_count
 from users.notification_service import (
     mark_notification_read as service_mark_notification_read,
 )
+from users.notification_service import notification_feed_state
 from users.services import (
     approve_kyc_application,
     approve_kyc_document,
@@ -60,6 +67,8 @@ from users.services import (
 )
 from users.verification import issue_verification_token, verify_token
 
+from .analytics import get_dashboard_analytics
+from .pagination import keyset_page, keyset_response, parse_limit
 from .permissions import IsPlatformAdmin
 from .serializers import (
     AdminKycApplicationSerializer,
@@ -84,6 +93,7 @@ from .serializers import (
     UserWalletSerializer,
     VirtualCardSerializer,
 )
+from .streams import STREAM_TICKET_MAX_AGE, issue_stream_ticket, stream_enabled
 
 
 class UpdateLanguageView(APIView):
@@ -287,6 +297,7 @@ class UserInvestmentViewSet(viewsets.ModelViewSet):
         """Compatibility endpoint for frontend: GET /api/investments/my/"""
         return self.list(request, *args, **kwargs)
 
+    @idempotent("investments.create")
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -317,6 +328,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
             qs = qs.filter(tx_type=tx_type)
         return qs
 
+    @idempotent("transactions.create")
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -354,141 +366,7 @@ class UserDashboardAnalyticsView(APIView):
         except (TypeError, ValueError):
             days = 30
 
-        start_dt = timezone.now() - timezone.timedelta(days=days - 1)
-        start_date = start_dt.date()
-
-        # CRITICAL: Always filter by user - RLS policies are NOT configured in database
-        tx_qs = Transaction.objects.filter(user=request.user, created_at__date__gte=start_date)
-        inv_qs = UserInvestment.objects.filter(user=request.user, created_at__date__gte=start_date)
-
-        tx_by_day = {
-            row["day"]: row["count"]
-            for row in tx_qs.annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(count=Count("id"))
-        }
-        inv_by_day = {
-            row["day"]: row["count"]
-            for row in inv_qs.annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(count=Count("id"))
-        }
-
-        # --- Dashboard code successfully reconnected! ---
-        activity_over_time = []
-        for offset in range(days):
-            day = start_date + timezone.timedelta(days=offset)
-            activity_over_time.append(
-                {
-                    "date": day.isoformat(),
-                    "count": int(tx_by_day.get(day, 0)) + int(inv_by_day.get(day, 0)),
-                }
-            )
-
-        tx_breakdown_rows = list(tx_qs.values("tx_type").annotate(count=Count("id")))
-        deposits = 0
-        withdrawals = 0
-        for row in tx_breakdown_rows:
-            if row["tx_type"] == "deposit":
-                deposits = int(row["count"])
-            elif row["tx_type"] == "withdrawal":
-                withdrawals = int(row["count"])
-
-        inv_status_rows = list(
-            UserInvestment.objects.filter(user=request.user)
-            .values("status")
-            .annotate(count=Count("id"))
-        )
-        active = 0
-        completed = 0
-        pending = 0
-        for row in inv_status_rows:
-            status_val = row["status"]
-            count_val = int(row["count"])
-            if status_val == "approved":
-                active += count_val
-            elif status_val == "completed":
-                completed += count_val
-            elif status_val == "pending":
-                pending += count_val
-
-        tx_recent = list(
-            Transaction.objects.filter(user=request.user)
-            .order_by("-created_at")
-            .values("created_at", "tx_type", "status")[:10]
-        )
-        inv_recent = list(
-            UserInvestment.objects.filter(user=request.user)
-            .select_related("plan")
-            .order_by("-created_at")
-            .values("created_at", "status", "plan__name")[:10]
-        )
-
-        recent_activity = []
-        for row in tx_recent:
-            created_at = row["created_at"]
-            tx_type = row["tx_type"]
-            recent_activity.append(
-                {
-                    "date": created_at.isoformat() if created_at else "",
-                    "action_type": (
-                        "Deposit"
-                        if tx_type == "deposit"
-                        else (
-                            "Withdrawal"
-                            if tx_type == "withdrawal"
-                            else (
-                                "ROI" if tx_type == "profit" else ("Deposit" if tx_type == "manual_credit" else (tx_type or "Transaction").title())
-                            )
-                        )
-                    ),
-                    "status": row["status"],
-                }
-            )
-        for row in inv_recent:
-            created_at = row["created_at"]
-            plan_name = row.get("plan__name") or "Investment"
-            recent_activity.append(
-                {
-                    "date": created_at.isoformat() if created_at else "",
-                    "action_type": f"Investment ({plan_name})",
-                    "status": row["status"],
-                }
-            )
-
-        recent_activity.sort(key=lambda x: x["date"], reverse=True)
-        recent_activity = recent_activity[:10]
-
-        return Response(
-            {
-                "window_days": days,
-                "activity_over_time": activity_over_time,
-                "transaction_breakdown": {
-                    "deposits": deposits,
-                    "withdrawals": withdrawals,
-                },
-                "investment_status_overview": {
-                    "active": active,
-                    "completed": completed,
-                    "pending": pending,
-                },
-                "recent_activity": recent_activity,
-                "totals": {
-                    "locked_roi_total": Transaction.objects.filter(
-                        user=request.user, tx_type="profit", status="completed"
-                    ).aggregate(total=Sum("amount"))["total"]
-                    or 0,
-                    "total_invested": UserInvestment.objects.filter(
-                        user=request.user, status__in=["active", "approved"]
-                    ).aggregate(total=Sum("amount"))["total"]
-                    or 0,
-                },
-                "scoping": {
-                    "db_vendor": connection.vendor,
-                    "user_filtered": True,
-                },
-            }
-        )
+        return Response(get_dashboard_analytics(request.user, days))
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -498,6 +376,7 @@ class CheckoutCompletionView(APIView):
     authentication_classes = []  # Allow anonymous access for the webhook-style endpoint
     permission_classes = [permissions.AllowAny]
 
+    @idempotent("checkout.complete")
     def post(self, request):
         """
         Handle checkout completion and send notification email.
@@ -609,20 +488,81 @@ class WalletView(APIView):
 class AdminTransactionViewSet(viewsets.ModelViewSet):
     """Admin transactions management endpoint"""
 
-    queryset = Transaction.objects.all()
+    queryset = Transaction.objects.select_related("user", "approved_by")
     serializer_class = AdminTransactionSerializer
     permission_classes = [IsPlatformAdmin]
 
+    @staticmethod
+    def _parse_bound(value, name, end_of_day=False):
+        # Bare dates cover the whole day (parse_datetime would read them as midnight).
+        day = parse_date(value)
+        if day is not None:
+            parsed = datetime.combine(day, time.max if end_of_day else time.min)
+        else:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValidationError({name: "Use an ISO date or datetime."})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
     def get_queryset(self):
         qs = super().get_queryset()
-        tx_type = (self.request.query_params.get("tx_type") or "").strip()
-        status_param = (self.request.query_params.get("status") or "").strip()
-        if tx_type:
-            qs = qs.filter(tx_type=tx_type)
-        if status_param:
-            qs = qs.filter(status=status_param)
+        params = self.request.query_params
+        for field in ("tx_type", "status", "payment_method"):
+            value = (params.get(field) or "").strip()
+            if value:
+                qs = qs.filter(**{field: value})
+        created_from = (params.get("created_from") or "").strip()
+        if created_from:
+            qs = qs.filter(created_at__gte=self._parse_bound(created_from, "created_from"))
+        created_to = (params.get("created_to") or "").strip()
+        if created_to:
+            qs = qs.filter(created_at__lte=self._parse_bound(created_to, "created_to", end_of_day=True))
+        email_prefix = (params.get("user_email") or "").strip()
+        if email_prefix:
+            qs = qs.filter(user__email__istartswith=email_prefix)
         return qs
 
+    def list(self, request, *args, **kwargs):
+        """Newest-first list of the filtered transactions.
+
+        Filters: ``status``, ``tx_type``, ``payment_method``,
+        ``created_from``/``created_to`` and ``user_email`` (prefix).
+        Without ``limit`` or ``cursor`` every matching row is returned, as
+        existing callers (the admin withdrawals queue) expect; with either,
+        the list is keyset-paginated on ``(created_at, id)`` and the next
+        cursor is in ``X-Next-Cursor``. ``?cursor=`` or ``?summary=1`` return
+        a ``results`` envelope; the summary holds per-status counts and sums
+        for the whole filtered set, computed with one grouped query.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        cursor = request.query_params.get("cursor")
+        want_summary = (request.query_params.get("summary") or "").lower() in {"1", "true", "yes"}
+
+        limit = parse_limit(request.query_params.get("limit"), default=0)
+        if cursor is None and not limit:
+            rows, next_cursor = queryset.order_by("-created_at", "-pk"), None
+        else:
+            rows, next_cursor = keyset_page(queryset, cursor, limit or parse_limit(None))
+        data = self.get_serializer(rows, many=True).data
+
+        extra = {}
+        if want_summary:
+            grouped = (
+                queryset.order_by()
+                .values("status")
+                .annotate(count=models.Count("id"), total=models.Sum("amount"))
+            )
+            extra["summary"] = {
+                row["status"]: {
+                    "count": row["count"],
+                    "total": str((row["total"] or Decimal("0")).quantize(Decimal("0.01"))),
+                }
+                for row in grouped
+            }
+        return keyset_response(data, next_cursor, envelope=cursor is not None or want_summary, **extra)
+
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop("partial", False)
         instance = self.get_object()
@@ -680,6 +620,40 @@ class AdminUserInvestmentViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
 
+class AdminExportView(APIView):
+    """Stream an export of ``transactions``, ``payouts`` or ``investments``.
+
+    Query params: ``fmt`` (``csv`` or ``columnar``), ``date_from``/``date_to``
+    (inclusive ISO dates) and ``status``. Rows are read through a server-side
+    cursor and written as they arrive, so memory stays flat for any size.
+    """
+
+    permission_classes = [IsPlatformAdmin]
+
+    def get(self, request, dataset):
+        params = request.query_params
+        fmt = params.get("fmt") or "csv"
+        bounds = {}
+        for name in ("date_from", "date_to"):
+            value = (params.get(name) or "").strip()
+            if value:
+                bounds[name] = parse_date(value)
+                if bounds[name] is None:
+                    raise ValidationError({name: "Use an ISO date (YYYY-MM-DD)."})
+        try:
+            chunks = stream_export(
+                dataset, fmt, status=(params.get("status") or "").strip() or None, **bounds
+            )
+        except ValueError as exc:
+            raise ValidationError({"detail": str(exc)})
+
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[fmt])
+        filename = f"{dataset}-{timezone.now():%Y%m%d-%H%M%S}.{EXPORT_FILE_EXTENSIONS[fmt]}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["Cache-Control"] = "no-store"
+        return response
+
+
 class UserSupportRequestViewSet(
     mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
 ):
@@ -762,7 +736,27 @@ class UserNotificationViewSet(viewsets.GenericViewSet):
     def get_queryset(self):
         return UserNotification.objects.filter(user=self.request.user).order_by("-created_at")
 
+    def _feed_etag(self, request):
+        params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.items()))
+        state = notification_feed_state(request.user.pk)
+        digest = hashlib.sha1(f"{state}|{params}".encode()).hexdigest()[:32]
+        return f'W/"{digest}"'
+
     def list(self, request, *args, **kwargs):
+        """Newest-first feed.
+
+        Without ``limit`` or ``cursor`` the whole feed is returned as a plain
+        list, as before. ``?limit=`` bounds it and exposes the next keyset
+        cursor (on ``(created_at, id)``) in ``X-Next-Cursor``; ``?cursor=``
+        switches to a ``{"results", "next_cursor"}`` envelope. The ETag comes
+        from one aggregate over the user's rows, so a matching
+        ``If-None-Match`` returns 304 without loading or serializing them.
+        """
+        etag = self._feed_etag(request)
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
         queryset = self.get_queryset()
 
         unread_only = (request.query_params.get("unread_only") or "").lower() in {
@@ -773,17 +767,16 @@ class UserNotificationViewSet(viewsets.GenericViewSet):
         if unread_only:
             queryset = queryset.filter(is_read=False)
 
-        limit_param = request.query_params.get("limit")
-        if limit_param:
-            try:
-                limit_value = int(limit_param)
-                if limit_value > 0:
-                    queryset = queryset[:limit_value]
-            except ValueError:
-                pass
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        cursor = request.query_params.get("cursor")
+        limit = parse_limit(request.query_params.get("limit"), default=0)
+        if cursor is None and not limit:
+            response = Response(self.get_serializer(queryset.order_by("-created_at", "-pk"), many=True).data)
+        else:
+            rows, next_cursor = keyset_page(queryset, cursor, limit or parse_limit(None))
+            data = self.get_serializer(rows, many=True).data
+            response = keyset_response(data, next_cursor, envelope=cursor is not None)
+        response["ETag"] = etag
+        return response
 
     def retrieve(self, request, pk=None):
         notification = get_object_or_404(self.get_queryset(), pk=pk)
@@ -806,8 +799,14 @@ class UserNotificationViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=["get"], url_path="unread-count")
     def unread_count(self, request):
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({"count": count})
+        return Response({"count": service_get_unread_count(request.user)})
+
+    @action(detail=False, methods=["post"], url_path="stream-ticket")
+    def stream_ticket(self, request):
+        """Short-lived ticket for ``/api/notifications/stream/?ticket=``."""
+        if not stream_enabled():
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"ticket": issue_stream_ticket(request.user), "expires_in": STREAM_TICKET_MAX_AGE})
 
 
 class EmailPreferencesView(APIView):
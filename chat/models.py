@@ -17,7 +17,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ["created_at"]
-        indexes = [models.Index(fields=["session_id", "created_at"])]
+        indexes = [
+            models.Index(fields=["session_id", "created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.session_id} | {self.role} | {self.created_at:%Y-%m-%d %H:%M:%S}"
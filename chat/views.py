@@ -11,6 +11,8 @@ from django.utils import timezone
 
 from groq import Groq
 
+from core.counters import invalidate_counters
+
 from .models import ChatMessage, ChatSession
 
 client = Groq(api_key=settings.GROQ_API_KEY)
@@ -355,7 +357,8 @@ def manage_session(request):
         action = payload.get("action")
         session_id = payload.get("session_id")
         if action == "close" and session_id:
-            ChatSession.objects.filter(session_id=session_id).update(status="closed")
+            if ChatSession.objects.filter(session_id=session_id).update(status="closed"):
+                invalidate_counters(["open_chat_sessions"])
             return JsonResponse({"status": "closed"})
     return JsonResponse({"error": "Invalid request"}, status=400)
 
@@ -1,12 +1,20 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.shortcuts import render
+from django.urls import path
 from django.utils import timezone
 from django.utils.html import format_html
 
 from .models import (
     Agreement,
+    BulkEmailRun,
     CampaignAnnouncement,
+    EmailDelivery,
     EmailInbox,
+    EmailOutbox,
     EmailTemplate,
+    IdempotencyKey,
     PlatformCertificate,
     SupportRequest,
     UserAgreementAcceptance,
@@ -430,3 +438,76 @@ class PlatformCertificateAdmin(admin.ModelAdmin):
             "classes": ("collapse",),
         }),
     )
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "to_email", "status", "attempts", "available_at", "sent_at", "created_at")
+    list_filter = ("status", "kind")
+    search_fields = ("to_email", "kind", "last_error")
+    readonly_fields = ("created_at", "sent_at")
+    ordering = ("-id",)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("key", "scope", "owner", "status_code", "created_at", "expires_at")
+    list_filter = ("scope", "status_code")
+    search_fields = ("key", "owner")
+    readonly_fields = ("scope", "owner", "key", "fingerprint", "status_code", "response_body", "created_at", "expires_at")
+    ordering = ("-created_at",)
+
+
+@admin.register(BulkEmailRun)
+class BulkEmailRunAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "sent", "failed", "cursor", "started_at", "updated_at", "completed_at")
+    list_filter = ("status",)
+    search_fields = ("name",)
+    readonly_fields = ("started_at", "updated_at", "completed_at")
+    ordering = ("-started_at",)
+
+
+@admin.register(EmailDelivery)
+class EmailDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "template", "status", "latency_ms", "provider_id", "error_class")
+    list_filter = ("status", "template")
+    search_fields = ("recipient_hash", "provider_id")
+    readonly_fields = (
+        "template",
+        "recipient_hash",
+        "provider_id",
+        "latency_ms",
+        "status",
+        "error_class",
+        "created_at",
+    )
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom = [
+            path("stats/", self.admin_site.admin_view(self.stats_view), name="core_emaildelivery_stats"),
+        ]
+        return custom + urls
+
+    def stats_view(self, request):
+        """p50/p95 latency per template and failure rate per hour over the last ``?hours=`` (default 24)."""
+        from .email_delivery import failure_rate_by_hour, latency_by_template
+
+        try:
+            hours = min(max(int(request.GET.get("hours", 24)), 1), 24 * 30)
+        except ValueError:
+            hours = 24
+        since = timezone.now() - timedelta(hours=hours)
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Email Delivery Stats",
+            "opts": EmailDelivery._meta,
+            "hours": hours,
+            "templates": latency_by_template(since),
+            "hourly": failure_rate_by_hour(since),
+        }
+        return render(request, "admin/email_delivery_stats.html", context)
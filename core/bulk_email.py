@@ -0,0 +1,342 @@
+"""Rate-limited, resumable bulk email sending.
+
+``send_bulk`` walks a recipient source in key order, builds one message per
+recipient and delivers them on a bounded thread pool. Every provider request
+first takes a token from a shared :class:`TokenBucket` refilled at
+``BULK_EMAIL_RATE_PER_SECOND`` (Resend's documented default is 2 requests/s
+per team). With a backend that has a batch API
+(``ResendEmailBackend.send_batch``) one request carries up to
+``RESEND_BATCH_LIMIT`` messages.
+
+Failures the backend marks retryable (429, 5xx and transport errors, see
+``ResendEmailBackend._record_status``) and exceptions are retried with
+full-jitter exponential backoff, never sooner than the provider's
+Retry-After. Other failures are final.
+
+Named runs keep their progress in ``BulkEmailRun`` after every chunk: the
+key of the last recipient handled plus sent/failed counts. Sending again
+under the same name resumes after that key. Setting ``stop`` (the management
+commands set it on SIGINT/SIGTERM) lets the in-flight chunk finish and
+pauses the run, so a restart sends nothing twice; a crash re-sends at most
+one chunk.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import random
+import signal
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from .email_delivery import send_batch_logged, send_logged
+from .models import BulkEmailRun
+
+logger = logging.getLogger(__name__)
+
+# ``source(after_key)`` yields ``(key, item)`` pairs in ascending key order.
+RecipientSource = Callable[[str | None], Iterable[tuple[str, Any]]]
+MessageBuilder = Callable[[Any], EmailMessage | None]
+ResultCallback = Callable[[str, Any, EmailMessage | None, bool], None]
+
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available and take them; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Full-jitter exponential backoff for retry ``attempt`` (1-based), at least ``retry_after``."""
+    delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+    return max(delay, retry_after or 0.0)
+
+
+def queryset_source(queryset: QuerySet, key: str = "pk") -> RecipientSource:
+    """Keyset-paginated source over ``queryset`` ordered by the unique field ``key``.
+
+    ``values()`` querysets must include ``key`` among their fields.
+    """
+
+    def source(after: str | None) -> Iterator[tuple[str, Any]]:
+        qs = queryset.order_by(key)
+        if after:
+            qs = qs.filter(**{f"{key}__gt": after})
+        for row in qs.iterator(chunk_size=2000):
+            yield str(row[key] if isinstance(row, dict) else getattr(row, key)), row
+
+    return source
+
+
+def sequence_source(items: Sequence[Any]) -> RecipientSource:
+    """Source over an in-memory sequence; keys are list positions."""
+
+    def source(after: str | None) -> Iterator[tuple[str, Any]]:
+        start = int(after) + 1 if after else 0
+        for index in range(start, len(items)):
+            yield str(index), items[index]
+
+    return source
+
+
+@dataclass
+class BulkSendStats:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    resumed_from: str | None = None
+    completed: bool = False
+
+
+def _attempt(messages: list[EmailMessage], bucket: TokenBucket) -> list[tuple[bool, bool, float | None]]:
+    """One delivery attempt; ``(accepted, retryable, retry_after)`` per message."""
+    connection = get_connection(fail_silently=False)
+    if len(messages) > 1 and hasattr(connection, "send_batch"):
+        bucket.acquire()
+        try:
+            accepted = send_batch_logged(connection, messages)
+        except Exception:
+            logger.exception("Bulk email batch of %d failed", len(messages))
+            return [(False, True, None)] * len(messages)
+        return [
+            (bool(ok), not ok and getattr(message, "resend_retryable", False), getattr(message, "resend_retry_after", None))
+            for message, ok in zip(messages, accepted)
+        ]
+
+    outcomes: list[tuple[bool, bool, float | None]] = []
+    for message in messages:
+        bucket.acquire()
+        try:
+            ok = send_logged(connection, message)
+        except Exception:
+            logger.exception("Bulk email to %s failed", message.to)
+            outcomes.append((False, True, None))
+            continue
+        outcomes.append(
+            (ok, not ok and getattr(message, "resend_retryable", False), getattr(message, "resend_retry_after", None))
+        )
+    return outcomes
+
+
+def _deliver(
+    unit: list[tuple[str, Any]],
+    build_message: MessageBuilder,
+    bucket: TokenBucket,
+    max_attempts: int,
+    in_thread: bool,
+) -> tuple[list[tuple[EmailMessage | None, bool]], int]:
+    """Build and send one unit (a batch, or a single message); returns per-recipient results and retries."""
+    try:
+        messages: list[EmailMessage | None] = []
+        for _, item in unit:
+            try:
+                messages.append(build_message(item))
+            except Exception:
+                logger.exception("Could not build bulk email")
+                messages.append(None)
+
+        accepted = [False] * len(unit)
+        pending = [index for index, message in enumerate(messages) if message is not None]
+        retried = 0
+        attempt = 0
+        while pending:
+            attempt += 1
+            outcomes = _attempt([messages[index] for index in pending], bucket)
+            retry, retry_after = [], 0.0
+            for index, (ok, retryable, delay) in zip(pending, outcomes):
+                if ok:
+                    accepted[index] = True
+                elif retryable and attempt < max_attempts:
+                    retry.append(index)
+                    retry_after = max(retry_after, delay or 0.0)
+            if retry:
+                retried += len(retry)
+                time.sleep(backoff_delay(attempt, retry_after))
+            pending = retry
+        return list(zip(messages, accepted)), retried
+    finally:
+        if in_thread:
+            connections.close_all()
+
+
+def _start_run(name: str, restart: bool) -> BulkEmailRun:
+    run, created = BulkEmailRun.objects.get_or_create(name=name)
+    if restart and not created:
+        run.cursor = ""
+        run.sent = run.failed = 0
+        run.started_at = timezone.now()
+        run.completed_at = None
+        run.status = BulkEmailRun.STATUS_RUNNING
+        run.save()
+    elif run.status == BulkEmailRun.STATUS_PAUSED:
+        run.status = BulkEmailRun.STATUS_RUNNING
+        run.save(update_fields=["status", "updated_at"])
+    return run
+
+
+def send_bulk(
+    source: RecipientSource,
+    build_message: MessageBuilder,
+    *,
+    name: str | None = None,
+    restart: bool = False,
+    max_workers: int | None = None,
+    rate: float | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    chunk_size: int | None = None,
+    stop: threading.Event | None = None,
+    on_result: ResultCallback | None = None,
+) -> BulkSendStats:
+    """Send one email per recipient of ``source`` (see module docstring).
+
+    ``build_message(item)`` returns the message for a recipient, or ``None``
+    to count it as failed. ``name`` persists progress in ``BulkEmailRun``;
+    a completed run is not sent again unless ``restart``. ``on_result`` is
+    called on the calling thread for every recipient once its chunk is done.
+    With ``max_workers <= 1`` delivery happens inline on the calling thread.
+    """
+    stats = BulkSendStats()
+    run = _start_run(name, restart) if name else None
+    if run is not None and run.status == BulkEmailRun.STATUS_COMPLETED:
+        logger.info("Bulk email run %r already completed", name)
+        stats.completed = True
+        return stats
+    cursor = run.cursor if run is not None else None
+    stats.resumed_from = cursor or None
+
+    if max_workers is None:
+        max_workers = int(getattr(settings, "BULK_EMAIL_WORKERS", 4))
+    bucket = TokenBucket(rate or float(getattr(settings, "BULK_EMAIL_RATE_PER_SECOND", 2)))
+    batch_size = 1
+    if hasattr(get_connection(), "send_batch"):
+        batch_size = max(1, int(getattr(settings, "RESEND_BATCH_LIMIT", 100)))
+    chunk_size = chunk_size or batch_size * max(1, max_workers)
+
+    recipients = iter(source(cursor))
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk-email") if max_workers > 1 else None
+    status = BulkEmailRun.STATUS_PAUSED
+    try:
+        while True:
+            if stop is not None and stop.is_set():
+                logger.info("Bulk email run %r stopped after %s", name, cursor)
+                break
+            chunk = list(islice(recipients, chunk_size))
+            if not chunk:
+                status = BulkEmailRun.STATUS_COMPLETED
+                break
+
+            units = [chunk[start : start + batch_size] for start in range(0, len(chunk), batch_size)]
+            if pool is None:
+                outcomes = [_deliver(unit, build_message, bucket, max_attempts, in_thread=False) for unit in units]
+            else:
+                outcomes = list(
+                    pool.map(lambda unit: _deliver(unit, build_message, bucket, max_attempts, in_thread=True), units)
+                )
+
+            sent = failed = 0
+            for unit, (results, retried) in zip(units, outcomes):
+                stats.retried += retried
+                for (key, item), (message, ok) in zip(unit, results):
+                    if ok:
+                        sent += 1
+                    else:
+                        failed += 1
+                    if on_result is not None:
+                        on_result(key, item, message, ok)
+            stats.sent += sent
+            stats.failed += failed
+            cursor = chunk[-1][0]
+            if run is not None:
+                BulkEmailRun.objects.filter(pk=run.pk).update(
+                    cursor=cursor,
+                    sent=F("sent") + sent,
+                    failed=F("failed") + failed,
+                    updated_at=timezone.now(),
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if run is not None:
+            BulkEmailRun.objects.filter(pk=run.pk).update(
+                status=status,
+                completed_at=timezone.now() if status == BulkEmailRun.STATUS_COMPLETED else None,
+                updated_at=timezone.now(),
+            )
+
+    stats.completed = status == BulkEmailRun.STATUS_COMPLETED
+    logger.info(
+        "Bulk email run %r: sent=%d failed=%d retried=%d completed=%s",
+        name,
+        stats.sent,
+        stats.failed,
+        stats.retried,
+        stats.completed,
+    )
+    return stats
+
+
+@contextlib.contextmanager
+def stop_on_signals(signals: Iterable[int] = (signal.SIGINT, signal.SIGTERM)) -> Iterator[threading.Event]:
+    """Yield an event that SIGINT/SIGTERM set instead of killing the process.
+
+    Only installs handlers on the main thread; elsewhere the event is never set.
+    """
+    stop = threading.Event()
+    if threading.current_thread() is not threading.main_thread():
+        yield stop
+        return
+    previous = {}
+    for signum in signals:
+        previous[signum] = signal.signal(signum, lambda *_: stop.set())
+    try:
+        yield stop
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
@@ -0,0 +1,100 @@
+"""Cached admin dashboard counters (pending queues, unread inbox, open chats).
+
+Each counter is the size of one filtered table. Dashboards read them with a
+single ``get_many``; missing or expired keys are recomputed together (one
+aggregate query per model) and cached for ``ADMIN_COUNTERS_CACHE_SECONDS``.
+
+There is no shared cache configured, so every process keeps its own copy.
+Counters are therefore never adjusted incrementally: the short TTL is what
+bounds staleness, on every worker. Bulk writes call :func:`invalidate_counters`
+so the admin who made them sees fresh numbers when served by the same process.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+CACHE_PREFIX = "admin_counters:"
+
+
+@dataclass(frozen=True)
+class CounterSpec:
+    name: str
+    model: str
+    # Rows are counted when ``field`` is one of ``values``; no field counts all rows.
+    field: str | None = None
+    values: tuple = ()
+
+    @property
+    def condition(self) -> Q:
+        return Q(**{f"{self.field}__in": self.values}) if self.field else Q()
+
+
+COUNTERS: dict[str, CounterSpec] = {
+    spec.name: spec
+    for spec in (
+        CounterSpec("pending_transactions", "transactions.Transaction", "status", ("pending",)),
+        CounterSpec("approved_transactions", "transactions.Transaction", "status", ("approved",)),
+        CounterSpec("pending_investments", "investments.UserInvestment", "status", ("pending",)),
+        CounterSpec("pending_kyc", "users.KycApplication", "status", ("pending",)),
+        CounterSpec("inbox_total", "core.EmailInbox"),
+        CounterSpec("unread_inbox", "core.EmailInbox", "status", ("unread",)),
+        CounterSpec("starred_inbox", "core.EmailInbox", "is_starred", (True,)),
+        CounterSpec("open_chat_sessions", "chat.ChatSession", "status", ("bot", "waiting", "active")),
+    )
+}
+
+
+def _key(name: str) -> str:
+    return f"{CACHE_PREFIX}{name}"
+
+
+def _timeout() -> int:
+    return getattr(settings, "ADMIN_COUNTERS_CACHE_SECONDS", 30)
+
+
+def _specs_by_model(names: Iterable[str]) -> dict[str, list[CounterSpec]]:
+    grouped: dict[str, list[CounterSpec]] = {}
+    for name in names:
+        spec = COUNTERS[name]
+        grouped.setdefault(spec.model, []).append(spec)
+    return grouped
+
+
+def compute_counters(names: Iterable[str] | None = None) -> dict[str, int]:
+    """Count from the tables: one aggregate query per model involved."""
+    values: dict[str, int] = {}
+    for label, specs in _specs_by_model(names or COUNTERS).items():
+        model = apps.get_model(label)
+        values.update(
+            model.objects.order_by().aggregate(
+                **{spec.name: Count("pk", filter=spec.condition) for spec in specs}
+            )
+        )
+    return values
+
+
+def get_counters(names: Iterable[str] | None = None) -> dict[str, int]:
+    """Current counter values, recomputing only the ones not in the cache."""
+    names = list(names or COUNTERS)
+    cached = cache.get_many([_key(name) for name in names])
+    values = {name: cached[_key(name)] for name in names if _key(name) in cached}
+    missing = [name for name in names if name not in values]
+    if missing:
+        fresh = compute_counters(missing)
+        cache.set_many({_key(name): value for name, value in fresh.items()}, _timeout())
+        values.update(fresh)
+    return values
+
+
+def invalidate_counters(names: Iterable[str]) -> None:
+    """Drop this process's cached ``names`` after commit, so the writer sees fresh counts."""
+    keys = [_key(name) for name in names]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,165 @@
+"""A local stand-in for the Resend HTTP API, for tests and benchmarks.
+
+``FakeResendServer`` listens on 127.0.0.1 with HTTP/1.1 keep-alive, accepts
+``POST /emails`` and ``POST /emails/batch`` and answers like Resend
+(``{"id": ...}`` and ``{"data": [{"id": ...}, ...]}``). A batch containing
+an invalid entry is rejected whole with a 422, unless it was sent with
+``x-batch-validation: permissive``, in which case the valid entries are
+accepted and the rest reported in ``errors``; ``strict_batches=True``
+ignores that header. It records every request body and counts TCP
+connections, so callers can check that the
+backend reuses pooled connections. ``fail_recipients`` makes sends to those
+addresses fail with a 422, ``latency`` adds a fixed delay per request and
+``connect_latency`` a delay per new connection (standing in for the TCP and
+TLS handshakes a real API endpoint costs). ``throttle`` answers that many
+requests with 429 and ``Retry-After: 0`` before accepting any.
+
+    with FakeResendServer() as server, override_settings(RESEND_API_BASE_URL=server.url):
+        ...
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_LIMIT = 100
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Reply headers and body go out as separate writes; without this, delayed
+    # ACKs stall every keep-alive request by ~40ms.
+    disable_nagle_algorithm = True
+    server: _Server
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def log_message(self, format, *args):  # noqa: A002 - silence request logging
+        pass
+
+    def _reply(self, status: int, body: dict, headers: dict[str, str] | None = None) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw or b"null")
+        except ValueError:
+            self._reply(400, {"name": "validation_error", "message": "Invalid JSON"})
+            return
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            server.requests.append((self.path, body))
+            throttled = server.throttle > 0
+            if throttled:
+                server.throttle -= 1
+        if throttled:
+            self._reply(429, {"name": "rate_limit_exceeded", "message": "Too many requests."}, {"Retry-After": "0"})
+            return
+
+        if self.path == "/emails":
+            status, reply = server.result_for(body)
+        elif self.path == "/emails/batch":
+            permissive = (
+                not server.strict_batches
+                and self.headers.get("x-batch-validation", "").lower() == "permissive"
+            )
+            status, reply = server.batch_result_for(body, permissive)
+        else:
+            status, reply = 404, {"name": "not_found", "message": self.path}
+        self._reply(status, reply)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_recipients, latency, connect_latency, strict_batches, throttle):
+        super().__init__(address, _Handler)
+        self.lock = threading.Lock()
+        self.requests: list[tuple[str, object]] = []
+        self.connections = 0
+        self.fail_recipients = set(fail_recipients)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.strict_batches = strict_batches
+        self.throttle = throttle
+
+    def result_for(self, email) -> tuple[int, dict]:
+        if not isinstance(email, dict) or not email.get("to"):
+            return 422, {"name": "validation_error", "message": "Missing `to` field."}
+        if self.fail_recipients & set(email["to"]):
+            return 422, {"name": "validation_error", "message": "Recipient rejected."}
+        return 200, {"id": str(uuid.uuid4())}
+
+    def batch_result_for(self, emails, permissive: bool) -> tuple[int, dict]:
+        if not isinstance(emails, list) or not 0 < len(emails) <= BATCH_LIMIT:
+            return 422, {"name": "validation_error", "message": f"Send between 1 and {BATCH_LIMIT} emails."}
+        data, errors = [], []
+        for index, email in enumerate(emails):
+            status, reply = self.result_for(email)
+            if status == 200:
+                data.append(reply)
+            else:
+                errors.append({"index": index, "message": reply["message"]})
+        if errors and not permissive:
+            return 422, {"name": "validation_error", "message": errors[0]["message"]}
+        return 200, {"data": data, "errors": errors} if permissive else {"data": data}
+
+
+class FakeResendServer:
+    def __init__(
+        self,
+        *,
+        fail_recipients=(),
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        strict_batches: bool = False,
+        throttle: int = 0,
+    ):
+        self._server = _Server(
+            ("127.0.0.1", 0), fail_recipients, latency, connect_latency, strict_batches, throttle
+        )
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-resend", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> list[tuple[str, object]]:
+        with self._server.lock:
+            return list(self._server.requests)
+
+    @property
+    def connections(self) -> int:
+        with self._server.lock:
+            return self._server.connections
+
+    def __enter__(self) -> FakeResendServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=5)
@@ -3,17 +3,72 @@ from __future__ import annotations
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
-from typing import Iterable
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 
+import httpx
 from django.conf import settings
 from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.message import EmailMessage
 
 logger = logging.getLogger(__name__)
 
-_RESEND_API_URL = "https://api.resend.com/emails"
+_DEFAULT_API_BASE_URL = "https://api.resend.com"
+# Resend accepts at most 100 emails per POST /emails/batch.
+MAX_BATCH_SIZE = 100
+
+_client: httpx.Client | None = None
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled client, so connections (and TLS sessions) are
+    reused across messages and across backend instances.
+
+    Rebuilt after a fork so workers never share sockets with their parent.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                pool_size = max(1, int(getattr(settings, "RESEND_POOL_SIZE", 10)))
+                _client = httpx.Client(
+                    http2=bool(getattr(settings, "RESEND_HTTP2", True)) and _http2_available(),
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size,
+                        keepalive_expiry=float(getattr(settings, "RESEND_KEEPALIVE_SECONDS", 30)),
+                    ),
+                    timeout=httpx.Timeout(float(getattr(settings, "EMAIL_TIMEOUT", 30)), connect=10.0),
+                )
+                _client_pid = pid
+    return _client
+
+
+def close_http_client() -> None:
+    """Close the pooled client; the next send builds a new one."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def _api_url(path: str) -> str:
+    base = getattr(settings, "RESEND_API_BASE_URL", None) or _DEFAULT_API_BASE_URL
+    return f"{base.rstrip('/')}{path}"
 
 
 def _first_html_alternative(message: EmailMessage) -> str | None:
@@ -32,6 +87,11 @@ class ResendEmailBackend(BaseEmailBackend):
     """Django email backend that sends mail via Resend HTTP API.
 
     Configure via env var `RESEND_API_KEY` or Django setting `RESEND_API_KEY`.
+    Requests go through one pooled keep-alive client per process (see
+    `get_http_client`); `RESEND_POOL_SIZE` caps its connections and
+    `RESEND_SEND_CONCURRENCY` how many messages of one `send_messages` call
+    are in flight at once. `send_batch` posts up to `RESEND_BATCH_LIMIT`
+    messages per request to the batch API.
 
     Use by setting:
         EMAIL_BACKEND=core.email_backends.resend.ResendEmailBackend
@@ -54,23 +114,132 @@ class ResendEmailBackend(BaseEmailBackend):
                 return 0
             raise RuntimeError(msg)
 
-        sent_count = 0
-        for message in email_messages:
+        return sum(self._send_each([message for message in email_messages if message]))
+
+    def send_batch(self, email_messages: Iterable[EmailMessage]) -> list[bool]:
+        """Send messages through the batch API; returns one result per message, in order.
+
+        Messages are grouped up to `RESEND_BATCH_LIMIT` per request. Batches
+        use permissive validation, so a bad address fails only its own entry;
+        those entries come back False and are not retried, since sending them
+        again would hit the same validation error. A batch rejected as a whole
+        (other 4xx) is retried one by one through `/emails`. Batches refused
+        with 429/5xx or lost to a transport error are not retried here; their
+        messages come back False and marked `resend_retryable`.
+        """
+        messages = list(email_messages)
+        results = [False] * len(messages)
+        if not messages:
+            return results
+
+        if not self.api_key:
+            msg = "RESEND_API_KEY is not set; cannot send email via Resend"
+            if self.fail_silently:
+                logger.error(msg)
+                return results
+            raise RuntimeError(msg)
+
+        entries: list[tuple[int, dict[str, object]]] = []
+        for index, message in enumerate(messages):
             if not message:
                 continue
-
             try:
-                if self._send_single(message):
-                    sent_count += 1
+                payload = self._build_payload(message)
             except Exception:
-                if self.fail_silently:
-                    logger.exception("Resend send failed (fail_silently=True)")
-                    continue
-                raise
+                if not self.fail_silently:
+                    raise
+                logger.exception("Resend batch: could not build message (fail_silently=True)")
+                continue
+            if payload is not None:
+                entries.append((index, payload))
+
+        limit = min(MAX_BATCH_SIZE, max(1, int(getattr(settings, "RESEND_BATCH_LIMIT", MAX_BATCH_SIZE))))
+        for start in range(0, len(entries), limit):
+            chunk = entries[start : start + limit]
+            accepted = self._send_chunk([messages[index] for index, _ in chunk], [payload for _, payload in chunk])
+            for (index, _), ok in zip(chunk, accepted):
+                results[index] = ok
+        return results
+
+    def _send_each(self, messages: list[EmailMessage]) -> list[bool]:
+        workers = min(len(messages), max(1, int(getattr(settings, "RESEND_SEND_CONCURRENCY", 4))))
+        if workers <= 1:
+            return [self._send_guarded(message) for message in messages]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resend") as pool:
+            return list(pool.map(self._send_guarded, messages))
+
+    def _send_chunk(self, messages: list[EmailMessage], payloads: list[dict[str, object]]) -> list[bool]:
+        try:
+            # Permissive validation: valid entries are sent, invalid ones listed in `errors`.
+            response = self._post("/emails/batch", payloads, {"x-batch-validation": "permissive"})
+        except httpx.HTTPError as exc:
+            logger.warning("Resend batch transport error (%s) for %d email(s)", exc, len(messages))
+            for message in messages:
+                self._record_status(message, None, error_class=exc.__class__.__name__)
+            return [False] * len(messages)
+
+        status = response.status_code
+        for message in messages:
+            self._record_status(message, status, response.headers.get("retry-after"))
+        if status == 429 or status >= 500:
+            # Retrying each email singly would only add load; leave it to the caller.
+            logger.warning(
+                "Resend batch not accepted: status=%s for %d email(s)", status, len(messages)
+            )
+            return [False] * len(messages)
 
-        return sent_count
+        if not 200 <= status < 300:
+            logger.warning(
+                "Resend batch rejected: status=%s body=%s; sending %d email(s) singly",
+                status,
+                response.text[:500],
+                len(messages),
+            )
+            return self._send_each(messages)
 
-    def _send_single(self, message: EmailMessage) -> bool:
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        data = body.get("data") if isinstance(body, dict) else None
+        errors = body.get("errors") if isinstance(body, dict) else None
+        failed = {
+            error["index"]: error.get("message")
+            for error in errors or []
+            if isinstance(error, dict) and isinstance(error.get("index"), int)
+        }
+
+        # `data` holds the ids of the accepted entries, in request order.
+        ids = iter(data if isinstance(data, list) else [])
+        results = [True] * len(messages)
+        for position, message in enumerate(messages):
+            if position in failed:
+                # Validation failures (bad address, missing field): a retry would fail the same way.
+                results[position] = False
+                self._record_status(message, 422)
+                logger.warning(
+                    "Resend batch entry rejected: subject=%r to=%s error=%s",
+                    message.subject,
+                    message.to,
+                    failed[position],
+                )
+                continue
+            item = next(ids, None)
+            self._record_id(message, item.get("id") if isinstance(item, dict) else None)
+
+        logger.info("Resend batch accepted: %d of %d email(s)", sum(results), len(messages))
+        return results
+
+    def _send_guarded(self, message: EmailMessage) -> bool:
+        try:
+            return self._send_single(message)
+        except Exception:
+            if self.fail_silently:
+                logger.exception("Resend send failed (fail_silently=True)")
+                return False
+            raise
+
+    def _build_payload(self, message: EmailMessage) -> dict[str, object] | None:
         from_email = message.from_email or getattr(settings, "DEFAULT_FROM_EMAIL", None)
         if not from_email:
             raise ValueError("No from_email set on message and DEFAULT_FROM_EMAIL is empty")
@@ -78,7 +247,7 @@ class ResendEmailBackend(BaseEmailBackend):
         to_list = list(message.to or [])
         if not to_list:
             logger.warning("Skipping send: no recipients")
-            return False
+            return None
 
         html = _first_html_alternative(message)
         text = None
@@ -117,89 +286,112 @@ class ResendEmailBackend(BaseEmailBackend):
         if getattr(message, "attachments", None):
             logger.info("Email has attachments; Resend backend currently ignores attachments")
 
-        timeout = int(getattr(settings, "EMAIL_TIMEOUT", 30))
+        return payload
 
-        request = urllib.request.Request(
-            _RESEND_API_URL,
-            data=json.dumps(payload).encode("utf-8"),
+    def _post(self, path: str, payload: object, headers: dict[str, str] | None = None) -> httpx.Response:
+        return get_http_client().post(
+            _api_url(path),
+            content=json.dumps(payload).encode("utf-8"),
             headers={
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
+                **(headers or {}),
             },
-            method="POST",
         )
 
+    @staticmethod
+    def _record_id(message: EmailMessage, resend_id: object) -> None:
+        """Attach the provider message id for diagnostics (best-effort)."""
+        if not resend_id:
+            return
         try:
-            with urllib.request.urlopen(request, timeout=timeout) as response:
-                status = getattr(response, "status", 200)
-                body = response.read().decode("utf-8", errors="ignore")
-
-            response_json: dict[str, object] = {}
-            if body:
-                try:
-                    parsed = json.loads(body)
-                    if isinstance(parsed, dict):
-                        response_json = parsed
-                except Exception:
-                    response_json = {}
-
-            resend_id = response_json.get("id")
-
-            # Attach provider message id for diagnostics (best-effort).
-            if resend_id:
-                try:
-                    setattr(message, "resend_id", str(resend_id))
-                except Exception:
-                    pass
-                try:
-                    current_headers = getattr(message, "extra_headers", None) or {}
-                    if not isinstance(current_headers, dict):
-                        current_headers = {}
-                    message.extra_headers = dict(current_headers)
-                    message.extra_headers["X-Resend-Id"] = str(resend_id)
-                except Exception:
-                    pass
-
-            if 200 <= status < 300:
-                logger.info(
-                    "Resend email accepted: subject=%r to=%s status=%s id=%s",
-                    message.subject,
-                    to_list,
-                    status,
-                    resend_id,
-                )
-                return True
+            setattr(message, "resend_id", str(resend_id))
+        except Exception:
+            pass
+        try:
+            current_headers = getattr(message, "extra_headers", None) or {}
+            if not isinstance(current_headers, dict):
+                current_headers = {}
+            message.extra_headers = dict(current_headers)
+            message.extra_headers["X-Resend-Id"] = str(resend_id)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _record_status(
+        message: EmailMessage,
+        status: int | None,
+        retry_after: str | None = None,
+        error_class: str | None = None,
+    ) -> None:
+        """Attach the outcome for callers that retry or log (`core.bulk_email`, `core.email_delivery`).
+
+        `status` is None for transport errors, whose exception class name is
+        kept as `resend_error_class`. Rate limits (429), server errors and
+        transport errors are marked `resend_retryable`; the Retry-After
+        header, if any, is kept as `resend_retry_after` seconds.
+        """
+        try:
+            delay = float(retry_after) if retry_after else None
+        except ValueError:
+            delay = None
+        try:
+            message.resend_status = status
+            message.resend_error_class = error_class
+            message.resend_retryable = status is None or status == 429 or status >= 500
+            message.resend_retry_after = delay
+        except Exception:
+            pass
+
+    def _send_single(self, message: EmailMessage) -> bool:
+        payload = self._build_payload(message)
+        if payload is None:
+            return False
+        to_list = payload["to"]
 
+        try:
+            response = self._post("/emails", payload)
+        except httpx.HTTPError as exc:
             logger.error(
-                "Resend email failed: subject=%r to=%s status=%s id=%s body=%s",
+                "Resend transport error: subject=%r to=%s error=%s",
                 message.subject,
                 to_list,
-                status,
-                resend_id,
-                body[:500],
+                str(exc),
             )
+            self._record_status(message, None, error_class=exc.__class__.__name__)
             return False
 
-        except urllib.error.HTTPError as exc:
+        status = response.status_code
+        self._record_status(message, status, response.headers.get("retry-after"))
+        body = response.text
+        response_json: dict[str, object] = {}
+        if body:
             try:
-                err_body = exc.read().decode("utf-8", errors="ignore")
+                parsed = json.loads(body)
+                if isinstance(parsed, dict):
+                    response_json = parsed
             except Exception:
-                err_body = ""
+                response_json = {}
 
-            logger.error(
-                "Resend HTTPError: subject=%r to=%s status=%s body=%s",
-                message.subject,
-                to_list,
-                getattr(exc, "code", None),
-                (err_body or str(exc))[:500],
-            )
-            return False
+        resend_id = response_json.get("id")
+        self._record_id(message, resend_id)
 
-        except urllib.error.URLError as exc:
-            logger.error(
-                "Resend URLError: subject=%r to=%s error=%s",
+        if 200 <= status < 300:
+            logger.info(
+                "Resend email accepted: subject=%r to=%s status=%s id=%s",
                 message.subject,
                 to_list,
-                str(exc),
+                status,
+                resend_id,
             )
-            return False
+            return True
+
+        logger.error(
+            "Resend email failed: subject=%r to=%s status=%s id=%s body=%s",
+            message.subject,
+            to_list,
+            status,
+            resend_id,
+            body[:500],
+        )
+        return False
@@ -0,0 +1,247 @@
+"""Persistent email delivery log (``EmailDelivery``) and its aggregates.
+
+Every provider send attempt made through ``EmailService`` or the bulk sender
+(via ``send_logged`` / ``send_batch_logged``) is recorded with its template, a hash of the recipient, the provider message
+id, the latency of the provider call, and the error class on failure.
+``record_message`` only appends to an in-process buffer. A daemon writer
+thread bulk-inserts the buffer every ``EMAIL_DELIVERY_LOG_FLUSH_SECONDS`` or
+once ``EMAIL_DELIVERY_LOG_BATCH_SIZE`` rows are waiting, so logging never
+adds a database round trip to the send path. Rows still buffered at exit
+are flushed by an ``atexit`` hook.
+
+With ``EMAIL_DELIVERY_LOG_SYNC`` enabled (the default under tests) there is
+neither buffer nor writer thread: rows are inserted on the calling thread as
+soon as the send returns (one insert per ``send_batch_logged`` call).
+
+``latency_by_template`` and ``failure_rate_by_hour`` feed the admin
+delivery stats page; both aggregate in the database. Old rows are removed
+by ``prune_retention``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Aggregate, Count, IntegerField, Q
+from django.db.models.functions import TruncHour
+
+from .models import EmailDelivery
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_SECONDS = 5.0
+
+_buffer: list[EmailDelivery] = []
+_lock = threading.Lock()
+_wake = threading.Event()
+_writer: threading.Thread | None = None
+_writer_pid: int | None = None
+
+
+def recipient_hash(recipients: str | list[str]) -> str:
+    """SHA-256 of the lower-cased, sorted recipient addresses."""
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    normalised = ",".join(sorted(address.strip().lower() for address in recipients))
+    return hashlib.sha256(normalised.encode()).hexdigest()
+
+
+def _provider_id(message) -> str:
+    resend_id = getattr(message, "resend_id", None)
+    if resend_id:
+        return str(resend_id)
+    anymail_status = getattr(message, "anymail_status", None)
+    return str(getattr(anymail_status, "message_id", None) or "")
+
+
+def _error_class(message, exc: BaseException | None) -> str:
+    if exc is not None:
+        return exc.__class__.__name__
+    error_class = getattr(message, "resend_error_class", None)
+    if error_class:
+        return error_class
+    status = getattr(message, "resend_status", None)
+    return f"HTTP {status}" if status else "Rejected"
+
+
+def _build_row(message, ok: bool, latency_ms: float, exc: BaseException | None = None) -> EmailDelivery | None:
+    try:
+        return EmailDelivery(
+            template=(getattr(message, "email_template", "") or "")[:100],
+            recipient_hash=recipient_hash(list(message.to or [])),
+            provider_id=_provider_id(message)[:100] if ok else "",
+            latency_ms=max(0, int(round(latency_ms))),
+            status=EmailDelivery.STATUS_SENT if ok else EmailDelivery.STATUS_FAILED,
+            error_class="" if ok else _error_class(message, exc)[:100],
+        )
+    except Exception:
+        logger.exception("Could not build email delivery log row")
+        return None
+
+
+def _record(candidates: list[EmailDelivery | None]) -> None:
+    rows = [row for row in candidates if row is not None]
+    if not rows or not getattr(settings, "EMAIL_DELIVERY_LOG_ENABLED", True):
+        return
+    if getattr(settings, "EMAIL_DELIVERY_LOG_SYNC", False):
+        _write(rows)
+        return
+    with _lock:
+        _buffer.extend(rows)
+        full = len(_buffer) >= getattr(settings, "EMAIL_DELIVERY_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    _ensure_writer()
+    if full:
+        _wake.set()
+
+
+def record_message(message, ok: bool, latency_ms: float, exc: BaseException | None = None) -> None:
+    """Log one send attempt of ``message`` (see module docstring)."""
+    if not getattr(settings, "EMAIL_DELIVERY_LOG_ENABLED", True):
+        return
+    _record([_build_row(message, ok, latency_ms, exc)])
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def send_logged(connection, message) -> bool:
+    """``connection.send_messages([message])``, logged; exceptions are logged and re-raised."""
+    started = time.perf_counter()
+    try:
+        ok = bool(connection.send_messages([message]))
+    except Exception as exc:
+        record_message(message, False, _elapsed_ms(started), exc)
+        raise
+    record_message(message, ok, _elapsed_ms(started))
+    return ok
+
+
+def send_batch_logged(connection, messages: list) -> list[bool]:
+    """``connection.send_batch(messages)``, logged; every message gets the batch call's latency."""
+    started = time.perf_counter()
+    try:
+        accepted = connection.send_batch(messages)
+    except Exception as exc:
+        latency = _elapsed_ms(started)
+        _record([_build_row(message, False, latency, exc) for message in messages])
+        raise
+    latency = _elapsed_ms(started)
+    _record([_build_row(message, bool(ok), latency) for message, ok in zip(messages, accepted, strict=False)])
+    return accepted
+
+
+def flush_deliveries() -> int:
+    """Write buffered rows now; returns how many were written."""
+    with _lock:
+        rows = list(_buffer)
+        _buffer.clear()
+    return _write(rows)
+
+
+def _write(rows: list[EmailDelivery]) -> int:
+    if not rows:
+        return 0
+    try:
+        EmailDelivery.objects.bulk_create(rows, batch_size=500)
+    except Exception:
+        logger.exception("Dropped %d email delivery log row(s)", len(rows))
+        return 0
+    return len(rows)
+
+
+def _run_writer() -> None:
+    interval = float(getattr(settings, "EMAIL_DELIVERY_LOG_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+    while True:
+        _wake.wait(timeout=interval)
+        _wake.clear()
+        close_old_connections()
+        flush_deliveries()
+
+
+def _ensure_writer() -> None:
+    global _writer, _writer_pid
+    pid = os.getpid()
+    if _writer is not None and _writer_pid == pid and _writer.is_alive():
+        return
+    with _lock:
+        if _writer is None or _writer_pid != pid or not _writer.is_alive():
+            _writer = threading.Thread(target=_run_writer, name="email-delivery-log", daemon=True)
+            _writer.start()
+            _writer_pid = pid
+
+
+atexit.register(flush_deliveries)
+
+
+class _PercentileDisc(Aggregate):
+    """PostgreSQL ``percentile_disc(fraction) WITHIN GROUP (ORDER BY expr)``."""
+
+    function = "percentile_disc"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = IntegerField()
+
+    def __init__(self, expression, fraction: float, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def _latency_at(rows, total: int, fraction: float) -> int:
+    """Nearest-rank percentile (``percentile_disc`` semantics) via one indexed lookup."""
+    index = max(0, math.ceil(fraction * total) - 1)
+    return rows.order_by("latency_ms").values_list("latency_ms", flat=True)[index]
+
+
+def latency_by_template(since: datetime) -> list[dict[str, Any]]:
+    """Per template since ``since``: sends, failures, failure rate and p50/p95 latency (ms)."""
+    window = EmailDelivery.objects.filter(created_at__gte=since)
+    aggregates: dict[str, Any] = {
+        "total": Count("id"),
+        "failed": Count("id", filter=Q(status=EmailDelivery.STATUS_FAILED)),
+    }
+    postgres = connection.vendor == "postgresql"
+    if postgres:
+        aggregates["p50_ms"] = _PercentileDisc("latency_ms", 0.5)
+        aggregates["p95_ms"] = _PercentileDisc("latency_ms", 0.95)
+    groups = window.values("template").annotate(**aggregates).order_by("-total", "template")
+
+    stats = []
+    for group in groups:
+        template, total = group["template"], group["total"]
+        if not postgres:
+            rows = window.filter(template=template)
+            group["p50_ms"] = _latency_at(rows, total, 0.5)
+            group["p95_ms"] = _latency_at(rows, total, 0.95)
+        stats.append(
+            {
+                "template": template or "(none)",
+                "total": total,
+                "failed": group["failed"],
+                "failure_rate": group["failed"] / total,
+                "p50_ms": group["p50_ms"],
+                "p95_ms": group["p95_ms"],
+            }
+        )
+    return stats
+
+
+def failure_rate_by_hour(since: datetime) -> list[dict[str, Any]]:
+    """Sends, failures and failure rate per hour since ``since``, oldest first."""
+    hours = (
+        EmailDelivery.objects.filter(created_at__gte=since)
+        .annotate(hour=TruncHour("created_at"))
+        .values("hour")
+        .annotate(total=Count("id"), failed=Count("id", filter=Q(status=EmailDelivery.STATUS_FAILED)))
+        .order_by("hour")
+    )
+    return [{**row, "failure_rate": row["failed"] / row["total"] if row["total"] else 0.0} for row in hours]
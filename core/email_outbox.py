@@ -0,0 +1,292 @@
+"""Transactional email outbox.
+
+Callers enqueue emails inside their own ``transaction.atomic()`` block; the
+rows only become visible to ``drain_email_outbox`` once that transaction
+commits. The drain claims rows with a lease, delivers them on a bounded
+thread pool and retries failures with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+OutboxHandler = Callable[[dict[str, Any]], bool]
+
+_HANDLERS: dict[str, OutboxHandler] = {}
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+
+
+def register_outbox_handler(kind: str) -> Callable[[OutboxHandler], OutboxHandler]:
+    """Register ``func(payload) -> bool`` as the sender for ``kind`` rows."""
+
+    def decorator(func: OutboxHandler) -> OutboxHandler:
+        _HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+def enqueue_email(kind: str, payload: dict[str, Any], to_email: str = "") -> EmailOutbox:
+    """Queue one email. Call inside the transaction that triggers it."""
+    return EmailOutbox.objects.create(kind=kind, payload=payload, to_email=to_email or "")
+
+
+def enqueue_emails(rows: Iterable[tuple[str, dict[str, Any], str]]) -> int:
+    """Queue many ``(kind, payload, to_email)`` rows with one bulk insert."""
+    objs = [
+        EmailOutbox(kind=kind, payload=payload, to_email=to_email or "")
+        for kind, payload, to_email in rows
+    ]
+    EmailOutbox.objects.bulk_create(objs)
+    return len(objs)
+
+
+def roi_payout_outbox_row(user, amount, investment, payout_date) -> tuple[str, dict[str, Any], str]:
+    return (
+        "roi_payout",
+        {
+            "user_id": user.pk,
+            "investment_id": investment.pk,
+            "amount": str(amount),
+            "payout_date": payout_date.isoformat(),
+        },
+        getattr(user, "email", "") or "",
+    )
+
+
+def enqueue_roi_payout(user, amount, investment, payout_date) -> EmailOutbox:
+    kind, payload, to_email = roi_payout_outbox_row(user, amount, investment, payout_date)
+    return enqueue_email(kind, payload, to_email)
+
+
+@register_outbox_handler("roi_payout")
+def _send_roi_payout(payload: dict[str, Any]) -> bool:
+    from investments.models import UserInvestment
+
+    from .email_service import EmailService
+
+    investment = UserInvestment.objects.select_related("user", "plan").get(
+        pk=payload["investment_id"]
+    )
+    return EmailService.send_roi_payout_notification(
+        investment.user,
+        Decimal(payload["amount"]),
+        investment,
+        date.fromisoformat(payload["payout_date"]),
+    )
+
+
+def investment_status_outbox_row(investment, status: str) -> tuple[str, dict[str, Any], str]:
+    return (
+        "investment_status",
+        {"investment_id": investment.pk, "status": status},
+        getattr(investment.user, "email", "") or "",
+    )
+
+
+@register_outbox_handler("investment_status")
+def _send_investment_status(payload: dict[str, Any]) -> bool:
+    from investments.models import UserInvestment
+
+    from .email_service import EmailService
+
+    investment = UserInvestment.objects.select_related("user", "plan").get(
+        pk=payload["investment_id"]
+    )
+    return EmailService.send_investment_notification(investment, payload["status"])
+
+
+def transaction_status_outbox_row(txn, status: str, notes: str = "") -> tuple[str, dict[str, Any], str]:
+    return (
+        "transaction_status",
+        {"transaction_id": str(txn.pk), "status": status, "notes": notes or ""},
+        getattr(txn.user, "email", "") or "",
+    )
+
+
+@register_outbox_handler("transaction_status")
+def _send_transaction_status(payload: dict[str, Any]) -> bool:
+    from django.conf import settings
+
+    from transactions.models import Transaction
+
+    from .email_service import EmailService
+
+    txn = Transaction.objects.select_related("user").get(pk=payload["transaction_id"])
+    bcc_address = getattr(settings, "TRUSTPILOT_BCC_ADDRESS", None)
+    return EmailService.send_transaction_notification(
+        txn,
+        payload["status"],
+        payload.get("notes") or "",
+        bcc=[bcc_address] if bcc_address else None,
+    )
+
+
+def roi_digest_outbox_row(user, payouts: list[tuple[str, date, Decimal]]) -> tuple[str, dict[str, Any], str]:
+    """Build one digest row from ``(plan_name, payout_date, amount)`` tuples."""
+    ordered = sorted(payouts, key=lambda item: (item[1], item[0]))
+    return (
+        "roi_digest",
+        {
+            "user_id": user.pk,
+            "payouts": [
+                {"plan": plan, "date": day.isoformat(), "amount": str(amount)}
+                for plan, day, amount in ordered
+            ],
+            "total_amount": str(sum((amount for _, _, amount in ordered), Decimal("0"))),
+        },
+        getattr(user, "email", "") or "",
+    )
+
+
+@register_outbox_handler("roi_digest")
+def _send_roi_digest(payload: dict[str, Any]) -> bool:
+    from django.contrib.auth import get_user_model
+
+    from .email_service import EmailService
+
+    user = get_user_model().objects.get(pk=payload["user_id"])
+    payouts = [
+        {
+            "plan": item["plan"],
+            "date": date.fromisoformat(item["date"]),
+            "amount": Decimal(item["amount"]),
+        }
+        for item in payload["payouts"]
+    ]
+    return EmailService.send_roi_digest_notification(
+        user, payouts, Decimal(payload["total_amount"])
+    )
+
+
+@dataclass
+class DrainStats:
+    claimed: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+def claim_batch(limit: int, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> list[EmailOutbox]:
+    """Lease up to ``limit`` due rows so concurrent drains never share work.
+
+    Rows left in ``sending`` by a crashed worker become claimable again once
+    their lease (``available_at``) expires.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        qs = EmailOutbox.objects.filter(
+            status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING],
+            available_at__lte=now,
+        ).order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        rows = list(qs[:limit])
+        if rows:
+            EmailOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+                status=EmailOutbox.STATUS_SENDING,
+                attempts=F("attempts") + 1,
+                available_at=now + timedelta(seconds=lease_seconds),
+            )
+            for row in rows:
+                row.attempts += 1
+    return rows
+
+
+def _deliver(row: EmailOutbox, in_thread: bool) -> tuple[bool, str]:
+    try:
+        handler = _HANDLERS.get(row.kind)
+        if handler is None:
+            return False, f"No outbox handler registered for kind {row.kind!r}"
+        if handler(row.payload):
+            return True, ""
+        return False, "Handler reported failure"
+    except Exception as exc:
+        logger.exception("Outbox delivery failed for row %s (%s)", row.id, row.kind)
+        return False, f"{exc.__class__.__name__}: {exc}"
+    finally:
+        if in_thread:
+            connections.close_all()
+
+
+def _record_results(
+    results: list[tuple[EmailOutbox, bool, str]], max_attempts: int, stats: DrainStats
+) -> None:
+    now = timezone.now()
+    sent_ids = [row.id for row, ok, _ in results if ok]
+    if sent_ids:
+        EmailOutbox.objects.filter(id__in=sent_ids).update(
+            status=EmailOutbox.STATUS_SENT, sent_at=now, last_error=""
+        )
+        stats.sent += len(sent_ids)
+
+    for row, ok, error in results:
+        if ok:
+            continue
+        if row.attempts >= max_attempts:
+            EmailOutbox.objects.filter(id=row.id).update(
+                status=EmailOutbox.STATUS_FAILED, last_error=error[:2000]
+            )
+            stats.failed += 1
+        else:
+            backoff = RETRY_BASE_SECONDS * (2 ** (row.attempts - 1))
+            EmailOutbox.objects.filter(id=row.id).update(
+                status=EmailOutbox.STATUS_PENDING,
+                last_error=error[:2000],
+                available_at=now + timedelta(seconds=backoff),
+            )
+            stats.retried += 1
+
+
+def drain_outbox(
+    *,
+    batch_size: int = 100,
+    max_workers: int = 4,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    max_batches: int | None = None,
+) -> DrainStats:
+    """Deliver due outbox rows until none are left (or ``max_batches`` is hit).
+
+    With ``max_workers <= 1`` delivery happens inline on the calling thread,
+    which is what tests and single-process cron hosts use.
+    """
+    stats = DrainStats()
+    batches = 0
+    pool = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    try:
+        while max_batches is None or batches < max_batches:
+            rows = claim_batch(batch_size)
+            if not rows:
+                break
+            batches += 1
+            stats.claimed += len(rows)
+            if pool is None:
+                outcomes = [_deliver(row, in_thread=False) for row in rows]
+            else:
+                outcomes = list(pool.map(lambda row: _deliver(row, in_thread=True), rows))
+            _record_results(
+                [(row, ok, error) for row, (ok, error) in zip(rows, outcomes)],
+                max_attempts,
+                stats,
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+    return stats
@@ -6,10 +6,13 @@ import logging
 from typing import Any
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import TemplateDoesNotExist
 from django.utils import timezone
 
+from .email_delivery import send_batch_logged, send_logged
+from .email_templates import get_email_template, render_email_template
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,14 +46,15 @@ class EmailService:
 
     # --- Internal send method ---
     @classmethod
-    def _send(
+    def build_message(
         cls,
         template_name: str,
         to_emails: str | list[str],
         context: dict[str, Any] | None = None,
         subject: str | None = None,
         bcc: list[str] | None = None,
-    ) -> bool:
+    ) -> EmailMultiAlternatives | None:
+        """Render ``emails/<template_name>`` into a message, or ``None`` if it cannot be sent."""
         if isinstance(to_emails, str):
             recipients: list[str] = [to_emails]
         else:
@@ -58,37 +62,31 @@ class EmailService:
 
         if not recipients:
             logger.warning("EmailService._send called with empty recipients list")
-            return False
-
-        ctx: dict[str, Any] = context.copy() if context else {}
-        # Branding + site helpers expected by templates
-        ctx.setdefault("brand_name", cls.BRAND_NAME)
-        ctx.setdefault("support_email", getattr(settings, "SUPPORT_EMAIL", None))
-        ctx.setdefault("current_timestamp", timezone.now())
-        ctx.setdefault("site_url", getattr(settings, "SITE_URL", "https://wolvcapital.com"))
-        ctx.setdefault("current_year", timezone.now().year)
-        # expose BRAND config dict under both brand_config and BRAND for templates
-        ctx.setdefault("brand_config", getattr(settings, "BRAND", {}))
-        ctx.setdefault("BRAND", getattr(settings, "BRAND", {}))
-
-        html_template = f"emails/{template_name}.html"
-        text_template = f"emails/{template_name}.txt"
+            return None
 
+        # Templates are compiled once per process and rendered over the shared
+        # static context (branding, site helpers); see core.email_templates.
+        html_template = get_email_template(f"emails/{template_name}.html")
         try:
-            html_content: str = render_to_string(html_template, ctx)
+            if html_template is None:
+                raise TemplateDoesNotExist(f"emails/{template_name}.html")
+            html_content: str = render_email_template(html_template, context)
         except Exception as exc:
             logger.exception(
                 "Failed to render HTML template emails/%s.html: %s",
                 template_name,
                 exc,
             )
-            return False
+            return None
 
-        try:
-            text_content: str = render_to_string(text_template, ctx)
-        except Exception:
-            logger.info("Text template emails/%s.txt not found or failed to render", template_name)
-            text_content = ""
+        # A missing .txt part is remembered, so it no longer costs a lookup per message.
+        text_template = get_email_template(f"emails/{template_name}.txt")
+        text_content = ""
+        if text_template is not None:
+            try:
+                text_content = render_email_template(text_template, context)
+            except Exception:
+                logger.info("Text template emails/%s.txt failed to render", template_name)
 
         if subject is None:
             subject = f"{cls.BRAND_NAME} notification"
@@ -101,13 +99,29 @@ class EmailService:
             bcc=bcc,
         )
         message.attach_alternative(html_content, "text/html")
+        # Read by the delivery log (core.email_delivery).
+        message.email_template = template_name
+        return message
+
+    @classmethod
+    def _send(
+        cls,
+        template_name: str,
+        to_emails: str | list[str],
+        context: dict[str, Any] | None = None,
+        subject: str | None = None,
+        bcc: list[str] | None = None,
+    ) -> bool:
+        message = cls.build_message(template_name, to_emails, context=context, subject=subject, bcc=bcc)
+        if message is None:
+            return False
 
         try:
-            sent = message.send(fail_silently=False)
+            sent = send_logged(message.get_connection(fail_silently=False), message)
             logger.info(
                 "Email %r sent to %s using template %r (result=%s)",
-                subject,
-                recipients,
+                message.subject,
+                message.to,
                 template_name,
                 sent,
             )
@@ -115,13 +129,54 @@ class EmailService:
         except Exception as exc:
             logger.exception(
                 "Failed to send email %r to %s using template %r: %s",
-                subject,
-                recipients,
+                message.subject,
+                message.to,
                 template_name,
                 exc,
             )
             return False
 
+    @classmethod
+    def send_batch(cls, messages: list[EmailMultiAlternatives | None]) -> list[bool]:
+        """Send prepared messages over one connection; one result per message, in order.
+
+        Backends with a batch API (``ResendEmailBackend.send_batch``) get up to
+        ``RESEND_BATCH_LIMIT`` messages per request; any other backend sends
+        them one at a time. ``None`` entries (messages that failed to build)
+        come back as ``False``.
+        """
+        results = [False] * len(messages)
+        pending = [(index, message) for index, message in enumerate(messages) if message is not None]
+        if not pending:
+            return results
+
+        connection = get_connection(fail_silently=False)
+        if hasattr(connection, "send_batch"):
+            try:
+                accepted = send_batch_logged(connection, [message for _, message in pending])
+            except Exception:
+                logger.exception("Batch send of %d email(s) failed", len(pending))
+                accepted = [False] * len(pending)
+            for (index, _), ok in zip(pending, accepted):
+                results[index] = bool(ok)
+        else:
+            try:
+                connection.open()
+            except Exception:
+                logger.exception("Could not open email connection for batch send")
+                return results
+            try:
+                for index, message in pending:
+                    try:
+                        results[index] = send_logged(connection, message)
+                    except Exception:
+                        logger.exception("Failed to send email %r to %s", message.subject, message.to)
+            finally:
+                connection.close()
+
+        logger.info("Batch sent %d of %d email(s)", sum(results), len(messages))
+        return results
+
     # --- Public helpers ---
     @classmethod
     def send_test_email(cls, to_email: str) -> bool:
@@ -257,6 +312,32 @@ class EmailService:
         }
         return cls._send(template, getattr(user, "email", ""), context=context, subject=subject)
 
+    @classmethod
+    def send_roi_digest_notification(
+        cls,
+        user: Any,
+        payouts: list[dict[str, Any]],
+        total_amount: Any,
+    ) -> bool:
+        """Notify user of several ROI payouts in one email.
+
+        ``payouts`` items carry ``plan``, ``date`` and ``amount`` keys.
+        """
+        template = "roi_payout_digest"
+        subject = f"ROI Payout Summary - {cls.BRAND_NAME}"
+        dates = [item["date"] for item in payouts]
+
+        context = {
+            "user": user,
+            "payouts": payouts,
+            "payout_count": len(payouts),
+            "total_amount": total_amount,
+            "start_date": min(dates) if dates else None,
+            "end_date": max(dates) if dates else None,
+            "dashboard_url": "/dashboard/",
+        }
+        return cls._send(template, getattr(user, "email", ""), context=context, subject=subject)
+
     @classmethod
     def send_card_approved_notification(cls, user, card) -> bool:
         """Notify user when their virtual card is approved."""
@@ -0,0 +1,104 @@
+"""Per-process cache of compiled email templates and their static context.
+
+``render_to_string`` resolves the template through every loader on each
+call and, for the many emails without a ``.txt`` part, raises
+``TemplateDoesNotExist`` per message. ``EmailService`` instead gets each
+``emails/<name>.html`` / ``.txt`` from here: compiled once per process, with
+missing ones remembered as ``None``.
+
+The context values that are the same for every message (brand, support
+address, site URL, brand config) are built once and form the bottom layer
+of each render's ``Context``. Only the timestamp and the caller's
+per-recipient variables are added per message. Django templates cannot be
+safely rendered in part, so the static values are shared rather than
+pre-rendered into the markup.
+
+The cache is on unless ``EMAIL_TEMPLATE_CACHE`` is False (it defaults to
+``not DEBUG`` so edited templates show up in development) and is cleared
+when the template or branding settings change.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import Context, TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils import timezone
+
+_STATIC_SETTINGS = {"TEMPLATES", "BRAND", "BRAND_NAME", "SITE_URL", "SUPPORT_EMAIL", "EMAIL_TEMPLATE_CACHE"}
+
+_templates: dict[str, Any] = {}
+_static_context: dict[str, Any] | None = None
+_lock = threading.Lock()
+
+
+def _enabled() -> bool:
+    return getattr(settings, "EMAIL_TEMPLATE_CACHE", not settings.DEBUG)
+
+
+def get_email_template(path: str):
+    """The compiled template at ``path``, or ``None`` if it does not exist."""
+    if _enabled() and path in _templates:
+        return _templates[path]
+    try:
+        template = get_template(path)
+    except TemplateDoesNotExist:
+        template = None
+    if _enabled():
+        with _lock:
+            _templates[path] = template
+    return template
+
+
+def preload_email_templates(names: Iterable[str]) -> int:
+    """Compile the ``.html`` and ``.txt`` parts of ``names`` up front; returns how many exist."""
+    return sum(
+        get_email_template(f"emails/{name}.{ext}") is not None for name in names for ext in ("html", "txt")
+    )
+
+
+def static_email_context() -> dict[str, Any]:
+    """Context values shared by every email; treat the result as read-only."""
+    global _static_context
+    if _static_context is not None and _enabled():
+        return _static_context
+    brand = getattr(settings, "BRAND", {})
+    context = {
+        "brand_name": getattr(settings, "BRAND_NAME", "WolvCapital"),
+        "support_email": getattr(settings, "SUPPORT_EMAIL", None),
+        "site_url": getattr(settings, "SITE_URL", "https://wolvcapital.com"),
+        # expose BRAND config dict under both brand_config and BRAND for templates
+        "brand_config": brand,
+        "BRAND": brand,
+    }
+    if _enabled():
+        _static_context = context
+    return context
+
+
+def render_email_template(template, context: dict[str, Any] | None) -> str:
+    """Render a compiled email template over the static context plus ``context``."""
+    now = timezone.now()
+    ctx = Context(static_email_context(), autoescape=template.backend.engine.autoescape)
+    ctx.update({"current_timestamp": now, "current_year": now.year})
+    ctx.update(context or {})
+    return template.template.render(ctx)
+
+
+def clear_email_template_cache() -> None:
+    global _static_context
+    with _lock:
+        _templates.clear()
+        _static_context = None
+
+
+@receiver(setting_changed)
+def _clear_on_setting_change(setting, **kwargs):
+    if setting in _STATIC_SETTINGS:
+        clear_email_template_cache()
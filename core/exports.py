@@ -0,0 +1,233 @@
+"""Streaming exports of transactions, ROI payouts and investments.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` (a
+server-side cursor on Postgres), so no model instances are built and at most
+one chunk of tuples is held in memory whatever the size of the export. Output
+is produced by generators that the ``export_data`` command writes to a file
+and the admin API wraps in a ``StreamingHttpResponse``.
+
+Formats:
+
+- ``csv``: a header row, then one line per record.
+- ``columnar``: newline-delimited JSON. The first line is the schema
+  (``{"dataset", "columns"}``); every following line is one chunk stored
+  column-wise (``{"rows": n, "data": [[col0...], [col1...], ...]}``), which
+  repeats no keys and loads straight into a dataframe.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ("csv", "columnar")
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "columnar": "application/x-ndjson",
+}
+FILE_EXTENSIONS = {"csv": "csv", "columnar": "ndjson"}
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    name: str
+    queryset: Callable[[], QuerySet]
+    # (header, values_list lookup) pairs, in output order.
+    columns: tuple[tuple[str, str], ...]
+    date_field: str
+    # Maps a ``status`` filter value to a Q; defaults to ``status=<value>``.
+    status_filter: Callable[[str], Q] | None = None
+
+    @property
+    def headers(self) -> list[str]:
+        return [header for header, _ in self.columns]
+
+
+def _transactions():
+    from transactions.models import Transaction
+
+    return Transaction.objects.all()
+
+
+def _payouts():
+    from investments.models import DailyRoiPayout
+
+    return DailyRoiPayout.objects.all()
+
+
+def _investments():
+    from investments.models import UserInvestment
+
+    return UserInvestment.objects.all()
+
+
+def _payout_status(value: str) -> Q:
+    # Payouts have no status column; "credited"/"pending" follow credited_at.
+    if value == "credited":
+        return Q(credited_at__isnull=False)
+    if value == "pending":
+        return Q(credited_at__isnull=True)
+    raise ValueError("Payout status must be 'credited' or 'pending'.")
+
+
+EXPORTS: dict[str, ExportSpec] = {
+    spec.name: spec
+    for spec in (
+        ExportSpec(
+            "transactions",
+            _transactions,
+            (
+                ("id", "id"),
+                ("created_at", "created_at"),
+                ("user_email", "user__email"),
+                ("tx_type", "tx_type"),
+                ("payment_method", "payment_method"),
+                ("amount", "amount"),
+                ("status", "status"),
+                ("reference", "reference"),
+                ("tx_hash", "tx_hash"),
+                ("investment_id", "investment_id"),
+                ("approved_by", "approved_by__email"),
+                ("updated_at", "updated_at"),
+            ),
+            date_field="created_at",
+        ),
+        ExportSpec(
+            "payouts",
+            _payouts,
+            (
+                ("id", "id"),
+                ("payout_date", "payout_date"),
+                ("investment_id", "investment_id"),
+                ("user_email", "investment__user__email"),
+                ("plan", "investment__plan__name"),
+                ("amount", "amount"),
+                ("credited_at", "credited_at"),
+                ("credited_tx", "credited_tx"),
+                ("created_at", "created_at"),
+            ),
+            date_field="payout_date",
+            status_filter=_payout_status,
+        ),
+        ExportSpec(
+            "investments",
+            _investments,
+            (
+                ("id", "id"),
+                ("created_at", "created_at"),
+                ("user_email", "user__email"),
+                ("plan", "plan__name"),
+                ("amount", "amount"),
+                ("status", "status"),
+                ("started_at", "started_at"),
+                ("ends_at", "ends_at"),
+            ),
+            date_field="created_at",
+        ),
+    )
+}
+
+
+def _day_bound(day: date, field_is_date: bool, end: bool):
+    if field_is_date:
+        return day
+    return timezone.make_aware(datetime.combine(day, time.max if end else time.min))
+
+
+def export_queryset(
+    dataset: str,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    status: str | None = None,
+) -> QuerySet:
+    """Filtered, ``values_list`` queryset for ``dataset`` in export order.
+
+    ``date_from``/``date_to`` are inclusive days on the dataset's date field.
+    Raises ``ValueError`` for an unknown dataset or status.
+    """
+    spec = EXPORTS.get(dataset)
+    if spec is None:
+        raise ValueError(f"Unknown export {dataset!r}; choose from {', '.join(EXPORTS)}.")
+    qs = spec.queryset()
+    field_is_date = qs.model._meta.get_field(spec.date_field).get_internal_type() == "DateField"
+    if date_from:
+        qs = qs.filter(**{f"{spec.date_field}__gte": _day_bound(date_from, field_is_date, end=False)})
+    if date_to:
+        qs = qs.filter(**{f"{spec.date_field}__lte": _day_bound(date_to, field_is_date, end=True)})
+    if status:
+        qs = qs.filter(spec.status_filter(status) if spec.status_filter else Q(status=status))
+    return qs.order_by(spec.date_field, "pk").values_list(*(lookup for _, lookup in spec.columns))
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, date):  # includes datetime
+        return value.isoformat()
+    if isinstance(value, Decimal | UUID):
+        return str(value)
+    return value
+
+
+def _chunks(queryset: QuerySet, chunk_size: int) -> Iterator[list[tuple]]:
+    chunk: list[tuple] = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv_stream(spec: ExportSpec, queryset: QuerySet, chunk_size: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(spec.headers)
+    yield buffer.getvalue()
+    for chunk in _chunks(queryset, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_cell(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def _columnar_stream(spec: ExportSpec, queryset: QuerySet, chunk_size: int) -> Iterator[str]:
+    yield json.dumps({"dataset": spec.name, "columns": spec.headers}) + "\n"
+    for chunk in _chunks(queryset, chunk_size):
+        columns = [[None if value is None else _cell(value) for value in column] for column in zip(*chunk)]
+        yield json.dumps({"rows": len(chunk), "data": columns}, separators=(",", ":")) + "\n"
+
+
+def stream_export(
+    dataset: str,
+    fmt: str = "csv",
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    status: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Text chunks of ``dataset`` rendered as ``fmt`` (see module docstring).
+
+    Arguments are validated eagerly; the query only runs as the iterator is
+    consumed.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; choose from {', '.join(FORMATS)}.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive.")
+    queryset = export_queryset(dataset, date_from=date_from, date_to=date_to, status=status)
+    render = _csv_stream if fmt == "csv" else _columnar_stream
+    return render(EXPORTS[dataset], queryset, chunk_size)
@@ -0,0 +1,138 @@
+"""``Idempotency-Key`` support for endpoints that move money or send email.
+
+A client that sends ``Idempotency-Key: <unique value>`` may retry the same
+request safely: the first request claims the key, and once it finishes its
+status and body are stored in ``IdempotencyKey``. Retries within
+``IDEMPOTENCY_KEY_TTL_HOURS`` are answered from that row (one lookup on the
+unique index) with an ``Idempotent-Replayed: true`` header, without running
+the view again.
+
+- A retry that arrives while the first request is still running gets 409.
+- Reusing a key with a different method, path or body gets 422.
+- Responses with status < 500 are stored. Exceptions and 5xx responses drop
+  the claim so the client can retry.
+- Claims older than ``IDEMPOTENCY_LOCK_SECONDS`` that never finished (the
+  worker died) are taken over.
+
+Expired rows are removed by ``prune_retention``.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(request) -> str:
+    data = request.data
+    if hasattr(data, "lists"):
+        data = {name: values for name, values in data.lists()}
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method}\n{request.path}\n{body}".encode()).hexdigest()
+
+
+def _owner(request) -> str:
+    user = getattr(request, "user", None)
+    return str(user.pk) if user is not None and user.is_authenticated else ""
+
+
+def _in_progress() -> Response:
+    return Response(
+        {"detail": f"A request with this {HEADER} is still being processed."},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def _replay(record: IdempotencyKey, fingerprint: str, now) -> Response | None:
+    """Response for an existing live claim, or ``None`` if it may be taken over."""
+    if record.expires_at <= now:
+        return None
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"detail": f"This {HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if record.status_code is None:
+        lock_seconds = getattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 60)
+        if record.created_at <= now - timedelta(seconds=lock_seconds):
+            return None
+        return _in_progress()
+    return Response(record.response_body, status=record.status_code, headers={REPLAYED_HEADER: "true"})
+
+
+def _claim(scope: str, owner: str, key: str, fingerprint: str, now) -> IdempotencyKey | Response:
+    lookup = {"scope": scope, "owner": owner, "key": key}
+    record = IdempotencyKey.objects.filter(**lookup).first()
+    if record is not None:
+        replay = _replay(record, fingerprint, now)
+        if replay is not None:
+            return replay
+        # Expired or abandoned: only delete the row we looked at.
+        IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+
+    ttl = timedelta(hours=getattr(settings, "IDEMPOTENCY_KEY_TTL_HOURS", 24))
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                **lookup, fingerprint=fingerprint, created_at=now, expires_at=now + ttl
+            )
+    except IntegrityError:
+        # Lost the race to a concurrent request with the same key.
+        record = IdempotencyKey.objects.filter(**lookup).first()
+        return (record and _replay(record, fingerprint, now)) or _in_progress()
+
+
+def idempotent(scope: str):
+    """Make a DRF view method honour the ``Idempotency-Key`` header.
+
+    ``scope`` names the endpoint; keys are unique per scope and user.
+    Requests without the header run unchanged.
+    """
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            key = (request.headers.get(HEADER) or "").strip()
+            if not key:
+                return view_method(view, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            claim = _claim(scope, _owner(request), key, _fingerprint(request), timezone.now())
+            if isinstance(claim, Response):
+                return claim
+
+            try:
+                response = view_method(view, request, *args, **kwargs)
+            except BaseException:
+                claim.delete()
+                raise
+            if response.status_code >= 500:
+                claim.delete()
+                return response
+            IdempotencyKey.objects.filter(pk=claim.pk).update(
+                status_code=response.status_code,
+                response_body=getattr(response, "data", None),
+            )
+            return response
+
+        return wrapper
+
+    return decorator
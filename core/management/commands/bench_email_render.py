@@ -0,0 +1,119 @@
+"""
+Measure email template renders/sec for the drip campaign and ROI payout emails.
+Usage: python manage.py bench_email_render [--iterations 200]
+
+"render_to_string" is the previous EmailService path (resolve and render the
+.html, then try the .txt, then build the branding context per message);
+"cached" renders through core.email_templates.
+"""
+
+import time
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.email_templates import (
+    clear_email_template_cache,
+    get_email_template,
+    render_email_template,
+)
+from core.management.commands.drip_campaign import EMAILS
+from core.management.commands.drip_campaign import Command as DripCommand
+
+
+def _drip_jobs():
+    user = SimpleNamespace(first_name="Ada", email="ada@example.com")
+    drip = DripCommand()
+    return [(email["template"], drip._build_context(user, email)) for email in EMAILS]
+
+
+def _roi_jobs():
+    user = SimpleNamespace(first_name="Ada", username="ada", email="ada@example.com", get_full_name=lambda: "Ada")
+    investment = SimpleNamespace(id=1, plan=SimpleNamespace(name="Pioneer"), amount=Decimal("500.00"))
+    payouts = [
+        {"plan": "Pioneer", "date": date(2025, 1, day), "amount": Decimal("4.00")} for day in range(1, 8)
+    ]
+    return [
+        (
+            "roi_payout",
+            {
+                "user": user,
+                "amount": Decimal("4.00"),
+                "investment": investment,
+                "payout_date": date(2025, 1, 1),
+                "dashboard_url": "/dashboard/",
+            },
+        ),
+        (
+            "roi_payout_digest",
+            {
+                "user": user,
+                "payouts": payouts,
+                "payout_count": len(payouts),
+                "total_amount": Decimal("28.00"),
+                "start_date": payouts[0]["date"],
+                "end_date": payouts[-1]["date"],
+                "dashboard_url": "/dashboard/",
+            },
+        ),
+    ]
+
+
+def _render_uncached(template_name, context):
+    ctx = dict(context)
+    ctx.setdefault("brand_name", getattr(settings, "BRAND_NAME", "WolvCapital"))
+    ctx.setdefault("support_email", getattr(settings, "SUPPORT_EMAIL", None))
+    ctx.setdefault("current_timestamp", timezone.now())
+    ctx.setdefault("site_url", getattr(settings, "SITE_URL", "https://wolvcapital.com"))
+    ctx.setdefault("current_year", timezone.now().year)
+    ctx.setdefault("brand_config", getattr(settings, "BRAND", {}))
+    ctx.setdefault("BRAND", getattr(settings, "BRAND", {}))
+    render_to_string(f"emails/{template_name}.html", ctx)
+    try:
+        render_to_string(f"emails/{template_name}.txt", ctx)
+    except Exception:
+        pass
+
+
+def _render_cached(template_name, context):
+    render_email_template(get_email_template(f"emails/{template_name}.html"), context)
+    text_template = get_email_template(f"emails/{template_name}.txt")
+    if text_template is not None:
+        render_email_template(text_template, context)
+
+
+class Command(BaseCommand):
+    help = "Benchmark email rendering with and without the compiled-template cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=200, help="Renders of each template per run (default: 200)"
+        )
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        with override_settings(EMAIL_TEMPLATE_CACHE=True):
+            clear_email_template_cache()
+            for label, jobs in (("drip", _drip_jobs()), ("roi", _roi_jobs())):
+                rates = {}
+                for mode, render in (("render_to_string", _render_uncached), ("cached", _render_cached)):
+                    for template_name, context in jobs:  # warm-up: compile and fill loader caches
+                        render(template_name, context)
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        for template_name, context in jobs:
+                            render(template_name, context)
+                    elapsed = time.perf_counter() - started
+                    rates[mode] = iterations * len(jobs) / elapsed if elapsed else 0
+                speedup = rates["cached"] / rates["render_to_string"] if rates["render_to_string"] else 0
+                self.stdout.write(
+                    f"{label:<5} {len(jobs):>2} template(s)  render_to_string {rates['render_to_string']:>9.1f}/s"
+                    f"  cached {rates['cached']:>9.1f}/s  {speedup:.2f}x"
+                )
+        clear_email_template_cache()
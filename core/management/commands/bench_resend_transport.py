@@ -0,0 +1,109 @@
+"""
+Measure Resend backend throughput (messages/sec) against a local fake Resend server.
+Usage: python manage.py bench_resend_transport [--messages 200] [--latency 0.02] [--connect-latency 0.05]
+
+Compares the previous transport (a fresh urllib connection per message) with
+the pooled keep-alive client, both one message per send like EmailService,
+and with a batch of messages passed to a single send_messages() call.
+``--connect-latency`` charges each new connection a handshake delay, since
+plain loopback connections are nearly free; set it to 0 to measure client
+overhead alone.
+"""
+
+import json
+import logging
+import time
+import urllib.request
+
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core.email_backends.fake_resend import FakeResendServer
+from core.email_backends.resend import ResendEmailBackend, close_http_client
+
+
+def _message(index):
+    message = EmailMultiAlternatives(
+        subject=f"Benchmark {index}",
+        body="Plain text body",
+        from_email="WolvCapital <bench@example.com>",
+        to=[f"user{index}@example.com"],
+    )
+    message.attach_alternative("<p>HTML body</p>", "text/html")
+    return message
+
+
+class _UrllibBackend(ResendEmailBackend):
+    """The transport used before the pooled client: one connection per message."""
+
+    _url = ""
+
+    def _send_single(self, message):
+        payload = self._build_payload(message)
+        request = urllib.request.Request(
+            self._url,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            return 200 <= response.status < 300
+
+
+class Command(BaseCommand):
+    help = "Benchmark the Resend email backend transport against a local stub server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200, help="Messages per run (default: 200)")
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="Seconds the stub server waits per request (default: 0)"
+        )
+        parser.add_argument(
+            "--connect-latency",
+            type=float,
+            default=0.05,
+            help="Seconds the stub server waits per new connection, standing in for TCP+TLS setup (default: 0.05)",
+        )
+
+    def handle(self, *args, **options):
+        count = max(1, options["messages"])
+        backend_logger = logging.getLogger("core.email_backends.resend")
+        previous_level = backend_logger.level
+        backend_logger.setLevel(logging.WARNING)
+        server = FakeResendServer(latency=options["latency"], connect_latency=options["connect_latency"])
+        with server, override_settings(RESEND_API_KEY="bench", RESEND_API_BASE_URL=server.url):
+            _UrllibBackend._url = f"{server.url}/emails"
+            close_http_client()
+            try:
+                runs = [
+                    ("urllib, new connection per message", lambda: self._one_by_one(_UrllibBackend, count)),
+                    ("pooled client, one message per send", lambda: self._one_by_one(ResendEmailBackend, count)),
+                    (
+                        "pooled client, one send_messages() call",
+                        lambda: ResendEmailBackend().send_messages([_message(i) for i in range(count)]),
+                    ),
+                ]
+                results = []
+                for label, run in runs:
+                    before = server.connections
+                    started = time.perf_counter()
+                    sent = run()
+                    elapsed = time.perf_counter() - started
+                    results.append((label, sent, elapsed, server.connections - before))
+            finally:
+                close_http_client()
+                backend_logger.setLevel(previous_level)
+
+        baseline = results[0][1] / results[0][2] if results[0][2] else 0
+        for label, sent, elapsed, connections in results:
+            rate = sent / elapsed if elapsed else 0
+            speedup = f"{rate / baseline:.1f}x" if baseline else "-"
+            self.stdout.write(
+                f"{label:<42} {sent:>5} sent  {rate:>9.1f} msg/s  {connections:>4} connections  {speedup}"
+            )
+
+    @staticmethod
+    def _one_by_one(backend_class, count):
+        return sum(backend_class().send_messages([_message(i)]) for i in range(count))
@@ -0,0 +1,46 @@
+"""
+Deliver queued emails from the transactional outbox.
+Usage: python manage.py drain_email_outbox [--workers 4] [--loop]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.email_outbox import DEFAULT_MAX_ATTEMPTS, drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Send pending EmailOutbox rows on a bounded thread pool, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Rows claimed per batch (default: 100)")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent senders (default: 4)")
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help=f"Mark a row failed after this many attempts (default: {DEFAULT_MAX_ATTEMPTS})",
+        )
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when drained")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            stats = drain_outbox(
+                batch_size=max(1, options["batch_size"]),
+                max_workers=max(1, options["workers"]),
+                max_attempts=max(1, options["max_attempts"]),
+            )
+            if stats.claimed or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Outbox drained: claimed={stats.claimed} sent={stats.sent} "
+                        f"retried={stats.retried} failed={stats.failed} "
+                        f"in {time.monotonic() - started:.2f}s"
+                    )
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
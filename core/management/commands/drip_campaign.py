@@ -13,9 +13,13 @@ from django.utils import timezone
 from django.conf import settings
 from core.models import DripCampaign
 from core.email_service import EmailService
+from core.email_templates import preload_email_templates
 
 User = get_user_model()
 
+# Campaign emails sent per batch (one Resend batch request at the default limit).
+SEND_BATCH_SIZE = 100
+
 EMAILS = [
     {
         "day": 1,
@@ -170,7 +174,10 @@ class Command(BaseCommand):
             .order_by("enrolled_at")
         )
         self.stdout.write(self.style.SUCCESS(f"📧 Found {campaigns.count()} active campaign(s)"))
+        preload_email_templates(e["template"] for e in EMAILS)
         sent = failed = skipped = 0
+        # (campaign, day, message) waiting for the next batch send
+        pending = []
 
         for campaign in campaigns:
             user = campaign.user
@@ -192,27 +199,43 @@ class Command(BaseCommand):
                 sent += 1
                 continue
 
-            try:
-                context = self._build_context(user, email_data)
-                EmailService._send(
-                    template_name=email_data["template"],
-                    to_emails=user.email,
-                    context=context,
-                    subject=email_data["subject"],
-                )
-                campaign.current_day += 1
-                campaign.last_sent = timezone.now()
-                if campaign.current_day > 10:
-                    campaign.completed = True
-                campaign.save()
-                sent += 1
-                self.stdout.write(self.style.SUCCESS(f"  ✅ Day {day} → {user.email}"))
-            except Exception as e:
-                failed += 1
-                self.stderr.write(self.style.ERROR(f"  ❌ Failed for {user.email}: {e}"))
+            context = self._build_context(user, email_data)
+            message = EmailService.build_message(
+                template_name=email_data["template"],
+                to_emails=user.email,
+                context=context,
+                subject=email_data["subject"],
+            )
+            pending.append((campaign, day, message))
+            if len(pending) >= SEND_BATCH_SIZE:
+                batch_sent, batch_failed = self._send_pending(pending)
+                sent, failed = sent + batch_sent, failed + batch_failed
+                pending = []
+
+        if pending:
+            batch_sent, batch_failed = self._send_pending(pending)
+            sent, failed = sent + batch_sent, failed + batch_failed
 
         self.stdout.write(f"\nDone — Sent: {sent} | Failed: {failed} | Skipped: {skipped}")
 
+    def _send_pending(self, pending):
+        """Send one batch of drip emails and advance the campaigns that were accepted."""
+        results = EmailService.send_batch([message for _, _, message in pending])
+        sent = failed = 0
+        for (campaign, day, _), ok in zip(pending, results):
+            if not ok:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f"  ❌ Failed for {campaign.user.email}"))
+                continue
+            campaign.current_day += 1
+            campaign.last_sent = timezone.now()
+            if campaign.current_day > 10:
+                campaign.completed = True
+            campaign.save()
+            sent += 1
+            self.stdout.write(self.style.SUCCESS(f"  ✅ Day {day} → {campaign.user.email}"))
+        return sent, failed
+
     def send_single_user(self, email: str, dry_run: bool = False):
         user = User.objects.filter(email=email).first()
         if not user:
@@ -0,0 +1,61 @@
+"""
+Stream transactions, ROI payouts or investments to CSV or columnar NDJSON.
+Usage: python manage.py export_data transactions [--format csv] [--from 2025-01-01] [--to 2025-01-31]
+       [--status approved] [--output transactions.csv]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.exports import DEFAULT_CHUNK_SIZE, EXPORTS, FORMATS, stream_export
+
+
+def _day(value, name):
+    if value is None:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise CommandError(f"--{name} must be a date (YYYY-MM-DD)")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Export transactions, payouts or investments without loading model instances"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(EXPORTS))
+        parser.add_argument("--format", dest="fmt", choices=FORMATS, default="csv", help="Output format (default: csv)")
+        parser.add_argument("--from", dest="date_from", help="First day to include (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="date_to", help="Last day to include (YYYY-MM-DD)")
+        parser.add_argument("--status", help="Only rows with this status (payouts: credited or pending)")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Rows fetched per cursor round trip (default: {DEFAULT_CHUNK_SIZE})",
+        )
+        parser.add_argument("--output", "-o", help="Write to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        try:
+            chunks = stream_export(
+                options["dataset"],
+                options["fmt"],
+                date_from=_day(options["date_from"], "from"),
+                date_to=_day(options["date_to"], "to"),
+                status=options["status"],
+                chunk_size=max(1, options["chunk_size"]),
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        path = options["output"]
+        if not path:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['dataset']} to {path}"))
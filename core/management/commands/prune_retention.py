@@ -0,0 +1,74 @@
+"""
+Delete expired notifications, old resolved admin notifications, old chat
+messages and expired idempotency keys in small throttled batches.
+Usage: python manage.py prune_retention [--time-budget 300] [--only user_notifications] [--dry-run]
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.retention import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_SLEEP_SECONDS,
+    DEFAULT_TIME_BUDGET_SECONDS,
+    POLICIES,
+    run_retention,
+)
+
+
+class Command(BaseCommand):
+    help = "Apply data retention policies in bounded batches within a time budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows deleted per batch (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=DEFAULT_SLEEP_SECONDS,
+            help=f"Seconds to pause between batches (default: {DEFAULT_SLEEP_SECONDS})",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=DEFAULT_TIME_BUDGET_SECONDS,
+            help=f"Stop after this many seconds; 0 means no limit (default: {DEFAULT_TIME_BUDGET_SECONDS})",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=sorted(POLICIES),
+            help="Run only this policy (repeatable)",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Count candidates without deleting")
+        parser.add_argument("--json", action="store_true", help="Print the run report as JSON")
+
+    def handle(self, *args, **options):
+        report = run_retention(
+            policies=options["only"],
+            batch_size=max(1, options["batch_size"]),
+            sleep_seconds=max(0.0, options["sleep"]),
+            time_budget=options["time_budget"] or None,
+            dry_run=options["dry_run"],
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(report.as_dict()))
+            return
+
+        verb = "Would delete" if report.dry_run else "Deleted"
+        for name, policy in report.policies.items():
+            state = "done" if policy.complete else "incomplete"
+            self.stdout.write(
+                f"  {name}: {verb.lower()} {policy.deleted} rows in {policy.batches} batches "
+                f"({policy.elapsed_seconds:.2f}s, {state})"
+            )
+        summary = f"{verb} {report.deleted} rows in {report.elapsed_seconds:.2f}s"
+        if report.budget_exhausted:
+            self.stdout.write(self.style.WARNING(f"{summary}; time budget exhausted, remaining rows left for next run"))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -3,6 +3,8 @@ from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.template.loader import render_to_string
 
+from core.email_service import EmailService
+
 class Command(BaseCommand):
     help = "Send WolvCapital Virtual Card email to investors"
 
@@ -16,13 +18,14 @@ class Command(BaseCommand):
         # Path to your HTML template in Django templates folder
         html_template = "virtual_card_announcement.html"
 
-        for email in recipients:
-            # Render template
-            html_content = render_to_string(html_template, {})
+        # Render template once; every recipient gets the same content
+        html_content = render_to_string(html_template, {})
 
-            # Email subject
-            subject = "Introducing Your WolvCapital Virtual Card"
+        # Email subject
+        subject = "Introducing Your WolvCapital Virtual Card"
 
+        messages = []
+        for email in recipients:
             # Build email message
             msg = EmailMultiAlternatives(
                 subject=subject,
@@ -31,7 +34,11 @@ class Command(BaseCommand):
                 to=[email]
             )
             msg.attach_alternative(html_content, "text/html")
+            messages.append(msg)
 
-            # Send email
-            msg.send()
-            self.stdout.write(self.style.SUCCESS(f"Email sent to {email}"))
+        # Send emails (batched when the backend supports it)
+        for email, sent in zip(recipients, EmailService.send_batch(messages)):
+            if sent:
+                self.stdout.write(self.style.SUCCESS(f"Email sent to {email}"))
+            else:
+                self.stderr.write(self.style.ERROR(f"Email failed for {email}"))
@@ -1,10 +1,15 @@
 from django.core.management.base import BaseCommand
 
+from core.bulk_email import stop_on_signals
 from core.services.wolv_token_announcement import (
+    get_wolv_token_recipient_count,
+    get_wolv_token_recipient_queryset,
     get_wolv_token_recipients,
     send_wolv_token_announcement,
 )
 
+RUN_NAME = "wolv_token_announcement"
+
 
 class Command(BaseCommand):
     help = "Send the WOLV Token announcement email to eligible investors"
@@ -20,14 +25,24 @@ class Command(BaseCommand):
             action="store_true",
             help="Show recipient list without sending messages",
         )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Send to everyone again instead of resuming the previous run",
+        )
 
     def handle(self, *args, **options):
         test_email = options.get("test")
         dry_run = options.get("dry_run")
 
-        recipients = get_wolv_token_recipients(test_email)
+        if test_email or dry_run:
+            recipients = get_wolv_token_recipients(test_email)
+            total = len(recipients)
+        else:
+            recipients = None
+            total = get_wolv_token_recipient_count()
 
-        self.stdout.write(f"📧 Found {len(recipients)} recipient(s)")
+        self.stdout.write(f"📧 Found {total} recipient(s)")
 
         if dry_run:
             self.stdout.write(self.style.WARNING("DRY RUN — no emails sent:"))
@@ -35,9 +50,22 @@ class Command(BaseCommand):
                 self.stdout.write(f"  → {recipient['email']}")
             return
 
-        result = send_wolv_token_announcement(recipients)
+        # Full sends walk the queryset by id under a named run, so an
+        # interrupted send (Ctrl-C / SIGTERM) resumes where it stopped.
+        with stop_on_signals() as stop:
+            if recipients is not None:
+                result = send_wolv_token_announcement(recipients)
+            else:
+                result = send_wolv_token_announcement(
+                    get_wolv_token_recipient_queryset(),
+                    run_name=RUN_NAME,
+                    restart=options.get("restart"),
+                    stop=stop,
+                )
 
         self.stdout.write("")
+        if stop.is_set():
+            self.stdout.write(self.style.WARNING("Stopped early; run the command again to resume."))
         self.stdout.write(
             self.style.SUCCESS(f"✅ Done! Sent: {result['sent']} | Failed: {result['failed']}")
         )
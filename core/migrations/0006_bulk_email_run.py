@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkEmailRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Campaign key; reuse it to resume', max_length=150, unique=True)),
+                ('cursor', models.CharField(blank=True, help_text='Key of the last recipient handled', max_length=255)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('paused', 'Paused'), ('completed', 'Completed')], default='running', max_length=20)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Bulk Email Run',
+                'verbose_name_plural': 'Bulk Email Runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
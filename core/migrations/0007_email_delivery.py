@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_bulk_email_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template', models.CharField(blank=True, help_text='Email template name, if any', max_length=100)),
+                ('recipient_hash', models.CharField(db_index=True, max_length=64)),
+                ('provider_id', models.CharField(blank=True, help_text='Message id returned by the provider', max_length=100)),
+                ('latency_ms', models.PositiveIntegerField(help_text='Time spent in the provider call')),
+                ('status', models.CharField(choices=[('sent', 'Sent'), ('failed', 'Failed')], max_length=10)),
+                ('error_class', models.CharField(blank=True, help_text='Exception class or HTTP status on failure', max_length=100)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Email Delivery',
+                'verbose_name_plural': 'Email Deliveries',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['template', 'created_at'], name='email_delivery_tpl_idx'), models.Index(fields=['status', 'created_at'], name='email_delivery_status_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
@@ -369,3 +370,145 @@ class CampaignAnnouncement(models.Model):
         if not self.is_published or self.publish_at > now:
             return False
         return not self.expires_at or self.expires_at >= now
+
+
+class EmailOutbox(models.Model):
+    """Transactional outbox for emails queued inside business transactions.
+
+    Rows are written in the same DB transaction as the event that triggers the
+    email and delivered later by ``drain_email_outbox``, so provider latency
+    never holds row locks or connections in the caller.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50, help_text="Registered outbox handler name")
+    payload = models.JSONField(default=dict, blank=True)
+    to_email = models.EmailField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the row may be (re)claimed by a drain worker",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+            models.Index(fields=["kind"]),
+        ]
+        verbose_name = "Email Outbox Entry"
+        verbose_name_plural = "Email Outbox"
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.kind} -> {self.to_email or '?'} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request sent with an ``Idempotency-Key`` header.
+
+    One row per (scope, owner, key). ``status_code`` is null while the first
+    request is still running; once it finishes the response is stored so
+    retries can be replayed until ``expires_at`` (see ``core.idempotency``).
+    """
+
+    scope = models.CharField(max_length=100, help_text="Endpoint the key belongs to")
+    owner = models.CharField(max_length=64, blank=True, help_text="User id; empty for anonymous endpoints")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of method, path and body")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "owner", "key"], name="uniq_idempotency_key"),
+        ]
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.scope}:{self.key} ({self.status_code or 'in progress'})"
+
+
+class BulkEmailRun(models.Model):
+    """Progress of a named bulk email campaign sent by ``core.bulk_email``.
+
+    ``cursor`` is the key of the last recipient handled, so a stopped or
+    crashed run resumes after it instead of starting over.
+    """
+
+    STATUS_RUNNING = "running"
+    STATUS_PAUSED = "paused"
+    STATUS_COMPLETED = "completed"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_PAUSED, "Paused"),
+        (STATUS_COMPLETED, "Completed"),
+    ]
+
+    name = models.CharField(max_length=150, unique=True, help_text="Campaign key; reuse it to resume")
+    cursor = models.CharField(max_length=255, blank=True, help_text="Key of the last recipient handled")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        verbose_name = "Bulk Email Run"
+        verbose_name_plural = "Bulk Email Runs"
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.name} ({self.status}, {self.sent} sent)"
+
+
+class EmailDelivery(models.Model):
+    """One provider send attempt, written in batches by ``core.email_delivery``.
+
+    Recipients are stored as a SHA-256 of the normalised address, so the log
+    can be kept and aggregated without holding email addresses.
+    """
+
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    template = models.CharField(max_length=100, blank=True, help_text="Email template name, if any")
+    recipient_hash = models.CharField(max_length=64, db_index=True)
+    provider_id = models.CharField(max_length=100, blank=True, help_text="Message id returned by the provider")
+    latency_ms = models.PositiveIntegerField(help_text="Time spent in the provider call")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error_class = models.CharField(max_length=100, blank=True, help_text="Exception class or HTTP status on failure")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["template", "created_at"], name="email_delivery_tpl_idx"),
+            models.Index(fields=["status", "created_at"], name="email_delivery_status_idx"),
+        ]
+        verbose_name = "Email Delivery"
+        verbose_name_plural = "Email Deliveries"
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.template or 'email'} {self.status} ({self.latency_ms}ms)"
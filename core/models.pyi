@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import Any
 
 from django.contrib.auth.models import User
 from django.db import models
@@ -94,3 +95,53 @@ class EmailTemplate(models.Model):
     is_active: bool
     created_at: datetime
     updated_at: datetime
+
+
+class EmailOutbox(models.Model):
+    id: int
+    kind: str
+    payload: dict
+    to_email: str
+    status: str
+    attempts: int
+    last_error: str
+    available_at: datetime
+    created_at: datetime
+    sent_at: datetime | None
+
+
+class IdempotencyKey(models.Model):
+    id: int
+    scope: str
+    owner: str
+    key: str
+    fingerprint: str
+    status_code: int | None
+    response_body: Any
+    created_at: datetime
+    expires_at: datetime
+
+
+class BulkEmailRun(models.Model):
+    id: int
+    name: str
+    cursor: str
+    status: str
+    sent: int
+    failed: int
+    started_at: datetime
+    updated_at: datetime
+    completed_at: datetime | None
+
+
+class EmailDelivery(models.Model):
+    STATUS_SENT: str
+    STATUS_FAILED: str
+    id: int
+    template: str
+    recipient_hash: str
+    provider_id: str
+    latency_ms: int
+    status: str
+    error_class: str
+    created_at: datetime
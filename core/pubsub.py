@@ -0,0 +1,185 @@
+"""In-process pub/sub used to push events to streaming (SSE) connections.
+
+Subscribers live on an asyncio event loop (one ``asyncio.Queue`` each);
+publishers may be any thread. The backend is chosen with
+``settings.PUBSUB_BACKEND``:
+
+- ``core.pubsub.InMemoryBroker`` (default) fans out inside this process only,
+  which is enough for a single ASGI worker.
+- ``core.pubsub.PostgresBroker`` publishes with ``pg_notify`` and runs one
+  ``LISTEN`` thread per process, so events reach subscribers on every worker.
+  NOTIFY is transactional: events published inside an atomic block are only
+  delivered if it commits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import select
+import threading
+from typing import Any
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One subscriber's bounded queue; the oldest event is dropped on overflow."""
+
+    def __init__(self, broker: InMemoryBroker, channel: str, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, message: dict[str, Any]) -> None:
+        # Runs on the subscriber's loop.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float | None = None) -> dict[str, Any] | None:
+        """Next message, or ``None`` if ``timeout`` elapses first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, channel: str) -> Subscription:
+        """Subscribe from inside a running event loop."""
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel: str, message: dict[str, Any]) -> int:
+        return self._deliver(channel, message)
+
+    def _deliver(self, channel: str, message: dict[str, Any]) -> int:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # Loop already closed; the stream is gone.
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+
+class PostgresBroker(InMemoryBroker):
+    """Cross-process fan-out over Postgres ``LISTEN/NOTIFY``."""
+
+    PG_CHANNEL = "wolv_pubsub"
+    # NOTIFY payloads are capped at 8000 bytes by default.
+    MAX_PAYLOAD = 7900
+
+    def __init__(self):
+        super().__init__()
+        self._listener: threading.Thread | None = None
+
+    def subscribe(self, channel: str) -> Subscription:
+        self._ensure_listener()
+        return super().subscribe(channel)
+
+    def publish(self, channel: str, message: dict[str, Any]) -> int:
+        from django.db import connection
+
+        payload = json.dumps({"channel": channel, "message": message}, default=str)
+        if len(payload.encode()) > self.MAX_PAYLOAD:
+            trimmed = {key: value for key, value in message.items() if key != "message"}
+            payload = json.dumps({"channel": channel, "message": trimmed}, default=str)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.PG_CHANNEL, payload])
+        return 0
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="pubsub-listen", daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        import time
+
+        import psycopg2
+        from django.db import connections
+
+        params = connections["default"].get_connection_params()
+        while True:
+            try:
+                conn = psycopg2.connect(**params)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.PG_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            event = json.loads(notify.payload)
+                            self._deliver(event["channel"], event["message"])
+                        except (ValueError, KeyError):
+                            logger.warning("Ignoring malformed pubsub payload")
+            except Exception:
+                logger.exception("Pubsub LISTEN connection failed; reconnecting")
+                time.sleep(2)
+
+
+_broker: InMemoryBroker | None = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> InMemoryBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, "PUBSUB_BACKEND", "core.pubsub.InMemoryBroker")
+                _broker = import_string(backend)()
+    return _broker
+
+
+def publish(channel: str, message: dict[str, Any]) -> int:
+    """Publish ``message`` to ``channel``; returns local deliveries (0 on Postgres)."""
+    try:
+        return get_broker().publish(channel, message)
+    except Exception:
+        # Streaming is best-effort; clients fall back to polling the feed.
+        logger.exception("Failed to publish to %s", channel)
+        return 0
+
+
+def subscribe(channel: str) -> Subscription:
+    return get_broker().subscribe(channel)
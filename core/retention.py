@@ -0,0 +1,217 @@
+"""Bounded, throttled data retention.
+
+Each policy names a queryset of rows that are safe to delete. ``run_retention``
+removes them in primary-key batches (one short DELETE per batch, each in its
+own transaction), sleeps between batches so replication and request traffic
+keep up, and stops once the time budget is spent. Whatever is left is picked
+up by the next run, so the job can be scheduled hourly.
+
+The budget is shared out in rounds: each unfinished policy may use an equal
+slice of the time left, and time a policy does not need passes to the ones
+after it. A large backlog in one table therefore cannot starve the others.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SLEEP_SECONDS = 0.1
+DEFAULT_TIME_BUDGET_SECONDS = 300
+
+
+@dataclass
+class RetentionPolicy:
+    name: str
+    candidates: Callable[[], QuerySet]
+    # Called with the deleted rows' ``(pk, owner)`` pairs, inside the batch transaction.
+    after_delete: Callable[[list[tuple]], None] | None = None
+    owner_field: str | None = None
+
+
+@dataclass
+class PolicyReport:
+    deleted: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+    complete: bool = False
+
+
+@dataclass
+class RetentionReport:
+    policies: dict[str, PolicyReport] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    budget_exhausted: bool = False
+    dry_run: bool = False
+
+    @property
+    def deleted(self) -> int:
+        return sum(report.deleted for report in self.policies.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "deleted": self.deleted,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "budget_exhausted": self.budget_exhausted,
+            "dry_run": self.dry_run,
+            "policies": {
+                name: {
+                    "deleted": report.deleted,
+                    "batches": report.batches,
+                    "elapsed_seconds": round(report.elapsed_seconds, 3),
+                    "complete": report.complete,
+                }
+                for name, report in self.policies.items()
+            },
+        }
+
+
+def _expired_user_notifications():
+    from users.models import UserNotification
+
+    return UserNotification.objects.filter(expires_at__lt=timezone.now())
+
+
+def _user_notifications_deleted(rows):
+    from users.notification_service import invalidate_notification_caches
+
+    invalidate_notification_caches(user_id for _, user_id in rows)
+
+
+def _resolved_admin_notifications():
+    from transactions.models import AdminNotification
+
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "RETENTION_ADMIN_NOTIFICATION_DAYS", 90))
+    return AdminNotification.objects.filter(is_resolved=True).filter(
+        Q(resolved_at__lt=cutoff) | Q(resolved_at__isnull=True, created_at__lt=cutoff)
+    )
+
+
+def _expired_idempotency_keys():
+    from core.models import IdempotencyKey
+
+    return IdempotencyKey.objects.filter(expires_at__lt=timezone.now())
+
+
+def _old_email_deliveries():
+    from core.models import EmailDelivery
+
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "RETENTION_EMAIL_DELIVERY_DAYS", 30))
+    return EmailDelivery.objects.filter(created_at__lt=cutoff)
+
+
+def _old_chat_messages():
+    from chat.models import ChatMessage, ChatSession
+
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "RETENTION_CHAT_MESSAGE_DAYS", 180))
+    # Never prune a conversation that is still open.
+    open_sessions = ChatSession.objects.exclude(status="closed").values("session_id")
+    return ChatMessage.objects.filter(created_at__lt=cutoff).exclude(session_id__in=open_sessions)
+
+
+POLICIES: dict[str, RetentionPolicy] = {
+    policy.name: policy
+    for policy in (
+        RetentionPolicy(
+            "user_notifications",
+            _expired_user_notifications,
+            after_delete=_user_notifications_deleted,
+            owner_field="user_id",
+        ),
+        RetentionPolicy("admin_notifications", _resolved_admin_notifications),
+        RetentionPolicy("chat_messages", _old_chat_messages),
+        RetentionPolicy("idempotency_keys", _expired_idempotency_keys),
+        RetentionPolicy("email_deliveries", _old_email_deliveries),
+    )
+}
+
+
+def _delete_batch(policy: RetentionPolicy, batch_size: int) -> int:
+    fields = ["pk", policy.owner_field] if policy.owner_field else ["pk"]
+    with transaction.atomic():
+        rows = list(policy.candidates().values_list(*fields)[:batch_size])
+        if not rows:
+            return 0
+        model = policy.candidates().model
+        model.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        if policy.after_delete:
+            policy.after_delete(rows)
+    return len(rows)
+
+
+def _run_policy(
+    policy: RetentionPolicy,
+    policy_report: PolicyReport,
+    batch_size: int,
+    sleep_seconds: float,
+    deadline: float | None,
+) -> None:
+    """Delete batches until ``policy`` has no candidates left or ``deadline`` passes."""
+    started = time.monotonic()
+    while deadline is None or time.monotonic() < deadline:
+        deleted = _delete_batch(policy, batch_size)
+        if deleted:
+            policy_report.deleted += deleted
+            policy_report.batches += 1
+        if deleted < batch_size:
+            policy_report.complete = True
+            break
+        if sleep_seconds:
+            pause = sleep_seconds if deadline is None else min(sleep_seconds, deadline - time.monotonic())
+            if pause > 0:
+                time.sleep(pause)
+    policy_report.elapsed_seconds += time.monotonic() - started
+
+
+def run_retention(
+    *,
+    policies: list[str] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    sleep_seconds: float = DEFAULT_SLEEP_SECONDS,
+    time_budget: float | None = DEFAULT_TIME_BUDGET_SECONDS,
+    dry_run: bool = False,
+) -> RetentionReport:
+    """Apply retention policies (all by default) until done or out of time.
+
+    ``dry_run`` only counts candidates. ``time_budget=None`` runs every
+    policy to completion, one after another.
+    """
+    report = RetentionReport(dry_run=dry_run)
+    started = time.monotonic()
+    deadline = None if time_budget is None else started + time_budget
+    names = policies or list(POLICIES)
+    for name in names:
+        report.policies[name] = PolicyReport()
+
+    if dry_run:
+        for name in names:
+            policy_started = time.monotonic()
+            report.policies[name].deleted = POLICIES[name].candidates().count()
+            report.policies[name].complete = True
+            report.policies[name].elapsed_seconds = time.monotonic() - policy_started
+    else:
+        pending = list(names)
+        while pending and (deadline is None or time.monotonic() < deadline):
+            for index, name in enumerate(pending):
+                share_deadline = None
+                if deadline is not None:
+                    now = time.monotonic()
+                    share_deadline = now + (deadline - now) / (len(pending) - index)
+                _run_policy(POLICIES[name], report.policies[name], batch_size, sleep_seconds, share_deadline)
+            pending = [name for name in pending if not report.policies[name].complete]
+        report.budget_exhausted = bool(pending)
+
+    report.elapsed_seconds = time.monotonic() - started
+    logger.info("Retention run finished: %s", report.as_dict())
+    return report
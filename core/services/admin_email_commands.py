@@ -10,6 +10,7 @@ from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
 
+from core.bulk_email import send_bulk, sequence_source
 from core.services.email_service import EmailService
 from core.services.wolv_token_announcement import (
     get_wolv_token_recipient_count,
@@ -115,14 +116,9 @@ def send_account_ready_email(
 
 def send_virtual_card_email(recipients: list[str]) -> dict[str, int]:
     subject = "Introducing Your WolvCapital Virtual Card"
-    sent = 0
-    failed = 0
+    html_content = render_to_string("emails/virtual_card_announcement.html", {})
 
-    for email in recipients:
-        if not email:
-            continue
-
-        html_content = render_to_string("emails/virtual_card_announcement.html", {})
+    def build(email: str) -> EmailMultiAlternatives:
         message = EmailMultiAlternatives(
             subject=subject,
             body="This is an HTML email. Please enable HTML view.",
@@ -130,41 +126,22 @@ def send_virtual_card_email(recipients: list[str]) -> dict[str, int]:
             to=[email],
         )
         message.attach_alternative(html_content, "text/html")
+        return message
 
-        try:
-            result = message.send(fail_silently=False)
-            if result:
-                sent += 1
-            else:
-                failed += 1
-        except Exception:
-            failed += 1
-
-    return {"sent": sent, "failed": failed}
+    stats = send_bulk(sequence_source([email for email in recipients if email]), build)
+    return {"sent": stats.sent, "failed": stats.failed}
 
 
 def send_manual_email(
     subject: str, message_body: str, recipients: list[str], from_email: str | None = None
 ) -> dict[str, int]:
-    sent = 0
-    failed = 0
     from_address = from_email or settings.DEFAULT_FROM_EMAIL
 
-    for email in recipients:
-        if not email:
-            continue
-
-        message = EmailMultiAlternatives(subject, message_body, from_address, [email])
-        try:
-            result = message.send(fail_silently=False)
-            if result:
-                sent += 1
-            else:
-                failed += 1
-        except Exception:
-            failed += 1
-
-    return {"sent": sent, "failed": failed}
+    def build(email: str) -> EmailMultiAlternatives:
+        return EmailMultiAlternatives(subject, message_body, from_address, [email])
+
+    stats = send_bulk(sequence_source([email for email in recipients if email]), build)
+    return {"sent": stats.sent, "failed": stats.failed}
 
 
 def send_test_email(to_email: str, email_type: str = "test") -> bool:
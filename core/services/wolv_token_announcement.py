@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import threading
+
 from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
 
+from core.bulk_email import queryset_source, send_bulk, sequence_source
 from core.email_service import EmailService
 
 User = get_user_model()
@@ -12,11 +16,8 @@ WOLV_TOKEN_URL = "https://wolvcapital.com/wolv-token"
 CONTRACT_ADDRESS = "0xe0167279aef7bf4ad313d261da82e8366822270c"
 
 
-def get_wolv_token_recipients(test_email: str | None = None) -> list[dict[str, str]]:
-    if test_email:
-        return [{"email": test_email, "first_name": "Test"}]
-
-    return list(
+def get_wolv_token_recipient_queryset():
+    return (
         User.objects.filter(
             is_active=True,
             is_staff=False,
@@ -24,48 +25,57 @@ def get_wolv_token_recipients(test_email: str | None = None) -> list[dict[str, s
         )
         .exclude(email__isnull=True)
         .exclude(email__exact="")
-        .values("email", "first_name")
+        .order_by("id")
+        .values("id", "email", "first_name")
     )
 
 
+def get_wolv_token_recipients(test_email: str | None = None) -> list[dict[str, str]]:
+    if test_email:
+        return [{"email": test_email, "first_name": "Test"}]
+
+    return list(get_wolv_token_recipient_queryset())
+
+
 def get_wolv_token_recipient_count() -> int:
-    return (
-        User.objects.filter(
-            is_active=True,
-            is_staff=False,
-            is_superuser=False,
-        )
-        .exclude(email__isnull=True)
-        .exclude(email__exact="")
-        .count()
+    return get_wolv_token_recipient_queryset().count()
+
+
+def build_wolv_token_message(recipient: dict[str, str]):
+    email = recipient.get("email")
+    if not email:
+        return None
+
+    first_name = recipient.get("first_name") or "Valued Investor"
+    context = {
+        "first_name": first_name,
+        "dashboard_url": DASHBOARD_URL,
+        "wolv_token_url": WOLV_TOKEN_URL,
+        "contract_address": CONTRACT_ADDRESS,
+    }
+    return EmailService.build_message(
+        "wolv_token_announcement",
+        email,
+        context=context,
+        subject=SUBJECT,
     )
 
 
-def send_wolv_token_announcement(recipients: list[dict[str, str]]) -> dict[str, int]:
-    sent = 0
-    failed = 0
-
-    for recipient in recipients:
-        email = recipient.get("email")
-        if not email:
-            continue
-
-        first_name = recipient.get("first_name") or "Valued Investor"
-        context = {
-            "first_name": first_name,
-            "dashboard_url": DASHBOARD_URL,
-            "wolv_token_url": WOLV_TOKEN_URL,
-            "contract_address": CONTRACT_ADDRESS,
-        }
-
-        if EmailService.send_template(
-            "wolv_token_announcement",
-            email,
-            context=context,
-            subject=SUBJECT,
-        ):
-            sent += 1
-        else:
-            failed += 1
-
-    return {"sent": sent, "failed": failed}
+def send_wolv_token_announcement(
+    recipients: list[dict[str, str]] | QuerySet,
+    *,
+    run_name: str | None = None,
+    restart: bool = False,
+    stop: threading.Event | None = None,
+) -> dict[str, int]:
+    """Send the announcement through the rate-limited bulk sender.
+
+    A queryset (see ``get_wolv_token_recipient_queryset``) is walked by id, so
+    a named run (``run_name``) can be stopped and resumed without resending.
+    """
+    if isinstance(recipients, QuerySet):
+        source = queryset_source(recipients, key="id")
+    else:
+        source = sequence_source([recipient for recipient in recipients if recipient.get("email")])
+    stats = send_bulk(source, build_wolv_token_message, name=run_name, restart=restart, stop=stop)
+    return {"sent": stats.sent, "failed": stats.failed}
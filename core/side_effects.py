@@ -0,0 +1,182 @@
+"""Post-commit side-effect dispatcher.
+
+Service functions that hold row locks (wallet ``select_for_update``) should
+not make network calls before they commit. ``run_after_commit`` registers the
+call with ``transaction.on_commit`` and, once the transaction commits, hands
+it to an in-process queue drained by a small pool of daemon threads. If the
+transaction rolls back the side effect never runs.
+
+With ``SIDE_EFFECTS_SYNC`` enabled (the default under tests) the callable
+runs inline at commit time instead, so ``captureOnCommitCallbacks(execute=True)``
+is enough to observe its effects.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 1000
+LATENCY_SAMPLES = 1000
+
+
+@dataclass
+class _Job:
+    name: str
+    func: Callable[..., Any]
+    args: tuple
+    kwargs: dict[str, Any]
+    enqueued_at: float
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class SideEffectDispatcher:
+    """Bounded queue + worker threads, started lazily on first submit.
+
+    When the queue is full the job runs on the calling thread rather than
+    being dropped; ``stats()`` counts those as ``inline``.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_QUEUE_SIZE):
+        self.max_workers = max(1, max_workers)
+        self._queue: queue.Queue[_Job] = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._workers: list[threading.Thread] = []
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "inline": 0}
+
+    def submit(self, name: str, func: Callable[..., Any], *args, **kwargs) -> None:
+        job = _Job(name, func, args, kwargs, time.monotonic())
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            logger.warning("Side-effect queue full; running %s inline", name)
+            self._count("inline")
+            self._run(job)
+            return
+        self._count("submitted")
+
+    def run_inline(self, name: str, func: Callable[..., Any], *args, **kwargs) -> None:
+        self._count("inline")
+        self._run(_Job(name, func, args, kwargs, time.monotonic()))
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Block until the queue is empty; ``False`` if ``timeout`` elapsed first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            samples = list(self._latencies)
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "queue_depth": self._queue.qsize(),
+            "workers": len(self._workers),
+            "drain_latency_ms": {
+                "p50": round(_percentile(samples, 50) * 1000, 2),
+                "p95": round(_percentile(samples, 95) * 1000, 2),
+                "max": round(max(samples, default=0.0) * 1000, 2),
+            },
+        }
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] += 1
+
+    def _ensure_workers(self) -> None:
+        if len(self._workers) >= self.max_workers:
+            return
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._work,
+                    name=f"side-effects-{len(self._workers)}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                # Worker threads own their DB connections; don't leak them.
+                connections.close_all()
+                self._queue.task_done()
+
+    def _run(self, job: _Job) -> None:
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception:
+            logger.exception("Side effect %s failed", job.name)
+            self._count("failed")
+        else:
+            self._count("completed")
+        finally:
+            with self._lock:
+                self._latencies.append(time.monotonic() - job.enqueued_at)
+
+
+_dispatcher: SideEffectDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> SideEffectDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = SideEffectDispatcher(
+                    max_workers=getattr(settings, "SIDE_EFFECT_WORKERS", DEFAULT_WORKERS),
+                    max_queue=getattr(settings, "SIDE_EFFECT_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+                )
+    return _dispatcher
+
+
+def dispatch(func: Callable[..., Any], *args, name: str | None = None, **kwargs) -> None:
+    """Run ``func`` now: inline in sync mode, otherwise on the worker pool."""
+    label: str = name or str(getattr(func, "__qualname__", None) or repr(func))
+    dispatcher = get_dispatcher()
+    if getattr(settings, "SIDE_EFFECTS_SYNC", False):
+        dispatcher.run_inline(label, func, *args, **kwargs)
+    else:
+        dispatcher.submit(label, func, *args, **kwargs)
+
+
+def run_after_commit(func: Callable[..., Any], *args, name: str | None = None, **kwargs) -> None:
+    """Dispatch ``func(*args, **kwargs)`` once the current transaction commits.
+
+    Outside an atomic block Django runs on_commit callbacks immediately.
+    """
+    transaction.on_commit(lambda: dispatch(func, *args, name=name, **kwargs))
+
+
+def side_effect_stats() -> dict[str, Any]:
+    return get_dispatcher().stats()
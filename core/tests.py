@@ -1,9 +1,12 @@
 import hashlib
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.test import Client, TestCase
+from django.core.mail import EmailMultiAlternatives
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
@@ -12,7 +15,8 @@ from investments.services import approve_investment, create_investment
 from transactions.models import Transaction
 from transactions.services import approve_transaction, create_transaction
 
-from .models import Agreement
+from .email_outbox import drain_outbox, enqueue_email, register_outbox_handler
+from .models import Agreement, EmailOutbox
 
 
 User = get_user_model()
@@ -423,3 +427,851 @@ class HealthAndLoggingTests(TestCase):
         self.assertIn("X-Request-ID", resp.headers)
         self.assertTrue(len(resp.headers["X-Request-ID"]) > 10)
 
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.delivered = []
+        # Restore the module-level handler registry once the test is done.
+        handlers = patch.dict("core.email_outbox._HANDLERS")
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+        @register_outbox_handler("test_kind")
+        def _handler(payload):
+            if payload.get("fail"):
+                raise RuntimeError("smtp down")
+            self.delivered.append(payload["n"])
+            return True
+
+    def test_drain_sends_pending_rows_and_marks_them_sent(self):
+        for n in range(5):
+            enqueue_email("test_kind", {"n": n}, "user@example.com")
+
+        stats = drain_outbox(batch_size=2, max_workers=1)
+
+        self.assertEqual(stats.sent, 5)
+        self.assertEqual(sorted(self.delivered), [0, 1, 2, 3, 4])
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_SENT).exists())
+        # A second drain finds nothing left to do.
+        self.assertEqual(drain_outbox(max_workers=1).claimed, 0)
+
+    def test_failures_back_off_then_fail_after_max_attempts(self):
+        row = enqueue_email("test_kind", {"fail": True})
+
+        stats = drain_outbox(max_workers=1, max_attempts=2)
+        row.refresh_from_db()
+        self.assertEqual(stats.retried, 1)
+        self.assertEqual(row.status, EmailOutbox.STATUS_PENDING)
+        self.assertIn("smtp down", row.last_error)
+        self.assertGreater(row.available_at, timezone.now())
+
+        # Not due yet, so an immediate drain leaves it alone.
+        self.assertEqual(drain_outbox(max_workers=1, max_attempts=2).claimed, 0)
+
+        EmailOutbox.objects.filter(pk=row.pk).update(available_at=timezone.now())
+        drain_outbox(max_workers=1, max_attempts=2)
+        row.refresh_from_db()
+        self.assertEqual(row.status, EmailOutbox.STATUS_FAILED)
+        self.assertEqual(row.attempts, 2)
+
+    @patch("core.email_service.EmailService.send_roi_payout_notification", return_value=True)
+    def test_payout_roi_queues_one_email_per_credited_payout(self, mock_send):
+        user = get_user_model().objects.create_user(
+            username="outbox_roi", email="outbox_roi@example.com", password="pass12345"
+        )
+        plan = InvestmentPlan.objects.create(
+            name="Outbox Plan",
+            description="Outbox",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        investment = UserInvestment.objects.create(user=user, plan=plan, amount=Decimal("500"))
+        start = timezone.now() - timezone.timedelta(days=3)
+        UserInvestment.objects.filter(pk=investment.pk).update(
+            status="active", started_at=start, ends_at=start + timezone.timedelta(days=14)
+        )
+
+        call_command(
+            "payout_roi",
+            "--bulk",
+            start_date=start.date().isoformat(),
+            end_date=timezone.now().date().isoformat(),
+        )
+        self.assertEqual(EmailOutbox.objects.filter(kind="roi_payout").count(), 4)
+        mock_send.assert_not_called()
+
+        call_command("drain_email_outbox", workers=1)
+        self.assertEqual(mock_send.call_count, 4)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT).count(), 4)
+
+
+class SideEffectDispatcherTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="fx_user", email="fx_user@example.com", password="pass12345"
+        )
+        self.admin_user = User.objects.create_user(
+            username="fx_admin", email="fx_admin@example.com", password="pass12345", is_staff=True
+        )
+
+    @patch("core.email_service.EmailService.send_transaction_notification")
+    def test_approval_email_waits_for_commit(self, mock_send):
+        txn = create_transaction(self.user, "deposit", 100, "Deferred email")
+        mock_send.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            approve_transaction(txn, self.admin_user, "ok")
+            mock_send.assert_not_called()
+        self.assertTrue(callbacks)
+        self.assertTrue(mock_send.called)
+        self.assertEqual({c.args[1] for c in mock_send.call_args_list}, {"approved"})
+
+    @patch("core.email_service.EmailService.send_investment_notification")
+    @patch("core.email_service.EmailService.send_admin_alert")
+    def test_rolled_back_approval_sends_nothing(self, mock_alert, mock_send):
+        from django.db import transaction
+
+        plan = InvestmentPlan.objects.create(
+            name="FX Plan",
+            description="FX",
+            daily_roi=Decimal("1.00"),
+            duration_days=7,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        self.user.wallet.balance = Decimal("500")
+        self.user.wallet.save(update_fields=["balance"])
+        investment = create_investment(self.user, plan, Decimal("200"))
+        mock_send.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    approve_investment(investment, self.admin_user)
+                    raise RuntimeError("abort")
+        mock_send.assert_not_called()
+        mock_alert.assert_not_called()
+
+    def test_pool_runs_jobs_and_reports_metrics(self):
+        from .side_effects import SideEffectDispatcher
+
+        dispatcher = SideEffectDispatcher(max_workers=2, max_queue=10)
+        seen = []
+        for i in range(5):
+            dispatcher.submit("append", seen.append, i)
+        dispatcher.submit("boom", lambda: 1 / 0)
+        self.assertTrue(dispatcher.drain(timeout=5))
+
+        stats = dispatcher.stats()
+        self.assertEqual(sorted(seen), [0, 1, 2, 3, 4])
+        self.assertEqual(stats["submitted"], 6)
+        self.assertEqual(stats["completed"], 5)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreaterEqual(stats["drain_latency_ms"]["p95"], stats["drain_latency_ms"]["p50"])
+
+    def test_full_queue_runs_inline(self):
+        import threading
+
+        from .side_effects import SideEffectDispatcher
+
+        dispatcher = SideEffectDispatcher(max_workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        dispatcher.submit("block", block)
+        started.wait(5)
+        dispatcher.submit("queued", lambda: None)
+        ran = []
+        dispatcher.submit("overflow", ran.append, "inline")
+        release.set()
+        dispatcher.drain(timeout=5)
+
+        self.assertEqual(ran, ["inline"])
+        self.assertEqual(dispatcher.stats()["inline"], 1)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        from chat.models import ChatMessage, ChatSession
+        from transactions.models import AdminNotification
+        from users.models import UserNotification
+
+        self.user = User.objects.create_user(
+            username="ret_user", email="ret_user@example.com", password="pass12345"
+        )
+        now = timezone.now()
+        old = now - timezone.timedelta(days=400)
+        UserNotification.objects.bulk_create(
+            [
+                UserNotification(
+                    user=self.user,
+                    notification_type="system_alert",
+                    title=f"Expired {i}",
+                    message="m",
+                    expires_at=now - timezone.timedelta(hours=1),
+                )
+                for i in range(5)
+            ]
+            + [
+                UserNotification(
+                    user=self.user, notification_type="system_alert", title="Live", message="m",
+                    expires_at=now + timezone.timedelta(days=1),
+                )
+            ]
+        )
+        AdminNotification.objects.create(
+            notification_type="new_deposit", title="Old resolved", message="m",
+            is_resolved=True, resolved_at=old,
+        )
+        AdminNotification.objects.create(
+            notification_type="new_deposit", title="Recent resolved", message="m",
+            is_resolved=True, resolved_at=now,
+        )
+        AdminNotification.objects.create(
+            notification_type="new_deposit", title="Old open", message="m", created_at=old,
+        )
+        ChatSession.objects.create(session_id="closed-1", status="closed")
+        ChatSession.objects.create(session_id="open-1", status="active")
+        for session_id in ("closed-1", "open-1"):
+            ChatMessage.objects.create(session_id=session_id, role="user", content="hi")
+        ChatMessage.objects.update(created_at=old)
+
+    def test_deletes_in_batches_and_reports(self):
+        from chat.models import ChatMessage
+        from transactions.models import AdminNotification
+        from users.models import UserNotification
+
+        from .retention import run_retention
+
+        report = run_retention(batch_size=2, sleep_seconds=0)
+
+        self.assertFalse(report.budget_exhausted)
+        self.assertEqual(report.policies["user_notifications"].deleted, 5)
+        self.assertEqual(report.policies["user_notifications"].batches, 3)
+        self.assertTrue(report.policies["user_notifications"].complete)
+        self.assertEqual(report.policies["admin_notifications"].deleted, 1)
+        self.assertEqual(report.policies["chat_messages"].deleted, 1)
+        self.assertEqual(list(UserNotification.objects.values_list("title", flat=True)), ["Live"])
+        self.assertEqual(
+            set(AdminNotification.objects.values_list("title", flat=True)), {"Recent resolved", "Old open"}
+        )
+        self.assertEqual(list(ChatMessage.objects.values_list("session_id", flat=True)), ["open-1"])
+
+    def test_stops_when_time_budget_is_spent(self):
+        from users.models import UserNotification
+
+        from .retention import run_retention
+
+        report = run_retention(time_budget=0)
+        self.assertTrue(report.budget_exhausted)
+        self.assertEqual(report.deleted, 0)
+        self.assertEqual(UserNotification.objects.count(), 6)
+
+    def test_large_backlog_does_not_starve_later_policies(self):
+        from types import SimpleNamespace
+
+        from . import retention
+
+        clock = [0.0]
+        calls = []
+
+        def fake_delete_batch(policy, batch_size):
+            # Every batch costs ten seconds; user_notifications never runs dry.
+            clock[0] += 10
+            calls.append(policy.name)
+            return batch_size if policy.name == "user_notifications" else 0
+
+        fake_time = SimpleNamespace(monotonic=lambda: clock[0], sleep=lambda seconds: None)
+        with patch.object(retention, "_delete_batch", fake_delete_batch), patch.object(retention, "time", fake_time):
+            report = retention.run_retention(time_budget=100, batch_size=10)
+
+        self.assertTrue(report.budget_exhausted)
+        self.assertFalse(report.policies["user_notifications"].complete)
+        others = [name for name in retention.POLICIES if name != "user_notifications"]
+        self.assertTrue(all(report.policies[name].complete for name in others))
+        self.assertEqual(sorted(set(calls) - {"user_notifications"}), sorted(others))
+        # The time the others did not need went back to the backlog.
+        self.assertGreater(calls.count("user_notifications"), 100 // 10 // len(retention.POLICIES))
+
+    def test_command_dry_run_counts_only(self):
+        import json
+        from io import StringIO
+
+        from users.models import UserNotification
+
+        out = StringIO()
+        call_command("prune_retention", "--dry-run", "--json", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["policies"]["user_notifications"]["deleted"], 5)
+        self.assertEqual(report["deleted"], 7)
+        self.assertEqual(UserNotification.objects.count(), 6)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        from investments.models import DailyRoiPayout
+
+        self.user = User.objects.create_user(
+            username="export_user", email="export@example.com", password="pass12345"
+        )
+        plan = InvestmentPlan.objects.create(
+            name="ExportPlan",
+            description="Export",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        now = timezone.now()
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=self.user,
+                    tx_type="deposit",
+                    amount=Decimal("10.50") * (i + 1),
+                    reference=f"EXP-{i}, \"quoted\"",
+                    status="approved" if i % 2 else "pending",
+                    created_at=now - timezone.timedelta(days=5 - i),
+                )
+                for i in range(5)
+            ]
+        )
+        investment = UserInvestment.objects.create(
+            user=self.user, plan=plan, amount=Decimal("500.00"), status="approved"
+        )
+        DailyRoiPayout.objects.create(
+            investment=investment, payout_date=now.date(), amount=Decimal("5.00"), credited_at=now
+        )
+        DailyRoiPayout.objects.create(
+            investment=investment, payout_date=now.date() - timezone.timedelta(days=1), amount=Decimal("5.00")
+        )
+
+    def test_csv_streams_one_chunk_at_a_time(self):
+        import csv
+
+        from .exports import stream_export
+
+        chunks = stream_export("transactions", chunk_size=2)
+        header = next(chunks)
+        self.assertTrue(header.startswith("id,created_at,user_email,tx_type"))
+        body = list(chunks)
+        self.assertEqual(len(body), 3)  # 2 + 2 + 1 rows
+
+        rows = list(csv.DictReader([header, *"".join(body).splitlines(keepends=True)]))
+        self.assertEqual([row["reference"] for row in rows], [f'EXP-{i}, "quoted"' for i in range(5)])
+        self.assertEqual(rows[0]["amount"], "10.50")
+        self.assertEqual(rows[0]["user_email"], "export@example.com")
+        self.assertEqual(rows[0]["approved_by"], "")
+
+    def test_columnar_filters_by_status_and_date(self):
+        import json
+
+        from .exports import stream_export
+
+        since = (timezone.localtime() - timezone.timedelta(days=2)).date()
+        lines = "".join(stream_export("transactions", "columnar", status="approved", date_from=since)).splitlines()
+        schema = json.loads(lines[0])
+        self.assertEqual(schema["dataset"], "transactions")
+        batch = json.loads(lines[1])
+        self.assertEqual(batch["rows"], 1)
+        columns = dict(zip(schema["columns"], batch["data"]))
+        self.assertEqual(columns["reference"], ['EXP-3, "quoted"'])
+        self.assertEqual(columns["investment_id"], [None])
+
+        payouts = "".join(stream_export("payouts", "columnar", status="credited")).splitlines()
+        self.assertEqual(json.loads(payouts[1])["rows"], 1)
+        with self.assertRaises(ValueError):
+            stream_export("payouts", status="approved")
+        with self.assertRaises(ValueError):
+            stream_export("users")
+
+    def test_command_writes_file(self):
+        import os
+        import tempfile
+        from io import StringIO
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "investments.csv")
+            call_command("export_data", "investments", "--output", path, stderr=StringIO())
+            with open(path, encoding="utf-8") as handle:
+                lines = handle.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("ExportPlan", lines[1])
+
+
+class AdminCounterTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            username="counter_user", email="counter@example.com", password="pass12345"
+        )
+        self.admin = User.objects.create_user(
+            username="counter_admin", email="counter_admin@example.com", password="pass12345",
+            is_staff=True, is_superuser=True,
+        )
+
+    def _email(self, i, **fields):
+        from .models import EmailInbox
+
+        return EmailInbox.objects.create(
+            message_id=f"<counter-{i}@example.com>", subject=f"Hello {i}", from_email="a@example.com",
+            to_email="support@example.com", body_text="hi", received_at=timezone.now(), **fields,
+        )
+
+    def test_counts_are_cached_for_a_short_ttl(self):
+        from django.core.cache import cache
+        from django.test import override_settings
+
+        from .counters import compute_counters, get_counters
+
+        self.assertEqual(get_counters(), dict.fromkeys(get_counters(), 0))
+        txn = create_transaction(self.user, "deposit", 100, "Counter dep", notify_admin=False, notify_user=False)
+        self._email(1)
+        self._email(2, is_starred=True)
+        # Saves do not touch the cache (no extra queries on the write path).
+        with self.assertNumQueries(0):
+            counters = get_counters()
+        self.assertEqual(counters["pending_transactions"], 0)
+
+        cache.clear()
+        counters = get_counters()
+        self.assertEqual(counters["pending_transactions"], 1)
+        self.assertEqual((counters["inbox_total"], counters["unread_inbox"], counters["starred_inbox"]), (2, 2, 1))
+
+        approve_transaction(txn, self.admin)
+        with override_settings(ADMIN_COUNTERS_CACHE_SECONDS=0):
+            cache.clear()
+            get_counters()
+            # Nothing was cached, so the next read recounts.
+            self.assertEqual(get_counters(), compute_counters())
+
+    def test_bulk_paths_invalidate(self):
+        from transactions.services import bulk_approve_transactions
+
+        from .counters import get_counters
+
+        txns = [
+            create_transaction(self.user, "deposit", 10, f"Bulk {i}", notify_admin=False, notify_user=False)
+            for i in range(3)
+        ]
+        self.assertEqual(get_counters(["pending_transactions"])["pending_transactions"], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_approve_transactions([txn.id for txn in txns], self.admin)
+        self.assertEqual(get_counters(["pending_transactions"])["pending_transactions"], 0)
+
+    def test_dashboards_render_from_counters(self):
+        self._email(1)
+        client = Client()
+        self.assertEqual(client.get("/admin/system-status/").status_code, 302)
+
+        client.force_login(self.admin)
+        body = client.get("/admin/system-status/").json()
+        self.assertEqual((body["status"], body["pending_transactions"], body["unread_inbox"]), ("ok", 0, 1))
+
+        from django.http import HttpResponse
+
+        with patch("core.views.render", return_value=HttpResponse()) as render:
+            client.get(reverse("inbox"))
+        stats = render.call_args.args[2]["stats"]
+        self.assertEqual((stats["total"], stats["unread"], stats["starred"]), (1, 1, 0))
+
+
+# Bulk sends run on worker threads whose connections sit outside the test
+# transaction, so delivery rows they log would leak into later tests.
+@override_settings(EMAIL_DELIVERY_LOG_ENABLED=False)
+class ResendBackendTests(TestCase):
+    def setUp(self):
+        from .email_backends.resend import close_http_client
+
+        close_http_client()
+        self.addCleanup(close_http_client)
+        self.server = self._start_server(fail_recipients={"bounce@example.com"})
+
+    def _start_server(self, **options):
+        from django.test import override_settings
+
+        from .email_backends.fake_resend import FakeResendServer
+
+        server = FakeResendServer(**options)
+        server.__enter__()
+        self.addCleanup(server.__exit__, None, None, None)
+        settings_override = override_settings(
+            RESEND_API_KEY="re_test", RESEND_API_BASE_URL=server.url, RESEND_SEND_CONCURRENCY=1
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def _message(self, to="user@example.com"):
+        from django.core.mail import EmailMultiAlternatives
+
+        message = EmailMultiAlternatives("Hi", "Plain body", "WolvCapital <support@example.com>", [to])
+        message.attach_alternative("<p>HTML body</p>", "text/html")
+        return message
+
+    def test_connection_is_reused_across_backend_instances(self):
+        from .email_backends.resend import ResendEmailBackend
+
+        messages = [self._message(f"user{i}@example.com") for i in range(5)]
+        for message in messages:
+            self.assertEqual(ResendEmailBackend().send_messages([message]), 1)
+
+        self.assertEqual(self.server.connections, 1)
+        path, payload = self.server.requests[0]
+        self.assertEqual(path, "/emails")
+        self.assertEqual(payload["to"], ["user0@example.com"])
+        self.assertEqual((payload["text"], payload["html"]), ("Plain body", "<p>HTML body</p>"))
+        self.assertTrue(messages[0].resend_id)
+        self.assertEqual(messages[0].extra_headers["X-Resend-Id"], messages[0].resend_id)
+
+    def test_concurrent_send_messages_counts_accepted(self):
+        from django.test import override_settings
+
+        from .email_backends.resend import ResendEmailBackend
+
+        messages = [self._message(f"user{i}@example.com") for i in range(6)] + [self._message("bounce@example.com")]
+        with override_settings(RESEND_SEND_CONCURRENCY=3):
+            self.assertEqual(ResendEmailBackend().send_messages(messages), 6)
+        self.assertEqual(len(self.server.requests), 7)
+        self.assertLessEqual(self.server.connections, 3)
+
+    def test_rejection_and_transport_errors_return_false(self):
+        from django.test import override_settings
+
+        from .email_backends.resend import ResendEmailBackend
+
+        backend = ResendEmailBackend()
+        self.assertFalse(backend._send_single(self._message("bounce@example.com")))
+        with override_settings(RESEND_API_BASE_URL="http://127.0.0.1:9"):
+            self.assertFalse(backend._send_single(self._message()))
+
+    def test_send_batch_groups_requests_and_maps_ids(self):
+        from django.test import override_settings
+
+        from .email_backends.resend import ResendEmailBackend
+
+        messages = [self._message(f"user{i}@example.com") for i in range(5)]
+        with override_settings(RESEND_BATCH_LIMIT=2):
+            self.assertEqual(ResendEmailBackend().send_batch(messages), [True] * 5)
+
+        paths = [path for path, _ in self.server.requests]
+        self.assertEqual(paths, ["/emails/batch"] * 3)
+        self.assertEqual([len(body) for _, body in self.server.requests], [2, 2, 1])
+        self.assertEqual(self.server.requests[0][1][1]["to"], ["user1@example.com"])
+        self.assertEqual(len({message.resend_id for message in messages}), 5)
+
+    def test_send_batch_does_not_retry_invalid_entries(self):
+        from .email_backends.resend import ResendEmailBackend
+
+        messages = [self._message("a@example.com"), self._message("bounce@example.com"), self._message("b@example.com")]
+        self.assertEqual(ResendEmailBackend().send_batch(messages), [True, False, True])
+        self.assertEqual([path for path, _ in self.server.requests], ["/emails/batch"])
+        self.assertTrue(messages[2].resend_id)
+        self.assertEqual((messages[1].resend_status, messages[1].resend_retryable), (422, False))
+
+    def test_rejected_batch_falls_back_to_single_sends(self):
+        from .email_backends.resend import ResendEmailBackend
+
+        server = self._start_server(fail_recipients={"bounce@example.com"}, strict_batches=True)
+        messages = [self._message("a@example.com"), self._message("bounce@example.com"), self._message("b@example.com")]
+        self.assertEqual(ResendEmailBackend().send_batch(messages), [True, False, True])
+        self.assertEqual([path for path, _ in server.requests], ["/emails/batch"] + ["/emails"] * 3)
+
+    def test_bulk_senders_use_the_batch_api(self):
+        from io import StringIO
+
+        from django.test import override_settings
+
+        from .models import DripCampaign
+        from .services.wolv_token_announcement import send_wolv_token_announcement
+
+        with override_settings(EMAIL_BACKEND="core.email_backends.resend.ResendEmailBackend"):
+            result = send_wolv_token_announcement(
+                [{"email": "a@example.com", "first_name": "A"}, {"email": "bounce@example.com"}]
+            )
+            self.assertEqual(result, {"sent": 1, "failed": 1})
+
+            users = [
+                User.objects.create_user(username=f"drip{i}", email=f"drip{i}@example.com", password="pass12345")
+                for i in range(3)
+            ]
+            for user in users:
+                DripCampaign.objects.create(user=user)
+            call_command("drip_campaign", send=True, stdout=StringIO(), stderr=StringIO())
+
+        batches = [body for path, body in self.server.requests if path == "/emails/batch"]
+        self.assertEqual([len(body) for body in batches], [2, 3])
+        self.assertEqual(
+            sorted(DripCampaign.objects.values_list("current_day", flat=True)), [2, 2, 2]
+        )
+
+
+# Bulk sends run on worker threads whose connections sit outside the test
+# transaction, so delivery rows they log would leak into later tests.
+@override_settings(EMAIL_DELIVERY_LOG_ENABLED=False)
+class BulkEmailTests(TestCase):
+    def test_token_bucket_waits_for_refill(self):
+        from .bulk_email import TokenBucket
+
+        now = [0.0]
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(2, clock=lambda: now[0], sleep=sleep)
+        self.assertEqual((bucket.acquire(), bucket.acquire()), (0.0, 0.0))
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertEqual(len(slept), 1)
+
+    def test_rate_limited_batches_are_retried(self):
+        from django.test import override_settings
+
+        from .bulk_email import send_bulk, sequence_source
+        from .email_backends.fake_resend import FakeResendServer
+        from .email_backends.resend import close_http_client
+
+        close_http_client()
+        self.addCleanup(close_http_client)
+        emails = [f"user{i}@example.com" for i in range(5)]
+        with FakeResendServer(throttle=1) as server, override_settings(
+            EMAIL_BACKEND="core.email_backends.resend.ResendEmailBackend",
+            RESEND_API_KEY="re_test",
+            RESEND_API_BASE_URL=server.url,
+            RESEND_BATCH_LIMIT=10,
+        ), patch("core.bulk_email.backoff_delay", return_value=0):
+            stats = send_bulk(
+                sequence_source(emails),
+                lambda email: EmailMultiAlternatives("Hi", "Body", "support@example.com", [email]),
+                rate=1000,
+            )
+
+        self.assertEqual((stats.sent, stats.failed, stats.retried, stats.completed), (5, 0, 5, True))
+        self.assertEqual([path for path, _ in server.requests], ["/emails/batch", "/emails/batch"])
+
+    def test_stopped_run_resumes_without_resending(self):
+        import threading
+
+        from django.core import mail
+
+        from .bulk_email import queryset_source, send_bulk
+        from .models import BulkEmailRun
+
+        for i in range(5):
+            User.objects.create_user(username=f"bulk{i}", email=f"bulk{i}@example.com", password="pass12345")
+        source = queryset_source(User.objects.filter(username__startswith="bulk").values("id", "email"), key="id")
+
+        def build(row):
+            return EmailMultiAlternatives("Hi", "Body", "support@example.com", [row["email"]])
+
+        stop = threading.Event()
+        first = send_bulk(
+            source, build, name="bulk-test", max_workers=1, rate=1000, chunk_size=2, stop=stop,
+            on_result=lambda *args: stop.set(),
+        )
+        self.assertEqual((first.sent, first.completed), (2, False))
+        run = BulkEmailRun.objects.get(name="bulk-test")
+        self.assertEqual((run.status, run.sent), (BulkEmailRun.STATUS_PAUSED, 2))
+
+        second = send_bulk(source, build, name="bulk-test", max_workers=2, rate=1000, chunk_size=2)
+        self.assertEqual((second.sent, second.completed, second.resumed_from), (3, True, run.cursor))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f"bulk{i}@example.com" for i in range(5)])
+
+        again = send_bulk(source, build, name="bulk-test")
+        self.assertEqual((again.sent, again.completed), (0, True))
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.sent, run.failed), (BulkEmailRun.STATUS_COMPLETED, 5, 0))
+
+
+class EmailTemplateCacheTests(TestCase):
+    def setUp(self):
+        from django.test import override_settings
+
+        from .email_templates import clear_email_template_cache
+
+        settings_override = override_settings(EMAIL_TEMPLATE_CACHE=True, SITE_URL="https://example.com")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(clear_email_template_cache)
+
+    def _context(self):
+        from types import SimpleNamespace
+
+        investment = SimpleNamespace(amount=Decimal("500.00"), plan=SimpleNamespace(name="Pioneer", daily_roi=1))
+        return {
+            "user": SimpleNamespace(first_name="Ada", email="ada@example.com"),
+            "amount": Decimal("4.00"),
+            "investment": investment,
+            "payout_date": timezone.now().date(),
+            "dashboard_url": "/dashboard/",
+        }
+
+    def test_templates_and_missing_text_parts_are_looked_up_once(self):
+        from django.template.loader import get_template
+
+        from .email_service import EmailService
+
+        with patch("core.email_templates.get_template", wraps=get_template) as lookup:
+            for _ in range(3):
+                message = EmailService.build_message("roi_payout", "ada@example.com", context=self._context())
+                self.assertIsNotNone(message)
+        self.assertEqual(
+            sorted(call.args[0] for call in lookup.call_args_list),
+            ["emails/roi_payout.html", "emails/roi_payout.txt"],
+        )
+        self.assertIn("https://example.com", message.alternatives[0][0])
+
+    def test_cached_render_matches_render_to_string(self):
+        from django.conf import settings
+        from django.template.loader import render_to_string
+
+        from .email_service import EmailService
+
+        context = {**self._context(), "current_timestamp": timezone.now(), "current_year": 2025}
+        message = EmailService.build_message("roi_payout", "ada@example.com", context=context)
+        expected = render_to_string(
+            "emails/roi_payout.html",
+            {
+                "brand_name": EmailService.BRAND_NAME,
+                "support_email": getattr(settings, "SUPPORT_EMAIL", None),
+                "site_url": "https://example.com",
+                "brand_config": settings.BRAND,
+                "BRAND": settings.BRAND,
+                **context,
+            },
+        )
+        self.assertEqual(message.alternatives[0][0], expected)
+
+
+class EmailDeliveryTests(TestCase):
+    def _context(self):
+        from types import SimpleNamespace
+
+        investment = SimpleNamespace(amount=Decimal("500.00"), plan=SimpleNamespace(name="Pioneer", daily_roi=1))
+        return {
+            "user": SimpleNamespace(first_name="Ada", email="ada@example.com"),
+            "amount": Decimal("4.00"),
+            "investment": investment,
+            "payout_date": timezone.now().date(),
+            "dashboard_url": "/dashboard/",
+        }
+
+    def test_sync_mode_writes_each_send_immediately(self):
+        from .email_delivery import recipient_hash
+        from .email_service import EmailService
+        from .models import EmailDelivery
+
+        self.assertTrue(EmailService._send("roi_payout", "Ada@Example.com", context=self._context()))
+
+        row = EmailDelivery.objects.get()
+        self.assertEqual(row.template, "roi_payout")
+        self.assertEqual(row.status, EmailDelivery.STATUS_SENT)
+        self.assertEqual(row.recipient_hash, recipient_hash("ada@example.com"))
+        self.assertNotIn("ada", row.recipient_hash)
+        self.assertGreaterEqual(row.latency_ms, 0)
+        self.assertEqual(row.error_class, "")
+
+    def test_async_mode_buffers_rows_for_one_batched_insert(self):
+        from django.test import override_settings
+
+        from .email_delivery import flush_deliveries, record_message
+        from .models import EmailDelivery
+
+        message = EmailMultiAlternatives("Hi", "Body", "support@example.com", ["a@example.com"])
+        message.email_template = "welcome"
+        with override_settings(EMAIL_DELIVERY_LOG_SYNC=False, EMAIL_DELIVERY_LOG_BATCH_SIZE=1000), patch(
+            "core.email_delivery._ensure_writer"
+        ):
+            record_message(message, True, 12.4)
+            record_message(message, False, 30.0, ConnectionError("down"))
+            self.assertFalse(EmailDelivery.objects.exists())
+            with self.assertNumQueries(1):
+                self.assertEqual(flush_deliveries(), 2)
+
+        self.assertEqual(
+            sorted(EmailDelivery.objects.values_list("latency_ms", "error_class")),
+            [(12, ""), (30, "ConnectionError")],
+        )
+
+    def test_provider_ids_and_rejections_are_recorded(self):
+        from django.test import override_settings
+
+        from .email_backends.fake_resend import FakeResendServer
+        from .email_backends.resend import ResendEmailBackend, close_http_client
+        from .email_delivery import send_batch_logged
+        from .models import EmailDelivery
+
+        close_http_client()
+        self.addCleanup(close_http_client)
+        messages = []
+        for to in ("a@example.com", "bounce@example.com"):
+            message = EmailMultiAlternatives("Hi", "Body", "support@example.com", [to])
+            message.email_template = "welcome"
+            messages.append(message)
+        with FakeResendServer(fail_recipients={"bounce@example.com"}) as server, override_settings(
+            RESEND_API_KEY="re_test", RESEND_API_BASE_URL=server.url
+        ):
+            self.assertEqual(send_batch_logged(ResendEmailBackend(), messages), [True, False])
+
+        sent = EmailDelivery.objects.get(status=EmailDelivery.STATUS_SENT)
+        self.assertEqual(sent.provider_id, messages[0].resend_id)
+        failed = EmailDelivery.objects.get(status=EmailDelivery.STATUS_FAILED)
+        self.assertEqual((failed.template, failed.provider_id, failed.error_class), ("welcome", "", "HTTP 422"))
+
+    def test_aggregates_report_percentiles_and_hourly_failure_rate(self):
+        from datetime import timedelta
+
+        from .email_delivery import failure_rate_by_hour, latency_by_template
+        from .models import EmailDelivery
+
+        now = timezone.now().replace(minute=30, second=0, microsecond=0)
+        rows = [
+            EmailDelivery(template="welcome", recipient_hash="x", latency_ms=ms, status="sent", created_at=now)
+            for ms in range(1, 101)
+        ]
+        rows += [
+            EmailDelivery(
+                template="roi_payout",
+                recipient_hash="y",
+                latency_ms=500,
+                status="failed" if i == 0 else "sent",
+                error_class="HTTP 500",
+                created_at=now - timedelta(hours=1),
+            )
+            for i in range(4)
+        ]
+        EmailDelivery.objects.bulk_create(rows)
+
+        stats = {row["template"]: row for row in latency_by_template(now - timedelta(hours=2))}
+        self.assertEqual((stats["welcome"]["p50_ms"], stats["welcome"]["p95_ms"]), (50, 95))
+        self.assertEqual((stats["roi_payout"]["failed"], stats["roi_payout"]["failure_rate"]), (1, 0.25))
+
+        hourly = failure_rate_by_hour(now - timedelta(hours=2))
+        self.assertEqual([(row["total"], row["failed"]) for row in hourly], [(4, 1), (100, 0)])
+        self.assertEqual(hourly[0]["failure_rate"], 0.25)
+
+    def test_admin_stats_page(self):
+        from .models import EmailDelivery
+
+        admin_user = User.objects.create_user(
+            username="stats-admin", email="stats@example.com", password="pass12345", is_staff=True, is_superuser=True
+        )
+        EmailDelivery.objects.create(template="welcome", recipient_hash="x", latency_ms=42, status="sent")
+        client = Client()
+        client.force_login(admin_user)
+
+        response = client.get(reverse("admin:core_emaildelivery_stats"), {"hours": "6"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "welcome")
+        self.assertEqual(response.context["hours"], 6)
@@ -9,6 +9,7 @@ from django.db.models import Q
 from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from .counters import get_counters
 from .email_inbox_service import fetch_new_emails, mark_email_read
 from .forms import ContactForm
 from .models import Agreement, EmailInbox, EmailTemplate
@@ -156,11 +157,13 @@ def inbox_view(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # Stats
+    # Stats: shared totals come from the cached counters; only the per-user
+    # count hits the table (indexed on assigned_to).
+    counters = get_counters(['inbox_total', 'unread_inbox', 'starred_inbox'])
     stats = {
-        'total': EmailInbox.objects.count(),
-        'unread': EmailInbox.objects.filter(status=EmailInbox.STATUS_UNREAD).count(),
-        'starred': EmailInbox.objects.filter(is_starred=True).count(),
+        'total': counters['inbox_total'],
+        'unread': counters['unread_inbox'],
+        'starred': counters['starred_inbox'],
         'assigned_to_me': EmailInbox.objects.filter(assigned_to=request.user).count(),
     }
 
@@ -4,7 +4,7 @@ const WalletConnectButton = dynamic(() => import("@/_client/WalletConnectButton"
 
 import { useEffect, useState, useRef } from "react";
 import type { ReactNode } from "react";
-import { apiFetch } from "@/lib/api";
+import { apiFetch, buildApiUrl } from "@/lib/api";
 import { usePathname, useRouter } from "next/navigation";  
 import Link from "next/link";
 import SupportChat from "@/components/SupportChat";
@@ -94,11 +94,60 @@ export default function DashboardShell({ children, banner }: DashboardShellProps
   };
 
   useEffect(() => {
-    // keep unread count in sync after user loads — poll every 60s
+    // keep unread count in sync after user loads: poll every 60s, or follow the
+    // SSE stream when NEXT_PUBLIC_NOTIFICATION_STREAM is on (needs the ASGI
+    // deployment); any stream failure drops back to polling
     if (!user) return;
     fetchUnreadCount();
-    const interval = setInterval(fetchUnreadCount, 60_000);
-    return () => clearInterval(interval);
+    let interval: ReturnType<typeof setInterval> | null = null;
+    let source: EventSource | null = null;
+    let cancelled = false;
+    const startPolling = () => {
+      source?.close();
+      source = null;
+      if (!cancelled && !interval) interval = setInterval(fetchUnreadCount, 60_000);
+    };
+    const openStream = async () => {
+      try {
+        // EventSource cannot send headers: exchange the session for a
+        // short-lived ticket instead of putting the access token in the URL
+        const res = await apiFetch("/api/notifications/stream-ticket/", { method: "POST" });
+        if (!res.ok) return startPolling();
+        const { ticket } = await res.json();
+        if (cancelled) return;
+        source = new EventSource(
+          buildApiUrl(`/api/notifications/stream/?ticket=${encodeURIComponent(ticket)}`),
+          { withCredentials: true }
+        );
+        source.addEventListener("unread_count", (e) => {
+          try {
+            setUnreadCount(JSON.parse((e as MessageEvent).data)?.count ?? 0);
+          } catch {}
+        });
+        source.addEventListener("notification", (e) => {
+          try {
+            const n = JSON.parse((e as MessageEvent).data);
+            if (!n?.is_read) setUnreadCount((c) => c + 1);
+            setNotifications((prev) => [n, ...prev.filter((p) => p.id !== n.id)].slice(0, 10));
+          } catch {}
+        });
+        // the ticket expires after a minute, so an automatic reconnect with
+        // it would fail; poll instead
+        source.onerror = startPolling;
+      } catch {
+        startPolling();
+      }
+    };
+    if (process.env.NEXT_PUBLIC_NOTIFICATION_STREAM === "true" && typeof EventSource !== "undefined") {
+      openStream();
+    } else {
+      startPolling();
+    }
+    return () => {
+      cancelled = true;
+      source?.close();
+      if (interval) clearInterval(interval);
+    };
   }, [user]);
 
   // KYC persistent notification
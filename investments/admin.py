@@ -34,7 +34,7 @@ class UserInvestmentAdmin(admin.ModelAdmin):
     )
     list_filter = ("status", "plan", "created_at", "started_at")
     search_fields = ("user__email", "user__first_name", "user__last_name", "plan__name")
-    readonly_fields = ("total_return", "created_at")
+    readonly_fields = ("total_return", "profit_earned", "profit_withdrawn", "created_at")
     date_hierarchy = "created_at"
     actions = ["admin_approve", "admin_reject"]
 
@@ -1,18 +1,31 @@
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
-from django.db import connection, transaction
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models.functions import Mod
 from django.utils import timezone
 
-from core.email_service import EmailService
+from core.email_outbox import (
+    enqueue_emails,
+    enqueue_roi_payout,
+    roi_digest_outbox_row,
+    roi_payout_outbox_row,
+)
 from investments.models import DailyRoiPayout, UserInvestment
-from investments.services import credit_roi_payout
+from investments.services import bulk_credit_roi_payouts, credit_roi_payout
 from wolvcapital.rls import rls_admin_context
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BULK_CHUNK_SIZE = 1000
+SERIAL_BATCH_SIZE = 500
+LOCK_ID = 987654321  # Arbitrary unique int for this job
+
 
 class Command(BaseCommand):
     help = (
@@ -64,6 +77,37 @@ class Command(BaseCommand):
             action="store_true",
             help="Do not send ROI or transaction emails (recommended for backfills)",
         )
+        parser.add_argument(
+            "--digest",
+            action="store_true",
+            help=(
+                "Send one summary email per user covering every payout credited in "
+                "this run instead of one email per investment per day."
+            ),
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help=(
+                "Set-based mode: compute eligible (investment, day) pairs up front and "
+                "insert payouts/profit transactions in chunked bulk inserts."
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_BULK_CHUNK_SIZE,
+            help=f"Rows per bulk insert in --bulk mode (default: {DEFAULT_BULK_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Partition investments by user_id across N worker processes, each with "
+                "its own DB connection and advisory lock (default: 1, serial)."
+            ),
+        )
 
     def _parse_date(self, value: str) -> date:
         return datetime.fromisoformat(value).date()
@@ -74,159 +118,362 @@ class Command(BaseCommand):
             yield cur
             cur += timezone.timedelta(days=1)
 
-    def handle(self, *args, **options):
-        with rls_admin_context():
-            # Postgres advisory lock to prevent concurrent payout runs
-            lock_id = 987654321  # Arbitrary unique int for this job
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT pg_advisory_lock(%s);", [lock_id])
-                try:
-                    dry = options["dry_run"]
-                    no_emails = bool(options.get("no_emails"))
+    def _payout_amount(self, amount, daily_roi) -> Decimal:
+        # Simple daily payout: amount * (daily_roi / 100)
+        rate = (daily_roi or Decimal("0")) / Decimal("100")
+        return (amount * rate).quantize(Decimal("0.01"))
+
+    def _iter_batches(self, iterable, size):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _paid_dates(self, investment_ids, start_date, end_date) -> dict:
+        """Map (investment_id, payout_date) -> amount for already-recorded payouts."""
+        return {
+            (inv_id, day): amount
+            for inv_id, day, amount in DailyRoiPayout.objects.filter(
+                investment_id__in=investment_ids,
+                payout_date__gte=start_date,
+                payout_date__lte=end_date,
+            ).values_list("investment_id", "payout_date", "amount")
+        }
 
-                    start_date_raw = options.get("start_date")
-                    end_date_raw = options.get("end_date")
+    def _effective_window(self, started_at, ends_at, start_date, end_date):
+        """Clamp the requested window to the investment's [start, end) window."""
+        if not started_at or not ends_at:
+            return None
+        effective_start = max(start_date, started_at.date())
+        effective_end = min(end_date, ends_at.date() - timezone.timedelta(days=1))
+        if effective_end < effective_start:
+            return None
+        return effective_start, effective_end
 
-                    if start_date_raw and options.get("date"):
-                        raise ValueError("Use either --date or --start-date/--end-date, not both")
+    def _iter_bulk_candidates(self, qs, start_date, end_date, batch_size):
+        """Yield (investment_id, day, amount) for every unpaid day in the window.
 
-                    if end_date_raw and not start_date_raw:
-                        raise ValueError("--end-date requires --start-date")
+        Investments are streamed with a server-side cursor; already-paid dates
+        are fetched with one query per batch of investments.
+        """
+        rows = qs.values_list("id", "amount", "plan__daily_roi", "started_at", "ends_at")
+        for batch in self._iter_batches(rows.iterator(chunk_size=batch_size), batch_size):
+            paid = self._paid_dates([row[0] for row in batch], start_date, end_date)
+            for inv_id, amount, daily_roi, started_at, ends_at in batch:
+                window = self._effective_window(started_at, ends_at, start_date, end_date)
+                if window is None:
+                    continue
+                payout = self._payout_amount(amount, daily_roi)
+                if payout <= 0:
+                    continue
+                for day in self._iter_dates(*window):
+                    if (inv_id, day) not in paid:
+                        yield inv_id, day, payout
 
-                    if start_date_raw:
-                        start_date = self._parse_date(start_date_raw)
-                        end_date = (
-                            timezone.now().date() if not end_date_raw else self._parse_date(end_date_raw)
+    def _run_bulk(self, qs, start_date, end_date, *, dry, no_emails, chunk_size, digests=None):
+        paid = 0
+        total_amount = Decimal("0")
+        chunk_no = 0
+
+        def flush(chunk):
+            nonlocal paid, total_amount, chunk_no
+            chunk_no += 1
+            started = time.monotonic()
+            with transaction.atomic():
+                credited = bulk_credit_roi_payouts(chunk)
+                if digests is not None:
+                    for p in credited:
+                        self._add_to_digest(
+                            digests, p.investment.user, p.investment, p.payout_date, p.amount
                         )
-                        if end_date < start_date:
-                            raise ValueError("--end-date must be >= --start-date")
-                        date_mode = "range"
-                    else:
-                        process_date = (
-                            timezone.now().date()
-                            if not options["date"]
-                            else self._parse_date(options["date"])
+                elif not no_emails:
+                    # Queued in the same transaction as the credits: emails go
+                    # out (via drain_email_outbox) only if the chunk commits.
+                    enqueue_emails(
+                        roi_payout_outbox_row(
+                            p.investment.user, p.amount, p.investment, p.payout_date
                         )
-                        start_date = end_date = process_date
-                        date_mode = "single"
-
-                    paid = 0
-                    synced = 0
-                    total_amount = Decimal("0")
-                    qs = UserInvestment.objects.filter(status__in=["active", "approved"])
-                    if options.get("user_email"):
-                        qs = qs.filter(user__email__iexact=options["user_email"].strip())
-                    if options.get("investment_id"):
-                        qs = qs.filter(id=options["investment_id"].strip())
-
-                    for inv in qs.select_related("plan", "user"):
-                        # Only process investments that have an active window
-                        if not inv.started_at or not inv.ends_at:
-                            continue
-
-                        inv_start = inv.started_at.date()
-                        inv_end_exclusive = inv.ends_at.date()
-
-                        effective_start = max(start_date, inv_start)
-                        effective_end = min(end_date, inv_end_exclusive - timezone.timedelta(days=1))
-                        if effective_end < effective_start:
-                            continue
-
-                        # Simple daily payout: amount * (daily_roi / 100)
-                        daily_roi = (inv.plan.daily_roi or Decimal("0")) / Decimal("100")
-                        payout = (inv.amount * daily_roi).quantize(Decimal("0.01"))
-                        if payout <= 0:
-                            continue
-
-                        for day in self._iter_dates(effective_start, effective_end):
-                            # Check if payout already exists for this date (prevent duplicates)
-                            existing_payout = DailyRoiPayout.objects.filter(
+                        for p in credited
+                    )
+            elapsed = time.monotonic() - started
+            paid += len(credited)
+            total_amount += sum((p.amount for p in credited), Decimal("0"))
+            rate = len(credited) / elapsed if elapsed > 0 else float(len(credited))
+            self.stdout.write(
+                f"[bulk] chunk {chunk_no}: {len(credited)}/{len(chunk)} payouts "
+                f"in {elapsed:.3f}s ({rate:.0f} rows/s)"
+            )
+
+        chunk = []
+        for candidate in self._iter_bulk_candidates(qs, start_date, end_date, chunk_size):
+            if dry:
+                paid += 1
+                total_amount += candidate[2]
+                continue
+            chunk.append(candidate)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+        return paid, total_amount
+
+    def _add_to_digest(self, digests, user, investment, day, amount):
+        entry = digests.setdefault(user.pk, (user, []))
+        entry[1].append((investment.plan.name, day, amount))
+
+    def _enqueue_digests(self, digests) -> int:
+        """Queue one summary email per user; returns the number queued."""
+        with transaction.atomic():
+            return enqueue_emails(
+                roi_digest_outbox_row(user, payouts) for user, payouts in digests.values()
+            )
+
+    def _run_serial(self, qs, start_date, end_date, *, date_mode, dry, no_emails, digests=None):
+        """Pay each investment's window in a single linear pass over its days.
+
+        Already-recorded payout dates are prefetched into memory with one query
+        per batch of investments, so days that only need "syncing" cost no
+        extra round-trips.
+        """
+        paid = 0
+        synced = 0
+        total_amount = Decimal("0")
+
+        investments = qs.select_related("plan", "user").iterator(chunk_size=SERIAL_BATCH_SIZE)
+        for batch in self._iter_batches(investments, SERIAL_BATCH_SIZE):
+            paid_dates = self._paid_dates([inv.id for inv in batch], start_date, end_date)
+
+            for inv in batch:
+                # Only process investments that have an active window
+                window = self._effective_window(inv.started_at, inv.ends_at, start_date, end_date)
+                if window is None:
+                    continue
+
+                payout = self._payout_amount(inv.amount, inv.plan.daily_roi)
+                if payout <= 0:
+                    continue
+
+                inv_paid = 0
+                for day in self._iter_dates(*window):
+                    existing_amount = paid_dates.get((inv.id, day))
+                    if existing_amount is not None:
+                        # Payout record exists - skip to avoid duplicates
+                        synced += 1
+                        total_amount += existing_amount
+                        continue
+
+                    if dry:
+                        self.stdout.write(
+                            f"[DRY] Would pay {payout} to user {inv.user_id} "
+                            f"for investment {inv.id} on {day}"
+                        )
+                        paid += 1
+                        total_amount += payout
+                        continue
+
+                    # Wrap each payout in a DB transaction for atomicity
+                    try:
+                        with transaction.atomic():
+                            payout_obj, created = DailyRoiPayout.objects.get_or_create(
                                 investment=inv,
                                 payout_date=day,
-                            ).first()
+                                defaults={"amount": payout},
+                            )
 
-                            if existing_payout:
-                                # Payout record exists - skip to avoid duplicates
+                            if not created:
+                                # Recorded by a concurrent run since the prefetch
                                 synced += 1
-                                total_amount += existing_payout.amount
+                                total_amount += payout_obj.amount
                                 continue
 
-                            if dry:
-                                self.stdout.write(
-                                    f"[DRY] Would pay {payout} to user {inv.user_id} "
-                                    f"for investment {inv.id} on {day}"
-                                )
-                                paid += 1
-                                total_amount += payout
-                                continue
+                            credit_roi_payout(payout_obj)
 
-                            # Wrap each payout in a DB transaction for atomicity
-                            from django.db import IntegrityError
-                            for day in self._iter_dates(effective_start, effective_end):
-                                if dry:
-                                    self.stdout.write(
-                                        f"[DRY] Would pay {payout} to user {inv.user_id} "
-                                        f"for investment {inv.id} on {day}"
-                                    )
-                                    continue
-
-                                try:
-                                    with transaction.atomic():
-                                        payout_obj, created = DailyRoiPayout.objects.get_or_create(
-                                            investment=inv,
-                                            payout_date=day,
-                                            defaults={"amount": payout},
-                                        )
-
-                                        if not created:
-                                            # Already paid (or already recorded)
-                                            synced += 1
-                                            total_amount += payout_obj.amount
-                                            continue
-
-                                        credit_roi_payout(payout_obj)
-
-                                        if not no_emails:
-                                            try:
-                                                EmailService.send_roi_payout_notification(
-                                                    inv.user,
-                                                    payout,
-                                                    inv,
-                                                    day,
-                                                )
-                                            except Exception as exc:  # pragma: no cover
-                                                logger.warning(
-                                                    (
-                                                        "ROI payout email failed for user %s "
-                                                        "investment %s: %s"
-                                                    ),
-                                                    getattr(inv.user, "email", inv.user_id),
-                                                    inv.id,
-                                                    exc,
-                                                )
-
-                                        paid += 1
-                                        total_amount += payout
-                                except IntegrityError:
-                                    # In case of rare race conditions, treat as already paid
-                                    continue
-
-                        if date_mode == "single" and not dry and paid:
-                            self.stdout.write(
-                                f"Paid {payout} to user {inv.user_id} (investment {inv.id})"
-                            )
+                            if digests is not None:
+                                self._add_to_digest(digests, inv.user, inv, day, payout)
+                            elif not no_emails:
+                                enqueue_roi_payout(inv.user, payout, inv, day)
 
+                            paid += 1
+                            inv_paid += 1
+                            total_amount += payout
+                    except IntegrityError:
+                        # In case of rare race conditions, treat as already paid
+                        continue
+
+                if date_mode == "single" and not dry and inv_paid:
                     self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Processed payouts: {paid}. Synced payout records: {synced}. "
-                            f"Total payout: {total_amount}"
-                        )
+                        f"Paid {payout} to user {inv.user_id} (investment {inv.id})"
                     )
-                    if dry:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                "Dry run mode - no transactions created"
-                            )
-                        )
+
+        return paid, synced, total_amount
+
+    def _resolve_window(self, options):
+        start_date_raw = options.get("start_date")
+        end_date_raw = options.get("end_date")
+
+        if start_date_raw and options.get("date"):
+            raise ValueError("Use either --date or --start-date/--end-date, not both")
+
+        if end_date_raw and not start_date_raw:
+            raise ValueError("--end-date requires --start-date")
+
+        if start_date_raw:
+            start_date = self._parse_date(start_date_raw)
+            end_date = (
+                timezone.now().date() if not end_date_raw else self._parse_date(end_date_raw)
+            )
+            if end_date < start_date:
+                raise ValueError("--end-date must be >= --start-date")
+            return start_date, end_date, "range"
+
+        process_date = (
+            timezone.now().date()
+            if not options.get("date")
+            else self._parse_date(options["date"])
+        )
+        return process_date, process_date, "single"
+
+    def _base_queryset(self, options):
+        qs = UserInvestment.objects.filter(status__in=["active", "approved"])
+        if options.get("user_email"):
+            qs = qs.filter(user__email__iexact=options["user_email"].strip())
+        if options.get("investment_id"):
+            qs = qs.filter(id=options["investment_id"].strip())
+        return qs
+
+    def _process(self, qs, options):
+        """Run the configured payout mode over ``qs`` and return its counters."""
+        start_date, end_date, date_mode = self._resolve_window(options)
+        dry = bool(options.get("dry_run"))
+        no_emails = bool(options.get("no_emails"))
+        # Digest mode gathers credited payouts per user and queues the
+        # summaries once the run is done.
+        digests = {} if options.get("digest") and not no_emails and not dry else None
+        synced = 0
+
+        if options.get("bulk"):
+            paid, total_amount = self._run_bulk(
+                qs,
+                start_date,
+                end_date,
+                dry=dry,
+                no_emails=no_emails,
+                chunk_size=max(1, int(options.get("chunk_size") or DEFAULT_BULK_CHUNK_SIZE)),
+                digests=digests,
+            )
+        else:
+            paid, synced, total_amount = self._run_serial(
+                qs,
+                start_date,
+                end_date,
+                date_mode=date_mode,
+                dry=dry,
+                no_emails=no_emails,
+                digests=digests,
+            )
+
+        if digests:
+            queued = self._enqueue_digests(digests)
+            self.stdout.write(f"Queued {queued} ROI digest email(s)")
+
+        return {"paid": paid, "synced": synced, "total_amount": total_amount}
+
+    def _process_shard(self, shard: int, workers: int, options) -> dict:
+        """Process the investments whose ``user_id % workers == shard``.
+
+        Each shard holds the job lock in *shared* mode (so a serial run, which
+        takes it exclusively, never overlaps a sharded one) plus its own
+        exclusive per-shard lock, so two overlapping ``--workers N`` triggers
+        serialize shard by shard instead of double-processing.
+        """
+        qs = (
+            self._base_queryset(options)
+            .annotate(_payout_shard=Mod("user_id", workers))
+            .filter(_payout_shard=shard)
+        )
+        with rls_admin_context():
+            use_lock = connection.vendor == "postgresql"
+            shard_key = workers * 1000 + shard
+            with connection.cursor() as cursor:
+                if use_lock:
+                    cursor.execute("SELECT pg_advisory_lock_shared(%s);", [LOCK_ID])
+                    cursor.execute("SELECT pg_advisory_lock(%s, %s);", [LOCK_ID, shard_key])
+                try:
+                    return self._process(qs, options)
                 finally:
-                    cursor.execute("SELECT pg_advisory_unlock(%s);", [lock_id])
+                    if use_lock:
+                        cursor.execute("SELECT pg_advisory_unlock(%s, %s);", [LOCK_ID, shard_key])
+                        cursor.execute("SELECT pg_advisory_unlock_shared(%s);", [LOCK_ID])
+
+    def _run_workers(self, workers: int, options) -> dict:
+        # Forked children must not share the parent's DB socket; each one
+        # opens its own connection on first use.
+        connections.close_all()
+        shard_options = {
+            key: value
+            for key, value in options.items()
+            if key not in {"stdout", "stderr", "workers"}
+        }
+        totals = {"paid": 0, "synced": 0, "total_amount": Decimal("0")}
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_run_shard, shard, workers, shard_options)
+                for shard in range(workers)
+            ]
+            for shard, future in enumerate(futures):
+                result = future.result()
+                self.stdout.write(
+                    f"[shard {shard}/{workers}] paid={result['paid']} "
+                    f"synced={result['synced']} total={result['total_amount']}"
+                )
+                for key in totals:
+                    totals[key] += result[key]
+        return totals
+
+    def handle(self, *args, **options):
+        # Validate the window before taking any locks or forking workers.
+        self._resolve_window(options)
+        dry = bool(options.get("dry_run"))
+        workers = max(1, int(options.get("workers") or 1))
+
+        if workers > 1:
+            totals = self._run_workers(workers, options)
+        else:
+            with rls_admin_context():
+                # Postgres advisory lock to prevent concurrent payout runs
+                use_lock = connection.vendor == "postgresql"
+                with connection.cursor() as cursor:
+                    if use_lock:
+                        cursor.execute("SELECT pg_advisory_lock(%s);", [LOCK_ID])
+                    else:
+                        logger.warning("pg_advisory_lock not available; continuing without DB-level lock")
+                    try:
+                        totals = self._process(self._base_queryset(options), options)
+                    finally:
+                        if use_lock:
+                            cursor.execute("SELECT pg_advisory_unlock(%s);", [LOCK_ID])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed payouts: {totals['paid']}. Synced payout records: {totals['synced']}. "
+                f"Total payout: {totals['total_amount']}"
+            )
+        )
+        if dry:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Dry run mode - no transactions created"
+                )
+            )
+
+
+def _run_shard(shard: int, workers: int, options: dict) -> dict:
+    """Child-process entry point for one ``--workers`` shard."""
+    return Command()._process_shard(shard, workers, options)
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:28
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def backfill_profit_totals(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    UserInvestment = apps.get_model("investments", "UserInvestment")
+    rows = (
+        Transaction.objects.filter(investment_id__isnull=False, tx_type__in=("profit", "withdrawal"))
+        .values("investment_id")
+        .annotate(
+            earned=Sum("amount", filter=Q(tx_type="profit", status__in=("approved", "completed"))),
+            withdrawn=Sum(
+                "amount", filter=Q(tx_type="withdrawal", status__in=("pending", "approved", "completed"))
+            ),
+        )
+        .order_by()
+    )
+    for row in rows.iterator(chunk_size=2000):
+        UserInvestment.objects.filter(pk=row["investment_id"]).update(
+            profit_earned=row["earned"] or Decimal("0.00"),
+            profit_withdrawn=row["withdrawn"] or Decimal("0.00"),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0006_alter_dailyroipayout_unique_together_and_more'),
+        ('transactions', '0011_transaction_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userinvestment',
+            name='profit_earned',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Recorded ROI profit on this investment', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='userinvestment',
+            name='profit_withdrawn',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Profit claimed by pending, approved or completed withdrawals', max_digits=14),
+        ),
+        migrations.RunPython(backfill_profit_totals, migrations.RunPython.noop),
+    ]
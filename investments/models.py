@@ -81,10 +81,27 @@ class UserInvestment(models.Model):
     started_at = models.DateTimeField(null=True, blank=True)
     ends_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Running totals kept by the payout/withdrawal services (see
+    # transactions.ledger); repaired by ``reconcile_ledger``.
+    profit_earned = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"),
+        help_text="Recorded ROI profit on this investment",
+    )
+    profit_withdrawn = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"),
+        help_text="Profit claimed by pending, approved or completed withdrawals",
+    )
 
     def __str__(self):
         return f"{self.user.email} - {self.plan.name} - {self.amount}"
 
+    @property
+    def withdrawable_profit(self) -> Decimal:
+        """Profit that can still be withdrawn (zero until the plan ends)."""
+        if not self.ends_at or self.ends_at > timezone.now():
+            return Decimal("0.00")
+        return max(self.profit_earned - self.profit_withdrawn, Decimal("0.00"))
+
     def save(self, *args, **kwargs):
         """
         Admin-safe lifecycle logic.
@@ -22,6 +22,10 @@ class UserInvestment(models.Model):
     started_at: datetime | None
     ends_at: datetime | None
     created_at: datetime
+    profit_earned: Decimal
+    profit_withdrawn: Decimal
+    @property
+    def withdrawable_profit(self) -> Decimal: ...
 
 class DailyRoiPayout(models.Model):
     investment: UserInvestment
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from datetime import timedelta
 from decimal import Decimal
 from typing import cast
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Case, F, Sum, When
 from django.utils import timezone
 
+from transactions.activity import record_transactions
+from transactions.ledger import apply_investment_deltas, apply_ledger_delta, apply_ledger_deltas
 from transactions.models import AdminAuditLog
 from transactions.notifications import create_admin_notification
 from users.models import UserWallet
@@ -60,6 +64,7 @@ def approve_investment(
     investment.started_at = timezone.now()
     investment.ends_at = investment.started_at + timedelta(days=investment.plan.duration_days)
     investment.save(update_fields=["status", "started_at", "ends_at"])
+    apply_ledger_delta(investment_user.pk, invested_principal=investment_amount)
 
     # Audit log
     AdminAuditLog.objects.create(
@@ -95,20 +100,27 @@ def approve_investment(
     except Exception:
         pass
 
-    # Email notification (do not break flow if email fails)
-    try:
-        from core.email_service import EmailService
-
-        EmailService.send_investment_notification(investment, "approved", notes)
-        EmailService.send_admin_alert(
-            subject="Investment Approved",
-            message=(
-                f"Investment {investment.id} for user {investment_user.email} was approved. "
-                f"Amount: ${investment_amount}. Plan: {investment.plan.name}."
-            ),
-        )
-    except Exception:
-        pass
+    # Emails go out after commit so the wallet lock only covers DB work;
+    # dispatcher failures are logged and never undo the approval.
+    from core.email_service import EmailService
+    from core.side_effects import run_after_commit
+
+    run_after_commit(
+        EmailService.send_investment_notification,
+        investment,
+        "approved",
+        notes,
+        name="investment-approved-email",
+    )
+    run_after_commit(
+        EmailService.send_admin_alert,
+        subject="Investment Approved",
+        message=(
+            f"Investment {investment.id} for user {investment_user.email} was approved. "
+            f"Amount: ${investment_amount}. Plan: {investment.plan.name}."
+        ),
+        name="investment-approved-alert",
+    )
 
     return investment
 
@@ -155,19 +167,25 @@ def reject_investment(
     except Exception:
         pass
 
-    try:
-        from core.email_service import EmailService
+    from core.email_service import EmailService
+    from core.side_effects import run_after_commit
 
-        EmailService.send_investment_notification(investment, "rejected", notes)
-        EmailService.send_admin_alert(
-            subject="Investment Rejected",
-            message=(
-                f"Investment {investment.id} for user {investment_user.email} was rejected. "
-                f"Amount: ${investment.amount}. Plan: {investment.plan.name}. Notes: {notes or 'N/A'}."
-            ),
-        )
-    except Exception:
-        pass
+    run_after_commit(
+        EmailService.send_investment_notification,
+        investment,
+        "rejected",
+        notes,
+        name="investment-rejected-email",
+    )
+    run_after_commit(
+        EmailService.send_admin_alert,
+        subject="Investment Rejected",
+        message=(
+            f"Investment {investment.id} for user {investment_user.email} was rejected. "
+            f"Amount: ${investment.amount}. Plan: {investment.plan.name}. Notes: {notes or 'N/A'}."
+        ),
+        name="investment-rejected-alert",
+    )
 
     return investment
 
@@ -273,6 +291,13 @@ def recalculate_investment_end_date(
     return investment
 
 
+def _profit_bucket(investment: UserInvestment) -> str:
+    """Ledger field that profit on ``investment`` accrues to."""
+    if investment.status == UserInvestment.STATUS_COMPLETED:
+        return "withdrawable_profit"
+    return "locked_profit"
+
+
 @transaction.atomic
 def credit_roi_payout(payout: DailyRoiPayout, actor=None):
     """Record daily ROI profit for an investment WITHOUT crediting wallet.
@@ -311,6 +336,8 @@ def credit_roi_payout(payout: DailyRoiPayout, actor=None):
     payout.credited_at = timezone.now()
     payout.credited_tx = txn.id
     payout.save(update_fields=["credited_at", "credited_tx"])
+    apply_ledger_delta(investment_user.pk, **{_profit_bucket(inv): payout.amount})
+    apply_investment_deltas({inv.pk: {"profit_earned": payout.amount}})
 
     if actor:
         AdminAuditLog.objects.create(
@@ -322,3 +349,159 @@ def credit_roi_payout(payout: DailyRoiPayout, actor=None):
         )
 
     return txn.id
+
+
+@transaction.atomic
+def bulk_credit_roi_payouts(
+    candidates: Iterable[tuple[int, object, Decimal]],
+) -> list[DailyRoiPayout]:
+    """Record a chunk of daily ROI payouts with set-based inserts.
+
+    ``candidates`` is an iterable of ``(investment_id, payout_date, amount)``.
+    Rows that already exist are skipped via the
+    ``uniq_roi_payout_per_investment_per_day`` constraint, so re-running a
+    chunk is idempotent. Profit stays LOCKED exactly as in
+    :func:`credit_roi_payout`; only payouts credited by *this* call are
+    returned.
+    """
+
+    from transactions.models import Transaction
+
+    candidates = list(candidates)
+    if not candidates:
+        return []
+
+    DailyRoiPayout.objects.bulk_create(
+        [
+            DailyRoiPayout(investment_id=inv_id, payout_date=day, amount=amount)
+            for inv_id, day, amount in candidates
+        ],
+        ignore_conflicts=True,
+    )
+
+    wanted = {(inv_id, day) for inv_id, day, _ in candidates}
+    days = [day for _, day, _ in candidates]
+    pending = [
+        payout
+        for payout in DailyRoiPayout.objects.select_for_update(of=("self",))
+        .select_related("investment__user", "investment__plan")
+        .filter(
+            investment_id__in={inv_id for inv_id, _ in wanted},
+            payout_date__gte=min(days),
+            payout_date__lte=max(days),
+            credited_tx__isnull=True,
+        )
+        if (payout.investment_id, payout.payout_date) in wanted
+    ]
+    if not pending:
+        return []
+
+    now = timezone.now()
+    txns = []
+    for payout in pending:
+        txn = Transaction(
+            user_id=payout.investment.user_id,
+            investment_id=payout.investment_id,
+            tx_type="profit",
+            payment_method="bank_transfer",
+            amount=payout.amount,
+            status="completed",
+            reference=f"ROI:{payout.id}",
+            notes=f"Daily profit locked until plan expires (payout_date={payout.payout_date})",
+        )
+        txns.append(txn)
+        payout.credited_at = now
+        payout.credited_tx = txn.id
+
+    Transaction.objects.bulk_create(txns)
+    record_transactions(txns)
+    DailyRoiPayout.objects.bulk_update(pending, ["credited_at", "credited_tx"])
+
+    deltas: dict[int, dict[str, Decimal]] = {}
+    earned: dict[int, dict[str, Decimal]] = {}
+    for payout in pending:
+        changes = deltas.setdefault(payout.investment.user_id, {})
+        bucket = _profit_bucket(payout.investment)
+        changes[bucket] = changes.get(bucket, Decimal("0")) + payout.amount
+        inv_changes = earned.setdefault(payout.investment_id, {"profit_earned": Decimal("0")})
+        inv_changes["profit_earned"] += payout.amount
+    apply_ledger_deltas(deltas)
+    apply_investment_deltas(earned)
+
+    return pending
+
+
+def _mark_expired_completed(now) -> list[int]:
+    """Flip every expired approved/active investment to completed in one UPDATE.
+
+    Returns the ids that were actually transitioned, so concurrent runs never
+    release the same principal twice.
+    """
+    live = [UserInvestment.STATUS_APPROVED, UserInvestment.STATUS_ACTIVE]
+    if connection.vendor in {"postgresql", "sqlite"}:
+        table = connection.ops.quote_name(UserInvestment._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET status = %s "
+                "WHERE ends_at <= %s AND status IN (%s, %s) RETURNING id",
+                [UserInvestment.STATUS_COMPLETED, now, *live],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    expired = UserInvestment.objects.select_for_update().filter(status__in=live, ends_at__lte=now)
+    ids = list(expired.values_list("id", flat=True))
+    UserInvestment.objects.filter(id__in=ids).update(status=UserInvestment.STATUS_COMPLETED)
+    return ids
+
+
+@transaction.atomic
+def complete_expired_investments(now=None, *, notify: bool = True) -> list[UserInvestment]:
+    """Complete all expired plans with a fixed number of queries.
+
+    Principal goes back to each owner's available wallet balance (one
+    grouped UPDATE), matching ``sync_wallets``' available = deposits -
+    withdrawals - active principal. Locked profit needs no write: it becomes
+    withdrawable as soon as ``ends_at`` has passed. In-app notifications are
+    bulk-inserted and completion emails are queued in the outbox.
+    """
+    from core.email_outbox import enqueue_emails, investment_status_outbox_row
+    from transactions.models import Transaction
+    from users.notification_service import notify_investments_completed
+
+    ids = _mark_expired_completed(now or timezone.now())
+    if not ids:
+        return []
+
+    completed = list(UserInvestment.objects.filter(id__in=ids).select_related("user", "plan"))
+
+    released: dict[int, Decimal] = {}
+    for inv in completed:
+        released[inv.user_id] = released.get(inv.user_id, Decimal("0")) + inv.amount
+    UserWallet.objects.filter(user_id__in=released).update(
+        balance=F("balance")
+        + Case(
+            *[When(user_id=user_id, then=amount) for user_id, amount in released.items()],
+            output_field=UserWallet._meta.get_field("balance"),
+        ),
+        updated_at=timezone.now(),
+    )
+
+    # Ledger: principal leaves "invested" and this plan's profit unlocks.
+    deltas = {user_id: {"invested_principal": -amount} for user_id, amount in released.items()}
+    for row in (
+        Transaction.objects.filter(
+            investment_id__in=ids, tx_type="profit", status__in=["approved", "completed"]
+        )
+        .values("user_id")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    ):
+        deltas[row["user_id"]]["locked_profit"] = -row["total"]
+        deltas[row["user_id"]]["withdrawable_profit"] = row["total"]
+    apply_ledger_deltas(deltas)
+
+    if notify:
+        notify_investments_completed(completed)
+        enqueue_emails(investment_status_outbox_row(inv, "completed") for inv in completed)
+
+    return completed
@@ -3,10 +3,12 @@ from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 
-from investments.services import create_investment, reject_investment
+from core.models import EmailOutbox
+from investments.services import create_investment, credit_roi_payout, reject_investment
+from transactions.ledger import get_ledger_summary
 
 from .models import DailyRoiPayout, InvestmentPlan, UserInvestment
 
@@ -219,11 +221,17 @@ class DailyRoiPayoutTests(TestCase):
         self.assertEqual(self.user.wallet.balance, Decimal("0.00"))  # Still zero
         self.assertEqual(profit_txns.count(), 11)  # Still 11 transactions
 
-    @patch("investments.management.commands.payout_roi.EmailService.send_roi_payout_notification")
+    @patch("core.email_service.EmailService.send_roi_payout_notification", return_value=True)
     def test_daily_payout_sends_email_notification(self, mock_send):
         process_date = timezone.now().date().isoformat()
         call_command("payout_roi", date=process_date)
 
+        # The payout run only queues the email; delivery happens on drain.
+        mock_send.assert_not_called()
+        self.assertEqual(EmailOutbox.objects.filter(kind="roi_payout").count(), 1)
+
+        call_command("drain_email_outbox", workers=1)
+
         mock_send.assert_called_once()
         args, _ = mock_send.call_args
         self.assertEqual(args[0], self.user)
@@ -231,6 +239,292 @@ class DailyRoiPayoutTests(TestCase):
         self.assertEqual(args[2], self.investment)
 
 
+class CreditRoiPayoutAtomicTests(TransactionTestCase):
+    """``credit_roi_payout`` opens its own transaction when called bare."""
+
+    def test_credit_outside_a_transaction(self):
+        user = get_user_model().objects.create_user(
+            username="roi_bare", email="roi_bare@example.com", password="testpass123"
+        )
+        plan = InvestmentPlan.objects.create(
+            name="BarePlan",
+            description="Bare",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        investment = UserInvestment.objects.create(
+            user=user,
+            plan=plan,
+            amount=Decimal("500"),
+            status="approved",
+            started_at=timezone.now(),
+            ends_at=timezone.now() + timezone.timedelta(days=14),
+        )
+        payout = DailyRoiPayout.objects.create(
+            investment=investment, payout_date=timezone.now().date(), amount=Decimal("5.00")
+        )
+
+        tx_id = credit_roi_payout(payout)
+
+        payout.refresh_from_db()
+        self.assertEqual(payout.credited_tx, tx_id)
+        self.assertEqual(get_ledger_summary(user).locked_profit, Decimal("5.00"))
+
+
+class BulkRoiPayoutTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="bulk_roi_user", email="bulk_roi_user@example.com", password="testpass123"
+        )
+        self.plan = InvestmentPlan.objects.create(
+            name="BulkPlan",
+            description="Bulk",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        tz = timezone.get_current_timezone()
+        self.investments = [
+            UserInvestment.objects.create(
+                user=self.user, plan=self.plan, amount=amount, status="pending"
+            )
+            for amount in (Decimal("500"), Decimal("300"))
+        ]
+        # Bypass save() so the past window is not auto-completed.
+        UserInvestment.objects.filter(user=self.user).update(
+            status="approved",
+            started_at=timezone.datetime(2025, 12, 1, tzinfo=tz),
+            ends_at=timezone.datetime(2025, 12, 15, tzinfo=tz),
+        )
+
+    def _backfill(self, **extra):
+        options = {"no_emails": True, "bulk": True, "chunk_size": 5, **extra}
+        call_command("payout_roi", start_date="2025-12-04", end_date="2025-12-20", **options)
+
+    def test_bulk_backfill_creates_payouts_and_profit_transactions(self):
+        from transactions.models import Transaction
+
+        self._backfill()
+
+        self.assertEqual(DailyRoiPayout.objects.count(), 22)  # 11 days x 2 investments
+        self.assertFalse(DailyRoiPayout.objects.filter(credited_tx__isnull=True).exists())
+        profit = Transaction.objects.filter(user=self.user, tx_type="profit", status="completed")
+        self.assertEqual(profit.count(), 22)
+        first = self.investments[0]
+        payout = DailyRoiPayout.objects.get(investment=first, payout_date="2025-12-04")
+        txn = profit.get(id=payout.credited_tx)
+        self.assertEqual(txn.amount, Decimal("5.00"))
+        self.assertEqual(txn.reference, f"ROI:{payout.id}")
+
+        self.user.wallet.refresh_from_db()
+        self.assertEqual(self.user.wallet.balance, Decimal("0.00"))
+
+    def test_bulk_backfill_is_idempotent_and_fills_gaps(self):
+        from transactions.models import Transaction
+
+        # Pre-existing payout recorded by the serial path must be left alone.
+        call_command(
+            "payout_roi",
+            date="2025-12-05",
+            investment_id=str(self.investments[0].id),
+            no_emails=True,
+        )
+        self.assertEqual(DailyRoiPayout.objects.count(), 1)
+
+        self._backfill()
+        self._backfill()
+
+        self.assertEqual(DailyRoiPayout.objects.count(), 22)
+        self.assertEqual(Transaction.objects.filter(tx_type="profit").count(), 22)
+
+    def test_bulk_dry_run_writes_nothing(self):
+        self._backfill(dry_run=True)
+        self.assertEqual(DailyRoiPayout.objects.count(), 0)
+
+    @patch("core.email_service.EmailService.send_roi_digest_notification", return_value=True)
+    def test_digest_queues_one_email_per_user(self, mock_digest):
+        for bulk in (True, False):
+            DailyRoiPayout.objects.all().delete()
+            EmailOutbox.objects.all().delete()
+            mock_digest.reset_mock()
+
+            self._backfill(no_emails=False, digest=True, bulk=bulk)
+
+            rows = EmailOutbox.objects.all()
+            self.assertEqual([row.kind for row in rows], ["roi_digest"])
+            self.assertEqual(len(rows[0].payload["payouts"]), 22)
+            self.assertEqual(rows[0].payload["total_amount"], "88.00")  # 11 x (5 + 3)
+
+            call_command("drain_email_outbox", workers=1)
+            mock_digest.assert_called_once()
+            user, payouts, total = mock_digest.call_args.args
+            self.assertEqual(user, self.user)
+            self.assertEqual(len(payouts), 22)
+            self.assertEqual(total, Decimal("88.00"))
+
+
+class PayoutRoiScalingTests(TestCase):
+    """Regression benchmark: range backfills must scale linearly with days."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="scale_user", email="scale_user@example.com", password="x"
+        )
+        self.plan = InvestmentPlan.objects.create(
+            name="ScalePlan",
+            description="Scale",
+            daily_roi=Decimal("1.00"),
+            duration_days=60,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        # Build the ledger row up front so its one-off creation is not measured.
+        get_ledger_summary(self.user)
+
+    def _new_investment(self):
+        inv = UserInvestment.objects.create(
+            user=self.user, plan=self.plan, amount=Decimal("100"), status="pending"
+        )
+        tz = timezone.get_current_timezone()
+        UserInvestment.objects.filter(id=inv.id).update(
+            status="approved",
+            started_at=timezone.datetime(2025, 11, 1, tzinfo=tz),
+            ends_at=timezone.datetime(2025, 12, 31, tzinfo=tz),
+        )
+        return inv
+
+    def _measure(self, inv, days):
+        import time
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        end = timezone.datetime(2025, 11, 1).date() + timezone.timedelta(days=days - 1)
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            call_command(
+                "payout_roi",
+                start_date="2025-11-01",
+                end_date=end.isoformat(),
+                investment_id=str(inv.id),
+                no_emails=True,
+            )
+            elapsed = time.perf_counter() - started
+        return len(ctx.captured_queries), elapsed
+
+    def test_query_count_and_wall_time_grow_linearly_with_range(self):
+        runs = {}
+        for days in (5, 10, 20):
+            inv = self._new_investment()
+            runs[days] = (inv, *self._measure(inv, days))
+            self.assertEqual(DailyRoiPayout.objects.filter(investment=inv).count(), days)
+
+        q5, q10, q20 = runs[5][1], runs[10][1], runs[20][1]
+        # Constant per-day cost: doubling the range adds the same queries again.
+        self.assertEqual(q20 - q10, 2 * (q10 - q5))
+
+        # Linear (~4x) rather than quadratic (~16x) when the range grows 4x.
+        self.assertLess(runs[20][2], runs[5][2] * 10)
+
+    def test_rerun_over_paid_range_uses_constant_queries(self):
+        short_inv = self._new_investment()
+        long_inv = self._new_investment()
+        self._measure(short_inv, 5)
+        self._measure(long_inv, 20)
+
+        q_short, _ = self._measure(short_inv, 5)
+        q_long, _ = self._measure(long_inv, 20)
+        self.assertEqual(q_short, q_long)
+
+
+class _InlineExecutor:
+    """Stand-in for ProcessPoolExecutor that runs shards in-process."""
+
+    def __init__(self, max_workers=None, mp_context=None):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class ShardedRoiPayoutTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.plan = InvestmentPlan.objects.create(
+            name="ShardPlan",
+            description="Shard",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f"shard_user_{i}", email=f"shard_user_{i}@example.com", password="x"
+            )
+            for i in range(4)
+        ]
+        for user in self.users:
+            UserInvestment.objects.create(
+                user=user, plan=self.plan, amount=Decimal("200"), status="pending"
+            )
+        tz = timezone.get_current_timezone()
+        UserInvestment.objects.update(
+            status="approved",
+            started_at=timezone.datetime(2025, 12, 1, tzinfo=tz),
+            ends_at=timezone.datetime(2025, 12, 15, tzinfo=tz),
+        )
+        self.options = {
+            "start_date": "2025-12-01",
+            "end_date": "2025-12-03",
+            "no_emails": True,
+            "bulk": True,
+        }
+
+    def test_shards_partition_investments_by_user(self):
+        from investments.management.commands.payout_roi import Command
+
+        seen = []
+        for shard in range(3):
+            result = Command()._process_shard(shard, 3, self.options)
+            shard_users = set(
+                DailyRoiPayout.objects.exclude(investment__user_id__in=seen)
+                .values_list("investment__user_id", flat=True)
+            )
+            self.assertTrue(all(uid % 3 == shard for uid in shard_users))
+            self.assertEqual(result["paid"], 3 * len(shard_users))
+            seen.extend(shard_users)
+
+        self.assertEqual(sorted(seen), sorted(u.id for u in self.users))
+        self.assertEqual(DailyRoiPayout.objects.count(), 12)
+
+    @patch("investments.management.commands.payout_roi.ProcessPoolExecutor", _InlineExecutor)
+    def test_workers_merge_shard_counters(self):
+        from io import StringIO
+
+        out = StringIO()
+        call_command("payout_roi", workers=2, stdout=out, **self.options)
+
+        self.assertEqual(DailyRoiPayout.objects.count(), 12)
+        self.assertIn("Processed payouts: 12.", out.getvalue())
+        self.assertIn("Total payout: 24.00", out.getvalue())
+
+
 class InvestmentRejectionTests(TestCase):
     def setUp(self):
         User = get_user_model()
@@ -265,3 +559,89 @@ class InvestmentRejectionTests(TestCase):
         self.assertEqual(inv.status, "rejected")
         self.assertIsNone(inv.started_at)
         self.assertIsNone(inv.ends_at)
+
+
+class CompleteExpiredPlansTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f"expire_{n}", email=f"expire_{n}@example.com", password="x")
+            for n in range(2)
+        ]
+        self.plan = InvestmentPlan.objects.create(
+            name="ExpirePlan",
+            description="Expire",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+
+    def _investments(self, count, *, expired=True):
+        offset = -1 if expired else 1
+        started = timezone.now() - timezone.timedelta(days=14 - offset)
+        created = [
+            UserInvestment.objects.create(
+                user=self.users[n % 2], plan=self.plan, amount=Decimal("100"), status="pending"
+            )
+            for n in range(count)
+        ]
+        UserInvestment.objects.filter(id__in=[inv.id for inv in created]).update(
+            status="active", started_at=started, ends_at=started + timezone.timedelta(days=14)
+        )
+        return created
+
+    def test_completes_expired_plans_and_releases_principal(self):
+        from users.models import UserNotification, UserWallet
+
+        expired = self._investments(3)
+        live = self._investments(1, expired=False)
+
+        call_command("complete_expired_plans")
+
+        self.assertEqual(
+            set(UserInvestment.objects.filter(status="completed").values_list("id", flat=True)),
+            {inv.id for inv in expired},
+        )
+        self.assertEqual(UserInvestment.objects.get(id=live[0].id).status, "active")
+        balances = [UserWallet.objects.get(user=user).balance for user in self.users]
+        self.assertEqual(balances, [Decimal("200.00"), Decimal("100.00")])
+        self.assertEqual(
+            UserNotification.objects.filter(notification_type="investment_completed").count(), 3
+        )
+        self.assertEqual(EmailOutbox.objects.filter(kind="investment_status").count(), 3)
+
+        # A second run finds nothing left and releases nothing twice.
+        call_command("complete_expired_plans")
+        self.assertEqual(UserWallet.objects.get(user=self.users[0]).balance, Decimal("200.00"))
+
+    def test_completion_emails_are_sent_by_the_drain_command(self):
+        from io import StringIO
+
+        from django.core import mail
+
+        self._investments(3)
+        call_command("complete_expired_plans")
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command("drain_email_outbox", workers=1, stdout=StringIO())
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["expire_0@example.com", "expire_0@example.com", "expire_1@example.com"],
+        )
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_SENT).exists())
+
+    def test_query_count_does_not_grow_with_expired_plans(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def run(count):
+            UserInvestment.objects.all().delete()
+            self._investments(count)
+            with CaptureQueriesContext(connection) as ctx:
+                call_command("complete_expired_plans")
+            return len(ctx.captured_queries)
+
+        for user in self.users:
+            get_ledger_summary(user)
+        self.assertEqual(run(2), run(20))
@@ -0,0 +1,76 @@
+"""Incremental maintenance of the ``UserDailyActivity`` rollup.
+
+Each Transaction/UserInvestment row contributes to the rollup row for its
+owner and the local date of its ``created_at``. Single-row writes go through
+the model signals in ``transactions.signals``; bulk paths that bypass signals
+call :func:`record_transactions` directly.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UserDailyActivity
+
+# tx_type -> (count field, amount field or None)
+TX_TYPE_FIELDS = {
+    "deposit": ("deposit_count", "deposit_amount"),
+    "withdrawal": ("withdrawal_count", "withdrawal_amount"),
+    "profit": ("profit_count", "profit_amount"),
+    "manual_credit": ("manual_credit_count", "deposit_amount"),
+}
+
+
+def activity_day(created_at):
+    return timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+
+
+def transaction_deltas(tx_type: str, amount, sign: int = 1) -> dict:
+    deltas = {"tx_count": sign}
+    count_field, amount_field = TX_TYPE_FIELDS.get(tx_type, (None, None))
+    if count_field:
+        deltas[count_field] = sign
+    if amount_field:
+        deltas[amount_field] = sign * Decimal(amount)
+    return deltas
+
+
+def investment_deltas(amount, sign: int = 1) -> dict:
+    return {"investment_count": sign, "invested_amount": sign * Decimal(amount)}
+
+
+def record_activity(user_id, day, deltas: dict) -> None:
+    """Add ``deltas`` to the (user, day) row, creating it on first use."""
+    changes = {field: F(field) + value for field, value in deltas.items() if value}
+    if not changes:
+        return
+    if UserDailyActivity.objects.filter(user_id=user_id, day=day).update(**changes):
+        return
+    if not any(value > 0 for value in deltas.values()):
+        # Pure removal with no row to remove from (not backfilled yet, or the
+        # row went away in the same cascade delete): nothing to record.
+        return
+    try:
+        with transaction.atomic():
+            UserDailyActivity.objects.create(
+                user_id=user_id, day=day, **{k: max(v, 0) for k, v in deltas.items()}
+            )
+    except IntegrityError:
+        # Created concurrently between our UPDATE and INSERT.
+        UserDailyActivity.objects.filter(user_id=user_id, day=day).update(**changes)
+
+
+def record_transactions(transactions) -> None:
+    """Roll up many newly inserted transactions (e.g. after ``bulk_create``)."""
+    grouped: dict[tuple, dict] = defaultdict(lambda: defaultdict(int))
+    for txn in transactions:
+        key = (txn.user_id, activity_day(txn.created_at))
+        for field, value in transaction_deltas(txn.tx_type, txn.amount).items():
+            grouped[key][field] += value
+    for (user_id, day), deltas in grouped.items():
+        record_activity(user_id, day, deltas)
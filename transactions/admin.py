@@ -1,12 +1,15 @@
 import os
 from django.contrib import admin, messages
-from django.core.exceptions import ValidationError
+from django.contrib.admin.views.decorators import staff_member_required
 from django.db.models import Sum
+from django.utils.decorators import method_decorator
 from django.utils.html import format_html
 from unfold.admin import ModelAdmin as UnfoldModelAdmin
 
-from .models import AdminAuditLog, CryptocurrencyWallet, Transaction, VirtualCard
-from .services import approve_transaction, reject_transaction
+from core.counters import get_counters
+
+from .models import AdminAuditLog, CryptocurrencyWallet, Transaction, UserLedgerSummary, VirtualCard
+from .services import bulk_approve_transactions, bulk_reject_transactions
 
 
 # ─────────────────────────────────────────────
@@ -131,27 +134,21 @@ class TransactionAdmin(UnfoldModelAdmin):
 
     @admin.action(description="✅ Approve selected transactions")
     def admin_approve(self, request, queryset):
-        count = 0
-        for txn in queryset.filter(status="pending"):
-            try:
-                approve_transaction(txn, request.user, "Approved via admin panel")
-                count += 1
-            except ValidationError as exc:
-                messages.error(request, f"Transaction {txn.id}: {exc}")
-        if count:
-            messages.success(request, f"{count} transaction(s) approved and wallet(s) updated.")
+        ids = list(queryset.filter(status="pending").values_list("id", flat=True))
+        result = bulk_approve_transactions(ids, request.user, "Approved via admin panel")
+        for txn_id, error in result.errors.items():
+            messages.error(request, f"Transaction {txn_id}: {error}")
+        if result.processed:
+            messages.success(request, f"{len(result.processed)} transaction(s) approved and wallet(s) updated.")
 
     @admin.action(description="❌ Reject selected transactions")
     def admin_reject(self, request, queryset):
-        count = 0
-        for txn in queryset.filter(status="pending"):
-            try:
-                reject_transaction(txn, request.user, "Rejected via admin panel")
-                count += 1
-            except ValidationError as exc:
-                messages.error(request, f"Transaction {txn.id}: {exc}")
-        if count:
-            messages.success(request, f"{count} transaction(s) rejected.")
+        ids = list(queryset.filter(status="pending").values_list("id", flat=True))
+        result = bulk_reject_transactions(ids, request.user, "Rejected via admin panel")
+        for txn_id, error in result.errors.items():
+            messages.error(request, f"Transaction {txn_id}: {error}")
+        if result.processed:
+            messages.success(request, f"{len(result.processed)} transaction(s) rejected.")
 
 
 # ─────────────────────────────────────────────
@@ -247,6 +244,33 @@ class VirtualCardAdmin(UnfoldModelAdmin):
     status_badge.short_description = "Status"
 
 
+# ─────────────────────────────────────────────
+# USER LEDGER SUMMARY ADMIN
+# ─────────────────────────────────────────────
+
+@admin.register(UserLedgerSummary)
+class UserLedgerSummaryAdmin(UnfoldModelAdmin):
+    list_display = (
+        "user",
+        "deposits_total",
+        "withdrawals_total",
+        "locked_profit",
+        "withdrawable_profit",
+        "invested_principal",
+        "updated_at",
+    )
+    search_fields = ("user__email",)
+    list_select_related = ("user",)
+    ordering = ("-updated_at",)
+
+    def has_add_permission(self, request):
+        # Maintained by the services; rebuild with `manage.py reconcile_ledger`
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # ─────────────────────────────────────────────
 # SYSTEM STATUS VIEW (kept for urls.py)
 # ─────────────────────────────────────────────
@@ -255,8 +279,20 @@ from django.db import connection
 from django.http import JsonResponse
 from django.views import View
 
+STATUS_COUNTERS = (
+    "pending_transactions",
+    "approved_transactions",
+    "pending_investments",
+    "pending_kyc",
+    "unread_inbox",
+    "open_chat_sessions",
+)
 
+
+@method_decorator(staff_member_required, name="dispatch")
 class SystemStatusView(View):
+    """Database health plus the admin queue sizes, read from cached counters."""
+
     def get(self, request):
         try:
             connection.ensure_connection()
@@ -264,14 +300,10 @@ class SystemStatusView(View):
         except Exception:
             db_ok = False
 
-        total_pending = Transaction.objects.filter(status="pending").count()
-        total_approved_today = Transaction.objects.filter(
-            status="approved"
-        ).count()
-
-        return JsonResponse({
+        counters = get_counters(STATUS_COUNTERS) if db_ok else {}
+        payload = {
             "status": "ok" if db_ok else "degraded",
             "database": "connected" if db_ok else "error",
-            "pending_transactions": total_pending,
-            "approved_transactions": total_approved_today,
-        })
+        }
+        payload.update({name: counters.get(name) for name in STATUS_COUNTERS})
+        return JsonResponse(payload)
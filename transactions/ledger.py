@@ -0,0 +1,210 @@
+"""Incrementally maintained per-user ledger totals (``UserLedgerSummary``).
+
+Writers call :func:`apply_ledger_delta` inside the same database transaction
+that changes the underlying Transaction/UserInvestment rows. Readers use
+:func:`get_ledger_summary`, which is a single primary-key lookup. Any drift
+(e.g. rows edited directly in the admin) is repaired by ``reconcile_ledger``.
+
+Each ``UserInvestment`` also carries ``profit_earned``/``profit_withdrawn``,
+kept the same way by :func:`apply_investment_deltas`. Withdrawals claim profit
+with :func:`reserve_withdrawable_profit`, a conditional single-row UPDATE, so
+two concurrent requests can never both spend the same profit.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db.models import Case, F, Q, Sum, When
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Transaction, UserLedgerSummary
+
+LEDGER_FIELDS = (
+    "deposits_total",
+    "withdrawals_total",
+    "locked_profit",
+    "withdrawable_profit",
+    "invested_principal",
+)
+
+ZERO = Decimal("0.00")
+
+# Sent with ``user_ids`` whenever ledger rows change, and by bulk paths that
+# rewrite a user's transactions without model signals (bulk_update). Cached
+# per-user views (e.g. the dashboard snapshot) listen to it.
+ledger_changed = Signal()
+
+DEPOSIT_TYPES = ("deposit", "manual_credit")
+PROFIT_STATUSES = ("approved", "completed")
+# Withdrawals that hold on to investment profit (everything but rejected).
+WITHDRAWAL_HOLD_STATUSES = ("pending", "approved", "completed")
+INVESTMENT_PROFIT_FIELDS = ("profit_earned", "profit_withdrawn")
+LIVE_INVESTMENT_STATUSES = ("approved", "active")
+
+
+def compute_ledger_totals(user_ids=None) -> dict[int, dict[str, Decimal]]:
+    """Aggregate ledger totals from the source tables, keyed by user id.
+
+    Two grouped queries regardless of how many users are covered.
+    """
+    from investments.models import UserInvestment
+
+    tx = Transaction.objects.all()
+    inv = UserInvestment.objects.filter(status__in=LIVE_INVESTMENT_STATUSES)
+    if user_ids is not None:
+        tx = tx.filter(user_id__in=user_ids)
+        inv = inv.filter(user_id__in=user_ids)
+
+    profit = Q(tx_type="profit", status__in=PROFIT_STATUSES)
+    completed_plan = Q(investment__status=UserInvestment.STATUS_COMPLETED)
+    totals: dict[int, dict[str, Decimal]] = {}
+    for row in tx.values("user_id").annotate(
+        deposits_total=Sum("amount", filter=Q(tx_type__in=DEPOSIT_TYPES, status="approved")),
+        withdrawals_total=Sum("amount", filter=Q(tx_type="withdrawal", status="approved")),
+        locked_profit=Sum("amount", filter=profit & ~completed_plan),
+        withdrawable_profit=Sum("amount", filter=profit & completed_plan),
+    ).order_by():
+        totals[row["user_id"]] = {
+            field: row.get(field) or ZERO for field in LEDGER_FIELDS if field != "invested_principal"
+        }
+    for row in inv.values("user_id").annotate(total=Sum("amount")).order_by():
+        totals.setdefault(row["user_id"], {})["invested_principal"] = row["total"] or ZERO
+
+    for values in totals.values():
+        for field in LEDGER_FIELDS:
+            values.setdefault(field, ZERO)
+    return totals
+
+
+def rebuild_ledger_summary(user_id) -> UserLedgerSummary:
+    """Recompute one user's row from the source tables and store it."""
+    values = compute_ledger_totals([user_id]).get(user_id) or {f: ZERO for f in LEDGER_FIELDS}
+    summary, _ = UserLedgerSummary.objects.update_or_create(user_id=user_id, defaults=values)
+    return summary
+
+
+def get_ledger_summary(user) -> UserLedgerSummary:
+    """Return the user's ledger row, building it on first access."""
+    user_id = getattr(user, "pk", user)
+    summary = UserLedgerSummary.objects.filter(user_id=user_id).first()
+    if summary is None:
+        summary = rebuild_ledger_summary(user_id)
+    return summary
+
+
+def apply_ledger_delta(user_id, **deltas: Decimal) -> None:
+    """Add ``deltas`` to one user's totals with a single atomic UPDATE.
+
+    Call *after* writing the source rows: if the user has no ledger row yet
+    it is built from the source tables, which already include this change.
+    """
+    changes = {field: F(field) + amount for field, amount in deltas.items() if amount}
+    if not changes:
+        return
+    updated = UserLedgerSummary.objects.filter(user_id=user_id).update(
+        **changes, updated_at=timezone.now()
+    )
+    if not updated:
+        rebuild_ledger_summary(user_id)
+    ledger_changed.send(sender=UserLedgerSummary, user_ids=[user_id])
+
+
+def apply_ledger_deltas(deltas: dict[int, dict[str, Decimal]]) -> None:
+    """Apply per-user deltas for many users with one UPDATE (plus builds for new rows)."""
+    if not deltas:
+        return
+    existing = set(
+        UserLedgerSummary.objects.filter(user_id__in=deltas).values_list("user_id", flat=True)
+    )
+    fields = {field for changes in deltas.values() for field in changes}
+    updates = {
+        field: F(field)
+        + Case(
+            *[
+                When(user_id=user_id, then=changes[field])
+                for user_id, changes in deltas.items()
+                if user_id in existing and changes.get(field)
+            ],
+            default=ZERO,
+            output_field=UserLedgerSummary._meta.get_field(field),
+        )
+        for field in fields
+    }
+    if existing:
+        UserLedgerSummary.objects.filter(user_id__in=existing).update(
+            **updates, updated_at=timezone.now()
+        )
+    missing = [user_id for user_id in deltas if user_id not in existing]
+    if missing:
+        totals = compute_ledger_totals(missing)
+        UserLedgerSummary.objects.bulk_create(
+            [
+                UserLedgerSummary(user_id=user_id, **totals.get(user_id, {}))
+                for user_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+    ledger_changed.send(sender=UserLedgerSummary, user_ids=list(deltas))
+
+
+def compute_investment_profit(user_ids=None) -> dict[int, dict[str, Decimal]]:
+    """Per-investment ``profit_earned``/``profit_withdrawn`` from transactions.
+
+    One grouped query; investments without profit or withdrawals are absent.
+    """
+    tx = Transaction.objects.filter(investment_id__isnull=False, tx_type__in=("profit", "withdrawal"))
+    if user_ids is not None:
+        tx = tx.filter(user_id__in=user_ids)
+    totals: dict[int, dict[str, Decimal]] = {}
+    for row in tx.values("investment_id").annotate(
+        profit_earned=Sum("amount", filter=Q(tx_type="profit", status__in=PROFIT_STATUSES)),
+        profit_withdrawn=Sum("amount", filter=Q(tx_type="withdrawal", status__in=WITHDRAWAL_HOLD_STATUSES)),
+    ).order_by():
+        totals[row["investment_id"]] = {field: row[field] or ZERO for field in INVESTMENT_PROFIT_FIELDS}
+    return totals
+
+
+def apply_investment_deltas(deltas: dict[int, dict[str, Decimal]]) -> None:
+    """Add per-investment profit deltas with one UPDATE."""
+    from investments.models import UserInvestment
+
+    deltas = {inv_id: changes for inv_id, changes in deltas.items() if any(changes.values())}
+    if not deltas:
+        return
+    fields = {field for changes in deltas.values() for field, amount in changes.items() if amount}
+    UserInvestment.objects.filter(pk__in=deltas).update(
+        **{
+            field: F(field)
+            + Case(
+                *[
+                    When(pk=inv_id, then=changes[field])
+                    for inv_id, changes in deltas.items()
+                    if changes.get(field)
+                ],
+                default=ZERO,
+                output_field=UserInvestment._meta.get_field(field),
+            )
+            for field in fields
+        }
+    )
+
+
+def reserve_withdrawable_profit(investment_id, amount: Decimal, now=None) -> bool:
+    """Claim ``amount`` of an ended investment's profit for a withdrawal.
+
+    A single primary-key UPDATE that only matches while enough unclaimed
+    profit is left. Concurrent claims on the same investment serialise on the
+    row lock and each re-checks the condition, so double submits cannot
+    overdraw. Returns ``False`` (nothing written) if the claim does not fit.
+    """
+    from investments.models import UserInvestment
+
+    return bool(
+        UserInvestment.objects.filter(
+            pk=investment_id,
+            ends_at__lte=now or timezone.now(),
+            profit_earned__gte=F("profit_withdrawn") + amount,
+        ).update(profit_withdrawn=F("profit_withdrawn") + amount)
+    )
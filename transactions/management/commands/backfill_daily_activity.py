@@ -0,0 +1,89 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+from investments.models import UserInvestment
+from transactions.activity import TX_TYPE_FIELDS
+from transactions.models import Transaction, UserDailyActivity
+
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = "Rebuild the UserDailyActivity rollup from transactions and investments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-email", dest="user_email", help="Rebuild a single user by email.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Users rebuilt per database transaction (default: {BATCH_SIZE})",
+        )
+
+    def _user_ids(self, user_email):
+        if user_email:
+            User = get_user_model()
+            return list(User.objects.filter(email__iexact=user_email.strip()).values_list("id", flat=True))
+        ids = set(Transaction.objects.values_list("user_id", flat=True).distinct())
+        ids |= set(UserInvestment.objects.values_list("user_id", flat=True).distinct())
+        ids |= set(UserDailyActivity.objects.values_list("user_id", flat=True).distinct())
+        return sorted(ids)
+
+    def _rows_for(self, user_ids):
+        rows: dict[tuple, dict] = defaultdict(lambda: defaultdict(int))
+
+        tx_aggregates = {"tx_count": Count("id")}
+        for tx_type, (count_field, _amount_field) in TX_TYPE_FIELDS.items():
+            tx_aggregates[count_field] = Count("id", filter=Q(tx_type=tx_type))
+            tx_aggregates[f"{tx_type}_sum"] = Sum("amount", filter=Q(tx_type=tx_type))
+        for row in (
+            Transaction.objects.filter(user_id__in=user_ids)
+            .annotate(day=TruncDate("created_at"))
+            .values("user_id", "day")
+            .annotate(**tx_aggregates)
+            .order_by()
+        ):
+            target = rows[(row["user_id"], row["day"])]
+            target["tx_count"] += row["tx_count"]
+            for tx_type, (count_field, amount_field) in TX_TYPE_FIELDS.items():
+                target[count_field] += row[count_field]
+                target[amount_field] += row[f"{tx_type}_sum"] or Decimal("0")
+
+        for row in (
+            UserInvestment.objects.filter(user_id__in=user_ids)
+            .annotate(day=TruncDate("created_at"))
+            .values("user_id", "day")
+            .annotate(investment_count=Count("id"), invested_amount=Sum("amount"))
+            .order_by()
+        ):
+            target = rows[(row["user_id"], row["day"])]
+            target["investment_count"] += row["investment_count"]
+            target["invested_amount"] += row["invested_amount"] or Decimal("0")
+
+        return [
+            UserDailyActivity(user_id=user_id, day=day, **values)
+            for (user_id, day), values in rows.items()
+        ]
+
+    def handle(self, *args, **options):
+        user_ids = self._user_ids(options.get("user_email"))
+        batch_size = max(1, options["batch_size"])
+
+        written = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            with transaction.atomic():
+                UserDailyActivity.objects.filter(user_id__in=batch).delete()
+                objs = self._rows_for(batch)
+                UserDailyActivity.objects.bulk_create(objs, batch_size=1000)
+                written += len(objs)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt daily activity for {len(user_ids)} users ({written} rows).")
+        )
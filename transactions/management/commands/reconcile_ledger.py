@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from investments.models import UserInvestment
+from transactions.ledger import (
+    INVESTMENT_PROFIT_FIELDS,
+    LEDGER_FIELDS,
+    ZERO,
+    compute_investment_profit,
+    compute_ledger_totals,
+    ledger_changed,
+)
+from transactions.models import Transaction, UserLedgerSummary
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild UserLedgerSummary rows and per-investment profit totals from "
+        "transactions/investments and report any drift between the stored and "
+        "recomputed totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-email", dest="user_email", help="Reconcile a single user by email.")
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without writing.")
+
+    def _user_ids(self, user_email):
+        if user_email:
+            User = get_user_model()
+            return list(User.objects.filter(email__iexact=user_email.strip()).values_list("id", flat=True))
+        ids = set(Transaction.objects.values_list("user_id", flat=True).distinct())
+        ids |= set(UserInvestment.objects.values_list("user_id", flat=True).distinct())
+        ids |= set(UserLedgerSummary.objects.values_list("user_id", flat=True))
+        return sorted(ids)
+
+    def _reconcile_investments(self, user_ids, dry):
+        expected = compute_investment_profit(user_ids)
+        stale = []
+        investments = (
+            UserInvestment.objects.select_for_update()
+            .filter(user_id__in=user_ids)
+            .only("id", *INVESTMENT_PROFIT_FIELDS)
+        )
+        for inv in investments:
+            values = expected.get(inv.id) or {field: ZERO for field in INVESTMENT_PROFIT_FIELDS}
+            diffs = [
+                f"{field} {getattr(inv, field)} -> {values[field]}"
+                for field in INVESTMENT_PROFIT_FIELDS
+                if getattr(inv, field) != values[field]
+            ]
+            if diffs:
+                self.stdout.write(f"investment {inv.id}: " + ", ".join(diffs))
+                for field in INVESTMENT_PROFIT_FIELDS:
+                    setattr(inv, field, values[field])
+                stale.append(inv)
+        if stale and not dry:
+            UserInvestment.objects.bulk_update(stale, list(INVESTMENT_PROFIT_FIELDS))
+        return len(stale)
+
+    def handle(self, *args, **options):
+        dry = bool(options.get("dry_run"))
+        user_ids = self._user_ids(options.get("user_email"))
+
+        checked = 0
+        drifted = 0
+        created = 0
+        investments_drifted = 0
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[start:start + BATCH_SIZE]
+            with transaction.atomic():
+                totals = compute_ledger_totals(batch)
+                existing = {
+                    row.user_id: row
+                    for row in UserLedgerSummary.objects.select_for_update().filter(user_id__in=batch)
+                }
+                to_update = []
+                to_create = []
+                for user_id in batch:
+                    checked += 1
+                    expected = totals.get(user_id) or {field: ZERO for field in LEDGER_FIELDS}
+                    row = existing.get(user_id)
+                    if row is None:
+                        created += 1
+                        to_create.append(UserLedgerSummary(user_id=user_id, **expected))
+                        continue
+                    diffs = [
+                        f"{field} {getattr(row, field)} -> {expected[field]}"
+                        for field in LEDGER_FIELDS
+                        if getattr(row, field) != expected[field]
+                    ]
+                    if diffs:
+                        drifted += 1
+                        self.stdout.write(f"user {user_id}: " + ", ".join(diffs))
+                        for field in LEDGER_FIELDS:
+                            setattr(row, field, expected[field])
+                        row.updated_at = timezone.now()
+                        to_update.append(row)
+
+                investments_drifted += self._reconcile_investments(batch, dry)
+
+                if not dry:
+                    UserLedgerSummary.objects.bulk_create(to_create)
+                    UserLedgerSummary.objects.bulk_update(to_update, [*LEDGER_FIELDS, "updated_at"])
+                    changed = [row.user_id for row in (*to_create, *to_update)]
+                    if changed:
+                        ledger_changed.send(sender=UserLedgerSummary, user_ids=changed)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} users. Drifted: {drifted}. Created: {created}. "
+                f"Investments drifted: {investments_drifted}. Dry-run: {dry}."
+            )
+        )
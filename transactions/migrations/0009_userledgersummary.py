@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_alter_transaction_tx_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLedgerSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deposits_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Approved deposits and manual credits', max_digits=14)),
+                ('withdrawals_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Approved withdrawals', max_digits=14)),
+                ('locked_profit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='ROI profit on plans that have not completed yet', max_digits=14)),
+                ('withdrawable_profit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='ROI profit on completed plans', max_digits=14)),
+                ('invested_principal', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Principal in approved/active investments', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Ledger Summary',
+                'verbose_name_plural': 'User Ledger Summaries',
+                'db_table': 'transactions_user_ledger_summary',
+            },
+        ),
+    ]
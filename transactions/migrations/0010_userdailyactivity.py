@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:47
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_userledgersummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('tx_count', models.PositiveIntegerField(default=0)),
+                ('deposit_count', models.PositiveIntegerField(default=0)),
+                ('withdrawal_count', models.PositiveIntegerField(default=0)),
+                ('profit_count', models.PositiveIntegerField(default=0)),
+                ('manual_credit_count', models.PositiveIntegerField(default=0)),
+                ('investment_count', models.PositiveIntegerField(default=0)),
+                ('deposit_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('withdrawal_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('profit_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('invested_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Daily Activity',
+                'verbose_name_plural': 'User Daily Activity',
+                'db_table': 'transactions_user_daily_activity',
+                'ordering': ['user', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='uniq_user_daily_activity')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0006_alter_dailyroipayout_unique_together_and_more'),
+        ('transactions', '0010_userdailyactivity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', '-created_at'], name='txn_status_created_idx'),
+        ),
+    ]
@@ -151,6 +151,8 @@ class Transaction(models.Model):
             models.Index(fields=["payment_method"]),
             models.Index(fields=["created_at"]),
             models.Index(fields=["status"]),
+            # Admin queue: WHERE status = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["status", "-created_at"], name="txn_status_created_idx"),
         ]
         ordering = ["-created_at"]
 
@@ -398,3 +400,86 @@ class AdminAuditLog(models.Model):
         ordering = ["-created_at"]
 
 
+
+class UserLedgerSummary(models.Model):
+    """Running per-user totals maintained by the transaction/investment services.
+
+    Rebuilt from ``transactions_transaction`` and ``investments_user_investment``
+    by ``manage.py reconcile_ledger``.
+    """
+
+    user: models.OneToOneField = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="ledger_summary",
+    )
+    deposits_total: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"),
+        help_text="Approved deposits and manual credits",
+    )
+    withdrawals_total: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"),
+        help_text="Approved withdrawals",
+    )
+    locked_profit: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"),
+        help_text="ROI profit on plans that have not completed yet",
+    )
+    withdrawable_profit: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"),
+        help_text="ROI profit on completed plans",
+    )
+    invested_principal: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"),
+        help_text="Principal in approved/active investments",
+    )
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Ledger for user {self.user_id}"
+
+    @property
+    def profit_total(self) -> Decimal:
+        return self.locked_profit + self.withdrawable_profit
+
+    class Meta:
+        db_table = "transactions_user_ledger_summary"
+        verbose_name = "User Ledger Summary"
+        verbose_name_plural = "User Ledger Summaries"
+
+
+class UserDailyActivity(models.Model):
+    """Per-user, per-day rollup of transaction/investment activity.
+
+    Maintained incrementally by ``transactions.activity``; rebuilt with
+    ``manage.py backfill_daily_activity``.
+    """
+
+    user: models.ForeignKey = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="daily_activity",
+    )
+    day: models.DateField = models.DateField()
+    tx_count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    deposit_count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    withdrawal_count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    profit_count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    manual_credit_count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    investment_count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    deposit_amount: models.DecimalField = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    withdrawal_amount: models.DecimalField = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    profit_amount: models.DecimalField = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    invested_amount: models.DecimalField = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    def __str__(self):
+        return f"Activity for user {self.user_id} on {self.day}"
+
+    class Meta:
+        db_table = "transactions_user_daily_activity"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="uniq_user_daily_activity"),
+        ]
+        ordering = ["user", "day"]
+        verbose_name = "User Daily Activity"
+        verbose_name_plural = "User Daily Activity"
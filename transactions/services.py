@@ -1,3 +1,5 @@
+import logging
+from dataclasses import dataclass, field
 from decimal import Decimal
 
 from django.conf import settings
@@ -5,11 +7,21 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 
+from core.counters import invalidate_counters
 from users.models import User, UserWallet
 
+from .ledger import (
+    apply_investment_deltas,
+    apply_ledger_delta,
+    apply_ledger_deltas,
+    ledger_changed,
+    reserve_withdrawable_profit,
+)
 from .models import AdminAuditLog, Transaction, VirtualCard
 from .notifications import create_admin_notification
 
+logger = logging.getLogger(__name__)
+
 
 @transaction.atomic
 def approve_transaction(txn: Transaction, admin_user: User, notes: str = "") -> Transaction:
@@ -46,6 +58,11 @@ def approve_transaction(txn: Transaction, admin_user: User, notes: str = "") ->
     txn.notes = notes
     txn.save()
 
+    if txn.tx_type in ("deposit", "manual_credit"):
+        apply_ledger_delta(txn.user_id, deposits_total=txn.amount)
+    elif txn.tx_type == "withdrawal":
+        apply_ledger_delta(txn.user_id, withdrawals_total=txn.amount)
+
     # Create audit log
     AdminAuditLog.objects.create(
         admin=admin_user,
@@ -73,29 +90,25 @@ def approve_transaction(txn: Transaction, admin_user: User, notes: str = "") ->
     elif txn.tx_type == "withdrawal":
         notify_withdrawal_approved(txn.user, txn, notes)
 
-    # Send email notification
+    # Email and referral rewards run after commit, off the wallet lock
     from core.email_service import EmailService
+    from core.side_effects import run_after_commit
 
-    EmailService.send_transaction_notification(
+    run_after_commit(
+        EmailService.send_transaction_notification,
         txn,
         'approved',
         notes,
         bcc=[settings.TRUSTPILOT_BCC_ADDRESS] if getattr(settings, 'TRUSTPILOT_BCC_ADDRESS', None) else None,
+        name="transaction-approved-email",
     )
 
-    # Process referral rewards for deposits (if applicable)
     if txn.tx_type == "deposit":
-        try:
-            from referrals.tasks import process_deposit_referral
-            process_deposit_referral(
-                referred_user_id=txn.user.id,
-                deposit_amount=txn.amount,
-                currency='USD'
-            )
-        except Exception:
-            # Fail silently - referral processing shouldn't break
-            # transaction approval
-            pass
+        run_after_commit(
+            _process_deposit_referrals,
+            [(txn.user_id, txn.amount)],
+            name="deposit-referral",
+        )
 
     return txn
 
@@ -114,6 +127,10 @@ def reject_transaction(txn: Transaction, admin_user: User, notes: str = "") -> T
     txn.notes = notes
     txn.save()
 
+    # A rejected withdrawal gives its claimed profit back to the investment
+    if txn.tx_type == "withdrawal" and txn.investment_id:
+        apply_investment_deltas({txn.investment_id: {"profit_withdrawn": -txn.amount}})
+
     # Create audit log
     AdminAuditLog.objects.create(
         admin=admin_user,
@@ -141,19 +158,191 @@ def reject_transaction(txn: Transaction, admin_user: User, notes: str = "") -> T
     elif txn.tx_type == "withdrawal":
         notify_withdrawal_rejected(txn.user, txn, notes)
 
-    # Send email notification
+    # Send email notification after commit
     from core.email_service import EmailService
+    from core.side_effects import run_after_commit
 
-    EmailService.send_transaction_notification(
+    run_after_commit(
+        EmailService.send_transaction_notification,
         txn,
         'rejected',
         notes,
         bcc=[settings.TRUSTPILOT_BCC_ADDRESS] if getattr(settings, 'TRUSTPILOT_BCC_ADDRESS', None) else None,
+        name="transaction-rejected-email",
     )
 
     return txn
 
 
+@dataclass
+class BulkDecisionResult:
+    """Outcome of a bulk approve/reject: processed rows plus per-row errors."""
+
+    processed: list[Transaction] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+def _lock_pending(txn_ids, result: BulkDecisionResult) -> list[Transaction]:
+    """Lock the requested transactions; report the ones that are not pending."""
+    wanted = {str(txn_id) for txn_id in txn_ids}
+    rows = list(
+        Transaction.objects.select_for_update(of=("self",))
+        .select_related("user", "user__profile")
+        .filter(id__in=wanted)
+        .order_by("created_at", "id")
+    )
+    found = {str(txn.id) for txn in rows}
+    for missing in sorted(wanted - found):
+        result.errors[missing] = "Transaction not found"
+    pending = []
+    for txn in rows:
+        if txn.status != "pending":
+            result.errors[str(txn.id)] = f"Can only decide pending transactions (status: {txn.status})"
+        else:
+            pending.append(txn)
+    return pending
+
+
+def _record_decisions(processed, admin_user, notes: str, decision: str) -> None:
+    """Audit logs, admin notification resolution, in-app notifications and
+    queued emails for ``processed`` — one statement each."""
+    from core.email_outbox import enqueue_emails, transaction_status_outbox_row
+    from users.notification_service import notify_transaction_decisions
+
+    from .models import AdminNotification
+
+    action = "approve" if decision == "approved" else "reject"
+    ids = [str(txn.id) for txn in processed]
+    AdminAuditLog.objects.bulk_create(
+        [
+            AdminAuditLog(admin=admin_user, entity="transaction", entity_id=txn_id, action=action, notes=notes)
+            for txn_id in ids
+        ]
+    )
+    AdminNotification.objects.filter(
+        entity_type="transaction", entity_id__in=ids, is_resolved=False
+    ).update(is_resolved=True, resolved_by=admin_user, resolved_at=timezone.now())
+    notify_transaction_decisions(processed, decision, notes)
+    enqueue_emails(transaction_status_outbox_row(txn, decision, notes) for txn in processed)
+
+
+def _process_deposit_referrals(deposits) -> None:
+    from referrals.tasks import process_deposit_referral
+
+    for user_id, amount in deposits:
+        try:
+            process_deposit_referral(referred_user_id=user_id, deposit_amount=amount, currency="USD")
+        except Exception:
+            # Referral processing must never undo an approval
+            logger.exception("Deferred referral processing failed for user %s", user_id)
+
+
+@transaction.atomic
+def bulk_approve_transactions(txn_ids, admin_user: User, notes: str = "") -> BulkDecisionResult:
+    """Approve many pending transactions in one pass.
+
+    All affected wallets are locked with a single ``SELECT ... FOR UPDATE``
+    in user-id order (so concurrent bulk runs cannot deadlock), balances are
+    applied as one grouped delta per user, and audit logs / notifications are
+    bulk-inserted. Emails go to the outbox and referral rewards run after
+    commit. Rows that cannot be approved (not pending, insufficient funds)
+    are reported in ``errors`` and left untouched.
+    """
+    result = BulkDecisionResult()
+    pending = _lock_pending(txn_ids, result)
+    if not pending:
+        return result
+
+    user_ids = sorted({txn.user_id for txn in pending})
+    existing = set(UserWallet.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True))
+    UserWallet.objects.bulk_create(
+        [UserWallet(user_id=user_id) for user_id in user_ids if user_id not in existing],
+        ignore_conflicts=True,
+    )
+    wallets = {
+        wallet.user_id: wallet
+        for wallet in UserWallet.objects.select_for_update().filter(user_id__in=user_ids).order_by("user_id")
+    }
+
+    balances = {user_id: wallet.balance for user_id, wallet in wallets.items()}
+    ledger: dict[int, dict[str, Decimal]] = {}
+    for txn in pending:
+        if txn.tx_type == "withdrawal":
+            if balances[txn.user_id] < txn.amount:
+                result.errors[str(txn.id)] = (
+                    f"Insufficient funds. User balance: ${balances[txn.user_id]}, "
+                    f"Withdrawal amount: ${txn.amount}"
+                )
+                continue
+            balances[txn.user_id] -= txn.amount
+            bucket = "withdrawals_total"
+        elif txn.tx_type in ("deposit", "manual_credit"):
+            balances[txn.user_id] += txn.amount
+            bucket = "deposits_total"
+        else:
+            bucket = None
+        if bucket:
+            changes = ledger.setdefault(txn.user_id, {})
+            changes[bucket] = changes.get(bucket, Decimal("0")) + txn.amount
+        txn.status = "approved"
+        txn.approved_by = admin_user
+        txn.notes = notes
+        txn.updated_at = timezone.now()
+        result.processed.append(txn)
+
+    if not result.processed:
+        return result
+
+    changed_wallets = []
+    for user_id, balance in balances.items():
+        if balance != wallets[user_id].balance:
+            wallets[user_id].balance = balance
+            wallets[user_id].updated_at = timezone.now()
+            changed_wallets.append(wallets[user_id])
+    UserWallet.objects.bulk_update(changed_wallets, ["balance", "updated_at"])
+    Transaction.objects.bulk_update(result.processed, ["status", "approved_by", "notes", "updated_at"])
+    apply_ledger_deltas(ledger)
+    invalidate_counters(["pending_transactions", "approved_transactions"])
+
+    _record_decisions(result.processed, admin_user, notes, "approved")
+
+    deposits = [(txn.user_id, txn.amount) for txn in result.processed if txn.tx_type == "deposit"]
+    if deposits:
+        from core.side_effects import run_after_commit
+
+        run_after_commit(_process_deposit_referrals, deposits, name="deposit-referral")
+
+    return result
+
+
+@transaction.atomic
+def bulk_reject_transactions(txn_ids, admin_user: User, notes: str = "") -> BulkDecisionResult:
+    """Reject many pending transactions in one pass (no wallet changes)."""
+    result = BulkDecisionResult()
+    now = timezone.now()
+    for txn in _lock_pending(txn_ids, result):
+        txn.status = "rejected"
+        txn.approved_by = admin_user
+        txn.notes = notes
+        txn.updated_at = now
+        result.processed.append(txn)
+
+    if result.processed:
+        Transaction.objects.bulk_update(result.processed, ["status", "approved_by", "notes", "updated_at"])
+        released: dict[int, dict[str, Decimal]] = {}
+        for txn in result.processed:
+            if txn.tx_type == "withdrawal" and txn.investment_id:
+                changes = released.setdefault(txn.investment_id, {"profit_withdrawn": Decimal("0")})
+                changes["profit_withdrawn"] -= txn.amount
+        apply_investment_deltas(released)
+        invalidate_counters(["pending_transactions"])
+        _record_decisions(result.processed, admin_user, notes, "rejected")
+        # bulk_update skips post_save; let cached per-user views refresh.
+        ledger_changed.send(sender=Transaction, user_ids=sorted({txn.user_id for txn in result.processed}))
+
+    return result
+
+
 def create_transaction(
     user: User,
     tx_type: str,
@@ -183,23 +372,32 @@ def create_transaction(
 
     # enforce virtual card activation for all withdrawal requests
     if tx_type == "withdrawal":
-        card = VirtualCard.objects.filter(user=user, status="active").first()
-        if not card:
+        if not VirtualCard.objects.filter(user=user, status="active").exists():
             raise ValidationError(
                 "Your virtual card must be activated before you can withdraw funds. "
                 "Please request card activation in your dashboard."
             )
 
-    txn = Transaction.objects.create(
-        user=user,
-        tx_type=tx_type,
-        payment_method=payment_method,
-        amount=amount_decimal,
-        reference=reference,
-        tx_hash=tx_hash,
-        wallet_address_used=wallet_address_used,
-        investment=investment,
-    )
+    with transaction.atomic():
+        # Claim the investment's profit and record the withdrawal together, so
+        # a failed insert releases the claim and a double submit cannot reuse it.
+        if tx_type == "withdrawal" and investment is not None:
+            if not reserve_withdrawable_profit(investment.pk, amount_decimal):
+                investment.refresh_from_db(fields=["ends_at", "profit_earned", "profit_withdrawn"])
+                raise ValidationError(
+                    f"Insufficient withdrawable profit. Available: {investment.withdrawable_profit:.2f}"
+                )
+
+        txn = Transaction.objects.create(
+            user=user,
+            tx_type=tx_type,
+            payment_method=payment_method,
+            amount=amount_decimal,
+            reference=reference,
+            tx_hash=tx_hash,
+            wallet_address_used=wallet_address_used,
+            investment=investment,
+        )
 
     if notify_admin:
         # Create admin notification
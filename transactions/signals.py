@@ -1,8 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from investments.models import UserInvestment
+
+from .activity import activity_day, investment_deltas, record_activity, transaction_deltas
 from .models import Transaction, VirtualCard
 from core.email_service import EmailService
+from core.side_effects import run_after_commit
 
 
 @receiver(pre_save, sender=Transaction)
@@ -12,6 +16,7 @@ def transaction_pre_save(sender, instance, **kwargs):
         try:
             old_instance = Transaction.objects.get(pk=instance.pk)
             instance._old_status = old_instance.status
+            instance._old_activity = (old_instance.tx_type, old_instance.amount, old_instance.created_at)
         except Transaction.DoesNotExist:
             instance._old_status = None
     else:
@@ -20,18 +25,18 @@ def transaction_pre_save(sender, instance, **kwargs):
 
 @receiver(post_save, sender=Transaction)
 def transaction_post_save(sender, instance, created, **kwargs):
-    """Send email notifications when transaction status changes from pending."""
+    """Send email notifications when transaction status changes from pending.
+
+    The send is deferred until commit so the approving transaction does not
+    hold its row locks across the provider round-trip.
+    """
     if instance._old_status == 'pending' and instance.status in ['approved', 'rejected']:
-        try:
-            if instance.status == 'approved':
-                EmailService.send_transaction_notification(instance, 'approved')
-            elif instance.status == 'rejected':
-                EmailService.send_transaction_notification(instance, 'rejected')
-        except Exception as e:
-            # Log the error but don't crash the app
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send transaction notification for {instance.id}: {str(e)}")
+        run_after_commit(
+            EmailService.send_transaction_notification,
+            instance,
+            instance.status,
+            name=f"transaction-{instance.status}-signal-email",
+        )
 
 
 @receiver(pre_save, sender=VirtualCard)
@@ -60,4 +65,44 @@ def virtual_card_post_save(sender, instance, created, **kwargs):
             # Log the error but don't crash the app
             import logging
             logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send card notification for {instance.id}: {str(e)}")
\ No newline at end of file
+            logger.error(f"Failed to send card notification for {instance.id}: {str(e)}")
+
+@receiver(post_save, sender=Transaction)
+def transaction_activity_post_save(sender, instance, created, **kwargs):
+    """Keep the UserDailyActivity rollup in step with transaction writes."""
+    if created:
+        record_activity(
+            instance.user_id,
+            activity_day(instance.created_at),
+            transaction_deltas(instance.tx_type, instance.amount),
+        )
+        return
+    old = getattr(instance, "_old_activity", None)
+    if old and old != (instance.tx_type, instance.amount, instance.created_at):
+        old_type, old_amount, old_created_at = old
+        record_activity(instance.user_id, activity_day(old_created_at), transaction_deltas(old_type, old_amount, -1))
+        record_activity(
+            instance.user_id,
+            activity_day(instance.created_at),
+            transaction_deltas(instance.tx_type, instance.amount),
+        )
+
+
+@receiver(post_delete, sender=Transaction)
+def transaction_activity_post_delete(sender, instance, **kwargs):
+    record_activity(
+        instance.user_id,
+        activity_day(instance.created_at),
+        transaction_deltas(instance.tx_type, instance.amount, -1),
+    )
+
+
+@receiver(post_save, sender=UserInvestment)
+def investment_activity_post_save(sender, instance, created, **kwargs):
+    if created:
+        record_activity(instance.user_id, activity_day(instance.created_at), investment_deltas(instance.amount))
+
+
+@receiver(post_delete, sender=UserInvestment)
+def investment_activity_post_delete(sender, instance, **kwargs):
+    record_activity(instance.user_id, activity_day(instance.created_at), investment_deltas(instance.amount, -1))
@@ -1,18 +1,24 @@
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
+from rest_framework.test import APIClient
 
 from transactions.services import (
     approve_transaction,
+    bulk_approve_transactions,
+    bulk_reject_transactions,
     create_transaction,
     reject_transaction,
 )
 from users.models import UserWallet
 
-from .models import AdminAuditLog, Transaction
+from .ledger import get_ledger_summary
+from .models import AdminAuditLog, Transaction, UserDailyActivity, UserLedgerSummary
 
 
 class TransactionServiceRejectionTests(TestCase):
@@ -94,6 +100,324 @@ class TransactionCreationValidationTests(TestCase):
 
 
 
+class UserLedgerSummaryTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="ledgeruser", email="ledger@example.com", password="pass12345"
+        )
+        self.admin = User.objects.create_user(
+            username="ledgeradmin", email="ledgeradmin@example.com", password="pass12345", is_staff=True
+        )
+
+    def _ledger(self):
+        return UserLedgerSummary.objects.get(user=self.user)
+
+    def test_services_keep_ledger_in_step(self):
+        from investments.models import DailyRoiPayout, InvestmentPlan
+        from investments.services import (
+            approve_investment,
+            complete_expired_investments,
+            create_investment,
+            credit_roi_payout,
+        )
+
+        approve_transaction(create_transaction(self.user, "deposit", 1000, "Ledger dep"), self.admin)
+        self.assertEqual(self._ledger().deposits_total, Decimal("1000.00"))
+
+        plan = InvestmentPlan.objects.create(
+            name="LedgerPlan",
+            description="Ledger",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        inv = approve_investment(create_investment(self.user, plan, Decimal("400")), self.admin)
+        self.assertEqual(self._ledger().invested_principal, Decimal("400.00"))
+
+        payout = DailyRoiPayout.objects.create(
+            investment=inv, payout_date=inv.started_at.date(), amount=Decimal("4.00")
+        )
+        credit_roi_payout(payout)
+        self.assertEqual(self._ledger().locked_profit, Decimal("4.00"))
+
+        type(inv).objects.filter(pk=inv.pk).update(ends_at=inv.started_at)
+        complete_expired_investments(notify=False)
+        ledger = self._ledger()
+        self.assertEqual(ledger.invested_principal, Decimal("0.00"))
+        self.assertEqual(ledger.locked_profit, Decimal("0.00"))
+        self.assertEqual(ledger.withdrawable_profit, Decimal("4.00"))
+
+        # Incremental totals match a full rebuild.
+        UserLedgerSummary.objects.all().delete()
+        rebuilt = get_ledger_summary(self.user)
+        for field in ("deposits_total", "invested_principal", "locked_profit", "withdrawable_profit"):
+            self.assertEqual(getattr(rebuilt, field), getattr(ledger, field))
+
+    def test_reconcile_repairs_drift(self):
+        approve_transaction(create_transaction(self.user, "deposit", 250, "Drift dep"), self.admin)
+        UserLedgerSummary.objects.filter(user=self.user).update(deposits_total=Decimal("1.00"))
+
+        call_command("reconcile_ledger", dry_run=True)
+        self.assertEqual(self._ledger().deposits_total, Decimal("1.00"))
+
+        call_command("reconcile_ledger")
+        self.assertEqual(self._ledger().deposits_total, Decimal("250.00"))
+
+    def test_wallet_endpoint_reads_ledger(self):
+        approve_transaction(create_transaction(self.user, "deposit", 300, "Wallet dep"), self.admin)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        resp = client.get(reverse("api-wallet"))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(Decimal(str(resp.json()["total_deposits"])), Decimal("300.00"))
+
+
+
+class WithdrawableProfitTests(TestCase):
+    def setUp(self):
+        from investments.models import InvestmentPlan
+        from investments.services import approve_investment, create_investment
+
+        from .models import VirtualCard
+
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="wdprofit", email="wdprofit@example.com", password="pass12345"
+        )
+        self.admin = User.objects.create_user(
+            username="wdprofitadmin", email="wdprofitadmin@example.com", password="pass12345", is_staff=True
+        )
+        UserWallet.objects.filter(user=self.user).update(balance=Decimal("1000"))
+        VirtualCard.objects.create(user=self.user, status="active")
+        plan = InvestmentPlan.objects.create(
+            name="WdPlan",
+            description="Withdrawable",
+            daily_roi=Decimal("1.00"),
+            duration_days=14,
+            min_amount=Decimal("100"),
+            max_amount=Decimal("1000"),
+        )
+        self.inv = approve_investment(create_investment(self.user, plan, Decimal("500")), self.admin)
+
+    def _credit(self, *amounts):
+        from datetime import timedelta
+
+        from investments.models import DailyRoiPayout
+        from investments.services import bulk_credit_roi_payouts, credit_roi_payout
+
+        day = self.inv.started_at.date()
+        first, *rest = amounts
+        credit_roi_payout(DailyRoiPayout.objects.create(investment=self.inv, payout_date=day, amount=first))
+        bulk_credit_roi_payouts(
+            (self.inv.id, day + timedelta(days=i + 1), amount) for i, amount in enumerate(rest)
+        )
+
+    def _expire(self):
+        from django.utils import timezone
+
+        type(self.inv).objects.filter(pk=self.inv.pk).update(ends_at=timezone.now())
+        self.inv.refresh_from_db()
+
+    def test_payouts_and_withdrawals_track_profit(self):
+        self._credit(Decimal("5.00"), Decimal("5.00"), Decimal("5.00"))
+        self.inv.refresh_from_db()
+        self.assertEqual(self.inv.profit_earned, Decimal("15.00"))
+        self.assertEqual(self.inv.withdrawable_profit, Decimal("0.00"))  # plan still running
+        with self.assertRaises(ValidationError):
+            create_transaction(self.user, "withdrawal", Decimal("5"), "WD-early", investment=self.inv)
+
+        self._expire()
+        self.assertEqual(self.inv.withdrawable_profit, Decimal("15.00"))
+        first = create_transaction(self.user, "withdrawal", Decimal("10"), "WD-1", investment=self.inv)
+        # A double submit for more than what is left is refused and writes nothing.
+        with self.assertRaises(ValidationError):
+            create_transaction(self.user, "withdrawal", Decimal("10"), "WD-2", investment=self.inv)
+        self.assertFalse(Transaction.objects.filter(reference="WD-2").exists())
+        self.inv.refresh_from_db()
+        self.assertEqual(self.inv.withdrawable_profit, Decimal("5.00"))
+
+        reject_transaction(first, self.admin)
+        self.inv.refresh_from_db()
+        self.assertEqual(self.inv.withdrawable_profit, Decimal("15.00"))
+
+        second = create_transaction(self.user, "withdrawal", Decimal("15"), "WD-3", investment=self.inv)
+        bulk_reject_transactions([second.id], self.admin)
+        self.inv.refresh_from_db()
+        self.assertEqual(self.inv.profit_withdrawn, Decimal("0.00"))
+
+    def test_api_validates_against_investment_totals(self):
+        self._credit(Decimal("8.00"))
+        self._expire()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = {"tx_type": "withdrawal", "investment_id": self.inv.id, "reference": "WD-API-1"}
+
+        resp = client.post("/api/transactions/", {**payload, "amount": "9.00"}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("Available: 8.00", resp.json()["amount"][0])
+
+        resp = client.post("/api/transactions/", {**payload, "amount": "8.00"}, format="json")
+        self.assertEqual(resp.status_code, 201)
+        resp = client.post(
+            "/api/transactions/", {**payload, "amount": "8.00", "reference": "WD-API-2"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_reconcile_repairs_investment_totals(self):
+        self._credit(Decimal("4.00"), Decimal("6.00"))
+        type(self.inv).objects.filter(pk=self.inv.pk).update(profit_earned=Decimal("0"), profit_withdrawn=Decimal("3"))
+
+        call_command("reconcile_ledger")
+        self.inv.refresh_from_db()
+        self.assertEqual((self.inv.profit_earned, self.inv.profit_withdrawn), (Decimal("10.00"), Decimal("0.00")))
+
+
+class UserDailyActivityTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="activityuser", email="activity@example.com", password="pass12345"
+        )
+
+    def test_rollup_tracks_creates_edits_and_deletes(self):
+        deposit = Transaction.objects.create(
+            user=self.user, tx_type="deposit", amount=Decimal("100.00"), reference="ACT-1"
+        )
+        Transaction.objects.create(
+            user=self.user, tx_type="withdrawal", amount=Decimal("40.00"), reference="ACT-2"
+        )
+        row = UserDailyActivity.objects.get(user=self.user)
+        self.assertEqual((row.tx_count, row.deposit_count, row.withdrawal_count), (2, 1, 1))
+        self.assertEqual(row.deposit_amount, Decimal("100.00"))
+
+        deposit.amount = Decimal("150.00")
+        deposit.save()
+        row.refresh_from_db()
+        self.assertEqual(row.deposit_amount, Decimal("150.00"))
+        self.assertEqual(row.tx_count, 2)
+
+        deposit.delete()
+        row.refresh_from_db()
+        self.assertEqual((row.tx_count, row.deposit_count), (1, 0))
+        self.assertEqual(row.deposit_amount, Decimal("0.00"))
+
+    def test_backfill_rebuilds_from_history(self):
+        Transaction.objects.bulk_create(
+            [
+                Transaction(user=self.user, tx_type="profit", amount=Decimal("2.50"), reference=f"ACT-B{n}")
+                for n in range(4)
+            ]
+        )
+        UserDailyActivity.objects.all().delete()
+
+        call_command("backfill_daily_activity")
+
+        row = UserDailyActivity.objects.get(user=self.user)
+        self.assertEqual((row.tx_count, row.profit_count), (4, 4))
+        self.assertEqual(row.profit_amount, Decimal("10.00"))
+
+
+
+class BulkTransactionDecisionTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f"bulkdec{n}", email=f"bulkdec{n}@example.com", password="pass12345")
+            for n in range(2)
+        ]
+        self.admin = User.objects.create_user(
+            username="bulkdecadmin", email="bulkdecadmin@example.com", password="pass12345", is_staff=True
+        )
+
+    def _pending(self, user, tx_type, amount, n):
+        return Transaction.objects.create(
+            user=user, tx_type=tx_type, amount=Decimal(amount), reference=f"BULK-{tx_type}-{n}-{user.pk}"
+        )
+
+    def test_bulk_approve_applies_grouped_deltas_and_reports_row_errors(self):
+        from core.models import EmailOutbox
+        from users.models import UserNotification
+
+        a, b = self.users
+        ids = [
+            self._pending(a, "deposit", "100.00", 1).id,
+            self._pending(a, "deposit", "50.00", 2).id,
+            self._pending(b, "deposit", "30.00", 3).id,
+            self._pending(b, "withdrawal", "500.00", 4).id,  # more than b will have
+        ]
+        done = self._pending(a, "deposit", "5.00", 5)
+        approve_transaction(done, self.admin)
+
+        with patch("referrals.tasks.process_deposit_referral") as referral:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = bulk_approve_transactions([*ids, done.id], self.admin, "Batch")
+
+        self.assertEqual(len(result.processed), 3)
+        self.assertIn(str(ids[3]), result.errors)
+        self.assertIn("Insufficient funds", result.errors[str(ids[3])])
+        self.assertIn(str(done.id), result.errors)
+        self.assertEqual(UserWallet.objects.get(user=a).balance, Decimal("155.00"))
+        self.assertEqual(UserWallet.objects.get(user=b).balance, Decimal("30.00"))
+        self.assertEqual(Transaction.objects.get(id=ids[3]).status, "pending")
+        self.assertEqual(get_ledger_summary(a).deposits_total, Decimal("155.00"))
+        self.assertEqual(
+            AdminAuditLog.objects.filter(action="approve", entity_id__in=[str(i) for i in ids]).count(), 3
+        )
+        self.assertEqual(
+            UserNotification.objects.filter(notification_type="deposit_approved", user__in=self.users).count(),
+            4,  # three from the batch plus the single approval
+        )
+        self.assertEqual(EmailOutbox.objects.filter(kind="transaction_status").count(), 3)
+        self.assertEqual(referral.call_count, 3)
+
+    def test_bulk_reject_leaves_wallets_alone(self):
+        ids = [self._pending(self.users[0], "deposit", "10.00", n).id for n in range(3)]
+
+        result = bulk_reject_transactions(ids, self.admin, "No proof")
+
+        self.assertEqual(len(result.processed), 3)
+        self.assertFalse(result.errors)
+        self.assertEqual(set(Transaction.objects.filter(id__in=ids).values_list("status", flat=True)), {"rejected"})
+        self.assertEqual(UserWallet.objects.get(user=self.users[0]).balance, Decimal("0.00"))
+
+    def test_bulk_decisions_refresh_unread_counts_and_publish(self):
+        from django.core.cache import cache
+
+        from users.notification_service import get_unread_count, notification_channel
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = self.users[0]
+        self.assertEqual(get_unread_count(user), 0)
+        ids = [self._pending(user, "deposit", "10.00", n).id for n in range(2)]
+
+        with patch("core.pubsub.publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                bulk_reject_transactions(ids, self.admin, "No proof")
+
+        self.assertEqual(get_unread_count(user), 2)
+        self.assertEqual([call.args[0] for call in publish.call_args_list], [notification_channel(user.pk)] * 2)
+
+    def test_query_count_is_independent_of_batch_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for user in self.users:
+            get_ledger_summary(user)
+
+        def run(count):
+            ids = [self._pending(self.users[n % 2], "deposit", "1.00", f"{count}-{n}").id for n in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                bulk_approve_transactions(ids, self.admin)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(4), run(40))
+
+
+
 
 # Template-based view tests removed - all transaction functionality now available via API
 # See api/views.py for TransactionViewSet and api/tests.py for API tests
@@ -5,12 +5,20 @@ Usage:
     python manage.py send_email --to user@example.com --subject "Test" --message "Hello"
     python manage.py send_email --to-all-users --subject "Announcement" --message "Important update"
     python manage.py send_email --to-file emails.txt --subject "News" --message "Newsletter"
+
+Sends go through core.bulk_email (worker pool, rate limit, retries on 429/5xx).
+Progress is saved under a campaign name derived from the subject, message and
+recipients (or --campaign), so re-running an interrupted send resumes it.
 """
 
+import hashlib
+
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.core.management.base import BaseCommand
 
+from core.bulk_email import queryset_source, send_bulk, sequence_source, stop_on_signals
+from core.models import BulkEmailRun
 from users.models import User
 
 
@@ -51,6 +59,29 @@ class Command(BaseCommand):
             default=None,
             help='From email address (optional, uses DEFAULT_FROM_EMAIL if not set)'
         )
+        parser.add_argument(
+            '--campaign',
+            type=str,
+            default=None,
+            help='Name to save progress under (default: derived from subject, message and recipients)'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Send to every recipient again instead of resuming the saved campaign'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Concurrent senders (default: BULK_EMAIL_WORKERS)'
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=None,
+            help='Provider requests per second (default: BULK_EMAIL_RATE_PER_SECOND)'
+        )
 
     def handle(self, *args, **options):
         subject = options['subject']
@@ -58,20 +89,26 @@ class Command(BaseCommand):
         from_email = options['from_email']
 
         recipients = []
+        source = None
 
         # Determine recipients
         if options['to']:
             recipients = [options['to']]
+            target = f"to:{options['to']}"
             self.stdout.write(f"Sending to single recipient: {options['to']}")
 
         elif options['to_all_users']:
-            recipients = list(User.objects.filter(is_active=True).values_list('email', flat=True))
-            self.stdout.write(f"Sending to all {len(recipients)} active users")
+            # Walked by id, so a resumed send picks up users in the same order
+            users = User.objects.filter(is_active=True).exclude(email='').values('id', 'email')
+            source = queryset_source(users, key='id')
+            target = "all-users"
+            self.stdout.write(f"Sending to all {users.count()} active users")
 
         elif options['to_file']:
             try:
                 with open(options['to_file']) as f:
                     recipients = [line.strip() for line in f if line.strip()]
+                target = f"file:{options['to_file']}"
                 self.stdout.write(f"Loaded {len(recipients)} email(s) from {options['to_file']}")
             except FileNotFoundError:
                 self.stdout.write(self.style.ERROR(f"File not found: {options['to_file']}"))
@@ -81,10 +118,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR("Please specify recipients using --to, --to-all-users, or --to-file"))
             return
 
-        if not recipients:
+        total = users.count() if source is not None else len(recipients)
+        if not total:
             self.stdout.write(self.style.WARNING("No recipients found"))
             return
 
+        campaign = options['campaign'] or "send_email:" + hashlib.sha256(
+            "\n".join([subject, message, from_email or "", target]).encode()
+        ).hexdigest()[:16]
+        previous = BulkEmailRun.objects.filter(name=campaign).first()
+
         self.stdout.write("\nEmail configuration:")
         self.stdout.write(f"  EMAIL_BACKEND: {getattr(settings, 'EMAIL_BACKEND', '(not set)')}")
         self.stdout.write(f"  DEFAULT_FROM_EMAIL: {getattr(settings, 'DEFAULT_FROM_EMAIL', '(not set)')}")
@@ -97,58 +140,88 @@ class Command(BaseCommand):
             )
 
         # Confirm before sending
-        self.stdout.write(self.style.WARNING(f"\nAbout to send email to {len(recipients)} recipient(s):"))
+        self.stdout.write(self.style.WARNING(f"\nAbout to send email to {total} recipient(s):"))
         self.stdout.write(f"Subject: {subject}")
         self.stdout.write(f"Message: {message[:100]}...")
 
+        self.stdout.write(f"Campaign: {campaign}")
+        if previous and not options['restart']:
+            if previous.status == BulkEmailRun.STATUS_COMPLETED:
+                self.stdout.write(
+                    self.style.WARNING("This campaign already completed; use --restart to send it again.")
+                )
+                return
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Resuming: {previous.sent} sent and {previous.failed} failed in earlier runs."
+                )
+            )
+
         confirm = input("\nProceed? (yes/no): ")
         if confirm.lower() != 'yes':
             self.stdout.write(self.style.WARNING("Email sending cancelled"))
             return
 
-        # Send emails
+        # Send emails (concurrent, rate limited, batched when the backend supports it)
         success_count = 0
         failed = []
+        sender = from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', None)
+
+        def build(item):
+            email = item['email'] if isinstance(item, dict) else item
+            return EmailMultiAlternatives(subject=subject, body=message, from_email=sender, to=[email])
+
+        def report(key, item, msg, sent):
+            nonlocal success_count
+            email = item['email'] if isinstance(item, dict) else item
+            if not sent:
+                failed.append((email, "rejected by the email backend (see logs)"))
+                self.stdout.write(self.style.ERROR(f"✗ Failed to send to {email}"))
+                return
 
-        for email in recipients:
-            try:
-                msg = EmailMultiAlternatives(
-                    subject=subject,
-                    body=message,
-                    from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-                    to=[email],
+            anymail_id = None
+            anymail_status = getattr(msg, "anymail_status", None)
+            if anymail_status is not None:
+                anymail_id = getattr(anymail_status, "message_id", None) or getattr(
+                    anymail_status, "id", None
                 )
-                msg.send(fail_silently=False)
-
-                anymail_id = None
-                anymail_status = getattr(msg, "anymail_status", None)
-                if anymail_status is not None:
-                    anymail_id = getattr(anymail_status, "message_id", None) or getattr(
-                        anymail_status, "id", None
-                    )
-                    if not anymail_id:
-                        recipients_status = getattr(anymail_status, "recipients", None)
-                        if isinstance(recipients_status, dict):
-                            rec = recipients_status.get(email)
-                            if rec is not None:
-                                anymail_id = getattr(rec, "message_id", None) or getattr(rec, "id", None)
-
-                resend_id = getattr(msg, 'resend_id', None)
-                if not resend_id:
-                    headers = getattr(msg, 'extra_headers', None) or {}
-                    if isinstance(headers, dict):
-                        resend_id = headers.get('X-Resend-Id')
-
-                success_count += 1
-                if resend_id:
-                    self.stdout.write(f"✓ Sent to {email} (Resend id: {resend_id})")
-                elif anymail_id:
-                    self.stdout.write(f"✓ Sent to {email} (Anymail message id: {anymail_id})")
-                else:
-                    self.stdout.write(f"✓ Sent to {email}")
-            except Exception as e:
-                failed.append((email, str(e)))
-                self.stdout.write(self.style.ERROR(f"✗ Failed to send to {email}: {e}"))
+                if not anymail_id:
+                    recipients_status = getattr(anymail_status, "recipients", None)
+                    if isinstance(recipients_status, dict):
+                        rec = recipients_status.get(email)
+                        if rec is not None:
+                            anymail_id = getattr(rec, "message_id", None) or getattr(rec, "id", None)
+
+            resend_id = getattr(msg, 'resend_id', None)
+            if not resend_id:
+                headers = getattr(msg, 'extra_headers', None) or {}
+                if isinstance(headers, dict):
+                    resend_id = headers.get('X-Resend-Id')
+
+            success_count += 1
+            if resend_id:
+                self.stdout.write(f"✓ Sent to {email} (Resend id: {resend_id})")
+            elif anymail_id:
+                self.stdout.write(f"✓ Sent to {email} (Anymail message id: {anymail_id})")
+            else:
+                self.stdout.write(f"✓ Sent to {email}")
+
+        with stop_on_signals() as stop:
+            stats = send_bulk(
+                source or sequence_source(recipients),
+                build,
+                name=campaign,
+                restart=options['restart'],
+                max_workers=options['workers'],
+                rate=options['rate'],
+                stop=stop,
+                on_result=report,
+            )
+
+        if not stats.completed:
+            self.stdout.write(
+                self.style.WARNING("\n⏸ Stopped before the end; run the same command again to resume.")
+            )
 
         # Summary
         self.stdout.write(self.style.SUCCESS(f"\n✅ Successfully sent {success_count} email(s)"))
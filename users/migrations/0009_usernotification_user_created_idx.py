@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_add_kyc_document_types'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['user', '-created_at'], name='users_notif_user_created_idx'),
+        ),
+    ]
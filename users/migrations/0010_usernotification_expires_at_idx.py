@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_usernotification_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['expires_at'], name='users_notif_expires_f9a864_idx'),
+        ),
+    ]
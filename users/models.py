@@ -179,10 +179,13 @@ class UserNotification(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["user", "is_read"]),
+            # Keyset-paginated feed: WHERE user = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["user", "-created_at"], name="users_notif_user_created_idx"),
             models.Index(fields=["notification_type"]),
             models.Index(fields=["created_at"]),
             models.Index(fields=["is_read"]),
             models.Index(fields=["priority"]),
+            models.Index(fields=["expires_at"]),
         ]
 
 
@@ -3,13 +3,22 @@ User Notification Service
 Handles creating and managing notifications for regular users
 """
 
+import logging
+import time
+from dataclasses import dataclass
 from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q
 from django.utils import timezone
 
 from .models import UserNotification
 
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
 
@@ -41,9 +50,37 @@ def create_user_notification(
     Returns:
         UserNotification instance
     """
+    notification = build_user_notification(
+        user=user,
+        notification_type=notification_type,
+        title=title,
+        message=message,
+        priority=priority,
+        action_url=action_url,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        expires_in_days=expires_in_days,
+    )
+    notification.save()
+
+    return notification
+
+
+def build_user_notification(
+    user,
+    notification_type,
+    title,
+    message,
+    priority="medium",
+    action_url="",
+    entity_type="",
+    entity_id=None,
+    expires_in_days=30,
+):
+    """Return an unsaved UserNotification (for ``bulk_create`` callers)."""
     expires_at = timezone.now() + timedelta(days=expires_in_days) if expires_in_days else None
 
-    notification = UserNotification.objects.create(
+    return UserNotification(
         user=user,
         notification_type=notification_type,
         title=title,
@@ -55,8 +92,6 @@ def create_user_notification(
         expires_at=expires_at,
     )
 
-    return notification
-
 
 def get_user_notifications(user, unread_only=False, limit=None):
     """
@@ -81,17 +116,105 @@ def get_user_notifications(user, unread_only=False, limit=None):
     return notifications
 
 
+# Per-user unread counter, adjusted with atomic incr/decr after commit. The
+# cache is per process, so writes made by other workers or by cron jobs only
+# show up once NOTIFICATION_CACHE_SECONDS expires.
+
+
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def _apply_unread_delta(user_id, delta):
+    key = _unread_key(user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        # Not cached; the next read recounts.
+        value = None
+    if value is not None and value < 0:
+        cache.delete(key)
+
+
+def notification_changed(user_id, unread_delta=0):
+    """Adjust ``user_id``'s cached unread count once the transaction commits."""
+    transaction.on_commit(lambda: _apply_unread_delta(user_id, unread_delta))
+
+
+def invalidate_notification_caches(user_ids):
+    """Drop cached unread counters (after bulk inserts/deletes)."""
+    keys = [_unread_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def notification_channel(user_id):
+    """Pub/sub channel carrying ``user_id``'s new notifications."""
+    return f"user-notifications:{user_id}"
+
+
+def serialize_notification(notification):
+    """Stream payload; same fields as the REST feed."""
+    return {
+        "id": str(notification.id),
+        "notification_type": notification.notification_type,
+        "title": notification.title,
+        "message": notification.message,
+        "action_url": notification.action_url,
+        "entity_type": notification.entity_type,
+        "entity_id": notification.entity_id,
+        "priority": notification.priority,
+        "is_read": notification.is_read,
+        "read_at": notification.read_at.isoformat() if notification.read_at else None,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        "expires_at": notification.expires_at.isoformat() if notification.expires_at else None,
+    }
+
+
+def publish_notification(notification):
+    """Push ``notification`` to the user's open streams once it is committed."""
+    from core.pubsub import publish
+
+    payload = serialize_notification(notification)
+    channel = notification_channel(notification.user_id)
+    transaction.on_commit(lambda: publish(channel, payload))
+
+
+def notification_feed_state(user_id):
+    """Token that changes whenever ``user_id``'s feed changes, read from the database.
+
+    Row and unread counts catch inserts, deletes and reads; the newest
+    ``created_at`` and ``read_at`` catch a delete paired with an insert.
+    """
+    state = UserNotification.objects.filter(user_id=user_id).aggregate(
+        total=Count("id"),
+        unread=Count("id", filter=Q(is_read=False)),
+        newest=Max("created_at"),
+        last_read=Max("read_at"),
+    )
+    return "|".join(str(state[key]) for key in ("total", "unread", "newest", "last_read"))
+
+
 def get_unread_count(user):
-    """Get count of unread notifications for a user."""
-    return UserNotification.objects.filter(user=user, is_read=False).count()
+    """Get count of unread notifications for a user (cached)."""
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = UserNotification.objects.filter(user=user, is_read=False).count()
+        # add() so a concurrent incr/decr is never overwritten
+        cache.add(key, count, timeout=getattr(settings, "NOTIFICATION_CACHE_SECONDS", 60))
+    return count
 
 
 def mark_notification_read(notification_id, user):
     """Mark a specific notification as read."""
+    updated = UserNotification.objects.filter(id=notification_id, user=user, is_read=False).update(
+        is_read=True, read_at=timezone.now()
+    )
+    if updated:
+        notification_changed(user.pk, -updated)
     try:
-        notification = UserNotification.objects.get(id=notification_id, user=user)
-        notification.mark_as_read()
-        return notification
+        return UserNotification.objects.get(id=notification_id, user=user)
     except UserNotification.DoesNotExist:
         return None
 
@@ -101,20 +224,107 @@ def mark_all_read(user):
     count = UserNotification.objects.filter(user=user, is_read=False).update(
         is_read=True, read_at=timezone.now()
     )
+    if count:
+        notification_changed(user.pk, -count)
     return count
 
 
 def delete_expired_notifications():
-    """Delete all expired notifications (cleanup task)."""
-    count = UserNotification.objects.filter(expires_at__lt=timezone.now()).delete()[0]
-    return count
+    """Delete all expired notifications (cleanup task), in bounded batches."""
+    from core.retention import run_retention
+
+    report = run_retention(policies=["user_notifications"], time_budget=None)
+    return report.deleted
+
+
+@dataclass
+class BulkNotifyResult:
+    """Outcome of a ``bulk_notify`` fan-out."""
+
+    created: int = 0
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.created / self.elapsed_seconds if self.elapsed_seconds else float(self.created)
+
+
+def bulk_notify(
+    users_queryset,
+    notification_type,
+    title,
+    message,
+    priority="medium",
+    action_url="",
+    entity_type="",
+    entity_id=None,
+    expires_in_days=30,
+    chunk_size=5000,
+):
+    """
+    Send the same notification to every user in ``users_queryset``.
+
+    User ids are paged by primary key (no long-lived cursor), and each page
+    becomes one ``bulk_create``. Every row shares a single ``expires_at``.
+    Intended for system-wide events such as maintenance notices, plan
+    changes and announcements.
+
+    Returns:
+        BulkNotifyResult with the row count, chunk count and elapsed time
+    """
+    started = time.monotonic()
+    expires_at = timezone.now() + timedelta(days=expires_in_days) if expires_in_days else None
+    entity_id = str(entity_id) if entity_id else ""
+    result = BulkNotifyResult()
+
+    ids = users_queryset.order_by("pk").values_list("pk", flat=True)
+    last_id = None
+    while True:
+        page = ids.filter(pk__gt=last_id) if last_id is not None else ids
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            break
+        UserNotification.objects.bulk_create(
+            [
+                UserNotification(
+                    user_id=user_id,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                    priority=priority,
+                    action_url=action_url,
+                    entity_type=entity_type,
+                    entity_id=entity_id,
+                    expires_at=expires_at,
+                )
+                for user_id in chunk
+            ],
+            batch_size=chunk_size,
+        )
+        invalidate_notification_caches(chunk)
+        result.created += len(chunk)
+        result.chunks += 1
+        last_id = chunk[-1]
+        if len(chunk) < chunk_size:
+            break
+
+    result.elapsed_seconds = time.monotonic() - started
+    logger.info(
+        "bulk_notify %s: %d notifications in %d chunks (%.2fs, %.0f/s)",
+        notification_type,
+        result.created,
+        result.chunks,
+        result.elapsed_seconds,
+        result.per_second,
+    )
+    return result
 
 
 # Specific notification creators for common events
 
 
-def notify_deposit_approved(user, transaction, admin_notes=""):
-    """Notify user that their deposit was approved."""
+def _deposit_approved_notification(user, transaction, admin_notes=""):
     from urllib.parse import urlencode
     
     message = f"Your deposit of ${transaction.amount} has been approved and added to your wallet."
@@ -131,7 +341,7 @@ def notify_deposit_approved(user, transaction, admin_notes=""):
     }
     action_url = f"/dashboard/checkout/success?{urlencode(params)}"
 
-    return create_user_notification(
+    return build_user_notification(
         user=user,
         notification_type="deposit_approved",
         title="Deposit Approved",
@@ -143,13 +353,19 @@ def notify_deposit_approved(user, transaction, admin_notes=""):
     )
 
 
-def notify_deposit_rejected(user, transaction, reason=""):
-    """Notify user that their deposit was rejected."""
+def notify_deposit_approved(user, transaction, admin_notes=""):
+    """Notify user that their deposit was approved."""
+    notification = _deposit_approved_notification(user, transaction, admin_notes)
+    notification.save()
+    return notification
+
+
+def _deposit_rejected_notification(user, transaction, reason=""):
     message = f"Your deposit request of ${transaction.amount} has been rejected."
     if reason:
         message += f"\n\nReason: {reason}"
 
-    return create_user_notification(
+    return build_user_notification(
         user=user,
         notification_type="deposit_rejected",
         title="Deposit Rejected",
@@ -161,8 +377,14 @@ def notify_deposit_rejected(user, transaction, reason=""):
     )
 
 
-def notify_withdrawal_approved(user, transaction, admin_notes=""):
-    """Notify user that their withdrawal was approved."""
+def notify_deposit_rejected(user, transaction, reason=""):
+    """Notify user that their deposit was rejected."""
+    notification = _deposit_rejected_notification(user, transaction, reason)
+    notification.save()
+    return notification
+
+
+def _withdrawal_approved_notification(user, transaction, admin_notes=""):
     from urllib.parse import urlencode
     
     message = f"Your withdrawal request of ${transaction.amount} has been approved and processed."
@@ -179,7 +401,7 @@ def notify_withdrawal_approved(user, transaction, admin_notes=""):
     }
     action_url = f"/dashboard/checkout/success?{urlencode(params)}"
 
-    return create_user_notification(
+    return build_user_notification(
         user=user,
         notification_type="withdrawal_approved",
         title="Withdrawal Approved",
@@ -191,13 +413,19 @@ def notify_withdrawal_approved(user, transaction, admin_notes=""):
     )
 
 
-def notify_withdrawal_rejected(user, transaction, reason=""):
-    """Notify user that their withdrawal was rejected."""
+def notify_withdrawal_approved(user, transaction, admin_notes=""):
+    """Notify user that their withdrawal was approved."""
+    notification = _withdrawal_approved_notification(user, transaction, admin_notes)
+    notification.save()
+    return notification
+
+
+def _withdrawal_rejected_notification(user, transaction, reason=""):
     message = f"Your withdrawal request of ${transaction.amount} has been rejected."
     if reason:
         message += f"\n\nReason: {reason}"
 
-    return create_user_notification(
+    return build_user_notification(
         user=user,
         notification_type="withdrawal_rejected",
         title="Withdrawal Rejected",
@@ -209,6 +437,40 @@ def notify_withdrawal_rejected(user, transaction, reason=""):
     )
 
 
+def notify_withdrawal_rejected(user, transaction, reason=""):
+    """Notify user that their withdrawal was rejected."""
+    notification = _withdrawal_rejected_notification(user, transaction, reason)
+    notification.save()
+    return notification
+
+
+def notify_transaction_decisions(transactions, decision, notes=""):
+    """Bulk in-app notifications for approved/rejected transactions (one INSERT).
+
+    Mirrors the per-row notify_* calls made by approve_transaction /
+    reject_transaction; ``transactions`` should have ``user__profile`` loaded.
+    ``bulk_create`` skips the post_save signal, so the cache invalidation and
+    stream publish it would do happen here.
+    """
+    builders = {
+        ("approved", "deposit"): _deposit_approved_notification,
+        ("approved", "manual_credit"): _deposit_approved_notification,
+        ("approved", "withdrawal"): _withdrawal_approved_notification,
+        ("rejected", "deposit"): _deposit_rejected_notification,
+        ("rejected", "withdrawal"): _withdrawal_rejected_notification,
+    }
+    notifications = []
+    for txn in transactions:
+        builder = builders.get((decision, txn.tx_type))
+        if builder:
+            notifications.append(builder(txn.user, txn, notes))
+    created = UserNotification.objects.bulk_create(notifications)
+    invalidate_notification_caches(n.user_id for n in created)
+    for notification in created:
+        publish_notification(notification)
+    return created
+
+
 def notify_investment_approved(user, investment, admin_notes=""):
     """Notify user that their investment was approved."""
     from urllib.parse import urlencode
@@ -257,11 +519,10 @@ def notify_investment_rejected(user, investment, reason=""):
     )
 
 
-def notify_investment_completed(user, investment):
-    """Notify user that their investment has completed."""
+def _investment_completed_notification(user, investment):
     message = f"Your investment in the {investment.plan.name} plan has completed! Total returns: ${investment.total_return}."
 
-    return create_user_notification(
+    return build_user_notification(
         user=user,
         notification_type="investment_completed",
         title="Investment Completed",
@@ -273,6 +534,26 @@ def notify_investment_completed(user, investment):
     )
 
 
+def notify_investment_completed(user, investment):
+    """Notify user that their investment has completed."""
+    notification = _investment_completed_notification(user, investment)
+    notification.save()
+    return notification
+
+
+def notify_investments_completed(investments):
+    """Bulk variant of notify_investment_completed (one INSERT for all rows).
+
+    ``investments`` should have ``user`` and ``plan`` already loaded.
+    """
+    notifications = [_investment_completed_notification(inv.user, inv) for inv in investments]
+    created = UserNotification.objects.bulk_create(notifications)
+    invalidate_notification_caches(n.user_id for n in created)
+    for notification in created:
+        publish_notification(notification)
+    return created
+
+
 def notify_welcome(user):
     """Send welcome notification to new user."""
     message = "Welcome to WolvCapital! Your account has been successfully created. Start exploring our investment plans and begin your journey to financial growth."
@@ -3,7 +3,7 @@ from django.contrib.auth.models import Group, Permission
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from .models import Profile, UserWallet
+from .models import Profile, UserNotification, UserWallet
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -75,3 +75,20 @@ def sync_admin_privileges(sender, instance: Profile, **kwargs):
         if user.is_staff and not user.is_superuser:
             user.is_staff = False
             user.save(update_fields=["is_staff"])
+
+
+@receiver(post_save, sender=UserNotification)
+def refresh_notification_caches(sender, instance: UserNotification, created, **kwargs):
+    """Keep the cached unread counter and feed ETag in step with saves, and
+    push new notifications to open streams."""
+    from .notification_service import (
+        invalidate_notification_caches,
+        notification_changed,
+        publish_notification,
+    )
+
+    if created:
+        notification_changed(instance.user_id, 0 if instance.is_read else 1)
+        publish_notification(instance)
+    else:
+        invalidate_notification_caches([instance.user_id])
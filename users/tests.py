@@ -53,6 +53,37 @@ class NotificationViewsTests(TestCase):
         self.assertEqual(data["count"], self.initial_unread + 2)
 
 
+
+class BulkNotifyTests(TestCase):
+    def test_fans_out_in_chunks_with_shared_expiry(self):
+        from users.notification_service import bulk_notify
+
+        User = get_user_model()
+        User.objects.bulk_create(
+            [User(username=f"bulk{i}", email=f"bulk{i}@example.com") for i in range(250)]
+        )
+        User.objects.create_user(username="inactive", email="inactive@example.com", is_active=False)
+        UserNotification.objects.all().delete()
+
+        # 5 id pages + 5 INSERTs; the final short page ends the loop
+        with self.assertNumQueries(10):
+            result = bulk_notify(
+                User.objects.filter(is_active=True),
+                "system_alert",
+                "Maintenance",
+                "Scheduled maintenance tonight.",
+                chunk_size=60,
+            )
+
+        self.assertEqual(result.created, 250)
+        self.assertEqual(result.chunks, 5)
+        self.assertGreater(result.per_second, 0)
+        rows = UserNotification.objects.filter(title="Maintenance")
+        self.assertEqual(rows.count(), 250)
+        self.assertFalse(rows.filter(user__is_active=False).exists())
+        self.assertEqual(rows.values("expires_at").distinct().count(), 1)
+
+
 from django.test import TestCase
 
 # Create your tests here.
@@ -2,6 +2,8 @@
 ASGI config for wolvcapital project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Long-lived responses such as the notification SSE stream
+(``/api/notifications/stream/``) need to be served through this app.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -139,11 +139,16 @@ CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
     "dnt",
+    "idempotency-key",
+    "if-none-match",
     "origin",
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
 ]
+# Notification feed: conditional GET and keyset cursor headers; replayed
+# Idempotency-Key responses are flagged with Idempotent-Replayed.
+CORS_EXPOSE_HEADERS = ["etag", "x-next-cursor", "idempotent-replayed"]
 
 # Trust Render's TLS termination
 USE_X_FORWARDED_HOST = True
@@ -242,6 +247,39 @@ ALERT_THRESHOLDS = {
     "high_roi_payout": _int_env("ALERT_THRESHOLD_HIGH_ROI_PAYOUT", 5000),
 }
 
+# Per-user dashboard analytics snapshots; also invalidated on every change
+# to the user's transactions/investments, so this is only an upper bound.
+DASHBOARD_ANALYTICS_CACHE_SECONDS = _int_env("DASHBOARD_ANALYTICS_CACHE_SECONDS", 300)
+
+# Cached per-user unread notification counter. Updated on create/read in the
+# process that made the change; the cache is per process, so the TTL bounds
+# how long other workers (and cron writes) take to show up.
+NOTIFICATION_CACHE_SECONDS = _int_env("NOTIFICATION_CACHE_SECONDS", 60)
+
+# Admin dashboard counters (pending queues, unread inbox, open chats). The
+# cache is per process, so they are recounted after this many seconds.
+ADMIN_COUNTERS_CACHE_SECONDS = _int_env("ADMIN_COUNTERS_CACHE_SECONDS", 30)
+
+# Fan-out backend for the notification SSE stream. The in-memory broker only
+# reaches streams in the same process; use core.pubsub.PostgresBroker
+# (LISTEN/NOTIFY) when running more than one ASGI worker.
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "core.pubsub.InMemoryBroker")
+# Keep off until the site runs under ASGI (wolvcapital.asgi) with a
+# cross-process PUBSUB_BACKEND; the frontend's matching switch is
+# NEXT_PUBLIC_NOTIFICATION_STREAM. Until then the dashboard polls.
+NOTIFICATION_STREAM_ENABLED = os.getenv("NOTIFICATION_STREAM_ENABLED", "False").lower() == "true"
+
+# Retention windows for prune_retention (expired user notifications are
+# removed as soon as they expire).
+RETENTION_ADMIN_NOTIFICATION_DAYS = _int_env("RETENTION_ADMIN_NOTIFICATION_DAYS", 90)
+RETENTION_CHAT_MESSAGE_DAYS = _int_env("RETENTION_CHAT_MESSAGE_DAYS", 180)
+RETENTION_EMAIL_DELIVERY_DAYS = _int_env("RETENTION_EMAIL_DELIVERY_DAYS", 30)
+
+# Idempotency-Key replay window for money-moving endpoints, and how long an
+# unfinished claim blocks retries before it is treated as abandoned.
+IDEMPOTENCY_KEY_TTL_HOURS = _int_env("IDEMPOTENCY_KEY_TTL_HOURS", 24)
+IDEMPOTENCY_LOCK_SECONDS = _int_env("IDEMPOTENCY_LOCK_SECONDS", 60)
+
 # ------------------------------------------------------------------
 # Constance Configuration (Financial Controls)
 # ------------------------------------------------------------------
@@ -624,6 +662,12 @@ TESTING = any(arg in os.environ.get("PYTEST_CURRENT_TEST", "") for arg in ["::"]
     c in " ".join(sys.argv) for c in ["test", "pytest"]
 )
 
+# Post-commit side effects (emails, admin alerts, referral rewards) run on a
+# small in-process thread pool; tests run them inline at commit time.
+SIDE_EFFECTS_SYNC = TESTING or os.getenv("SIDE_EFFECTS_SYNC", "False").lower() == "true"
+SIDE_EFFECT_WORKERS = _int_env("SIDE_EFFECT_WORKERS", 4)
+SIDE_EFFECT_QUEUE_SIZE = _int_env("SIDE_EFFECT_QUEUE_SIZE", 1000)
+
 BRAND = {
     "name": "WolvCapital",
     "domain": "wolvcapital.com",
@@ -749,6 +793,26 @@ ACCOUNT_SIGNUP_REDIRECT_URL = f"{FRONTEND_URL}/accounts/login?signup=success"
 
 # Resend API key (optional). If present in production, we can send via Resend.
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+# core.email_backends.resend: one pooled keep-alive httpx client per worker
+# process. HTTP/2 is only negotiated when the optional `h2` package is installed.
+RESEND_API_BASE_URL = os.getenv("RESEND_API_BASE_URL", "https://api.resend.com")
+RESEND_POOL_SIZE = _int_env("RESEND_POOL_SIZE", 10)
+RESEND_KEEPALIVE_SECONDS = _int_env("RESEND_KEEPALIVE_SECONDS", 30)
+RESEND_HTTP2 = os.getenv("RESEND_HTTP2", "True").lower() == "true"
+# Messages of one send_messages() call posted concurrently (<= pool size).
+RESEND_SEND_CONCURRENCY = _int_env("RESEND_SEND_CONCURRENCY", 4)
+# Emails per POST /emails/batch for bulk sends (Resend's maximum is 100).
+RESEND_BATCH_LIMIT = _int_env("RESEND_BATCH_LIMIT", 100)
+# core.bulk_email: provider requests per second across all bulk-send workers
+# (Resend's default limit is 2/s per team), and the worker pool size.
+BULK_EMAIL_RATE_PER_SECOND = float(os.getenv("BULK_EMAIL_RATE_PER_SECOND", "2"))
+BULK_EMAIL_WORKERS = _int_env("BULK_EMAIL_WORKERS", 4)
+# core.email_delivery: send attempts are buffered and bulk-inserted into
+# EmailDelivery by a background thread; tests write on the calling thread.
+EMAIL_DELIVERY_LOG_ENABLED = os.getenv("EMAIL_DELIVERY_LOG_ENABLED", "True").lower() == "true"
+EMAIL_DELIVERY_LOG_SYNC = TESTING or os.getenv("EMAIL_DELIVERY_LOG_SYNC", "False").lower() == "true"
+EMAIL_DELIVERY_LOG_BATCH_SIZE = _int_env("EMAIL_DELIVERY_LOG_BATCH_SIZE", 200)
+EMAIL_DELIVERY_LOG_FLUSH_SECONDS = _int_env("EMAIL_DELIVERY_LOG_FLUSH_SECONDS", 5)
 
 # Anymail configuration (Resend)
 ANYMAIL = {
@@ -791,6 +855,10 @@ SERVER_EMAIL = DEFAULT_FROM_EMAIL
 # Email timeout (90 seconds)
 EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "90"))
 
+# core.email_templates: cache compiled email templates per process. Off in
+# DEBUG so template edits show up without a restart.
+EMAIL_TEMPLATE_CACHE = os.getenv("EMAIL_TEMPLATE_CACHE", str(not DEBUG)).lower() == "true"
+
 # Email subject prefix
 EMAIL_SUBJECT_PREFIX = os.getenv("EMAIL_SUBJECT_PREFIX", "[WolvCapital] ")
 
@@ -15,8 +15,9 @@ from transactions.admin import SystemStatusView
 urlpatterns = [
     path("api/cards/", include("cards.urls")),
     path("", include("core.urls")),  # Root, /healthz/, /agreements/x/pdf/, /contact/, /inbox/
-    path("admin/", admin.site.urls),
+    # Before admin.site.urls, whose catch-all would otherwise swallow it.
     path("admin/system-status/", SystemStatusView.as_view(), name="system_status"),
+    path("admin/", admin.site.urls),
     path("accounts/", include("allauth.urls")),
     path("api/", include("api.urls")),
     path("api/chat/", include("chat.urls")),